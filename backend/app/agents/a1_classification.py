@@ -1,8 +1,12 @@
 import json
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from app.agents.base import BaseAgent
 from app.core.config import settings
 from app.schemas.agent_schemas import ClassificationOutput
+from app.services.embedding_service import embedding_service
+from app.services.llm_cache import llm_cache
+from app.services.prompt_registry import RenderedPrompt, prompt_registry
+from app.services.semantic_cache import semantic_cache
 
 class ClassificationAgent(BaseAgent):
     def __init__(self):
@@ -10,30 +14,70 @@ class ClassificationAgent(BaseAgent):
             base_url="https://openrouter.ai/api/v1",
             api_key=settings.OPENROUTER_API_KEY,
         )
-        self.system_prompt = """
-        You are a highly sophisticated Classification Agent in a Multi-Agent Outreach System. 
-        Your task is to analyze user context and classify it into structured data for downstream agents.
-        
-        Analyze the intent, audience, and urgency to provide precise categories.
-        
-        Fields:
-        - task_type: The primary action (e.g., 'Initial Outreach', 'Follow-up', 'Nudge', 'Announcement', 'Support')
-        - urgency: High, Medium, or Low based on the timeline and tone.
-        - category: Industry or product vertical (e.g., 'SaaS', 'Fintech', 'LegalTech', 'DevTools', 'HRTech')
-        - behavioral_segment: Persona traits or stage (e.g., 'Decision Maker', 'Technical Evaluator', 'Early Adopter')
-        - intent_summary: A 1-sentence summary of the core value proposition or request.
-
-        Return ONLY valid JSON.
-        """
-
-    def run(self, context: str) -> ClassificationOutput:
-        response = self.client.chat.completions.create(
+        self.async_client = AsyncOpenAI(
+            base_url="https://openrouter.ai/api/v1",
+            api_key=settings.OPENROUTER_API_KEY,
+        )
+
+    def _build_prompt(self, context: str) -> RenderedPrompt:
+        return prompt_registry.render("classification", context)
+
+    def _cache_key(self, prompt: RenderedPrompt) -> str:
+        return llm_cache.make_key(
+            settings.DEFAULT_LLM_MODEL, prompt.messages, response_format="json_object", max_tokens=prompt.max_tokens,
+        )
+
+    def _request_kwargs(self, prompt: RenderedPrompt) -> dict:
+        kwargs = dict(
             model=settings.DEFAULT_LLM_MODEL, # Dynamically set from settings
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": context}
-            ],
+            messages=prompt.messages,
             response_format={"type": "json_object"}
         )
-        data = json.loads(response.choices[0].message.content)
-        return ClassificationOutput(**data)
+        if prompt.max_tokens is not None:
+            kwargs["max_tokens"] = prompt.max_tokens
+        return kwargs
+
+    def run(self, context: str, use_cache: bool = True) -> ClassificationOutput:
+        prompt = self._build_prompt(context)
+        key = self._cache_key(prompt)
+        cached = llm_cache.get(key, bypass=not use_cache)
+        if cached:
+            return ClassificationOutput(**json.loads(cached))
+
+        # Paraphrases of past briefs reuse the stored classification
+        vector = None
+        if use_cache and settings.SEMANTIC_CACHE_ENABLED:
+            vector = embedding_service.get_embeddings(context)
+            similar = semantic_cache.lookup(vector)
+            if similar is not None:
+                return similar
+
+        response = self.client.chat.completions.create(**self._request_kwargs(prompt))
+        content = response.choices[0].message.content
+        result = ClassificationOutput(**json.loads(content))
+        llm_cache.set(key, content)
+        if vector is not None:
+            semantic_cache.store(vector, result)
+        return result
+
+    async def arun(self, context: str, use_cache: bool = True) -> ClassificationOutput:
+        prompt = self._build_prompt(context)
+        key = self._cache_key(prompt)
+        cached = await llm_cache.aget(key, bypass=not use_cache)
+        if cached:
+            return ClassificationOutput(**json.loads(cached))
+
+        vector = None
+        if use_cache and settings.SEMANTIC_CACHE_ENABLED:
+            vector = await embedding_service.aget_embeddings(context)
+            similar = semantic_cache.lookup(vector)
+            if similar is not None:
+                return similar
+
+        response = await self.async_client.chat.completions.create(**self._request_kwargs(prompt))
+        content = response.choices[0].message.content
+        result = ClassificationOutput(**json.loads(content))
+        await llm_cache.aset(key, content)
+        if vector is not None:
+            semantic_cache.store(vector, result)
+        return result
@@ -1,22 +1,16 @@
-import faiss
-import numpy as np
-import os
-from typing import List, Dict
+import asyncio
+from typing import List, Dict, Optional
 from app.agents.base import BaseAgent
 from app.services.embedding_service import embedding_service
+from app.services.icp_index_manager import ICPIndexManager, icp_index_manager
 from app.schemas.agent_schemas import ClassificationOutput
 
 class ICPMatcherAgent(BaseAgent):
-    def __init__(self, index_path: str = "data/vector_db/icp.index"):
-        self.index_path = index_path
-        self.dimension = 384  # For all-MiniLM-L6-v2
-        
-        if os.path.exists(self.index_path):
-            self.index = faiss.read_index(self.index_path)
-        else:
-            self.index = faiss.IndexFlatL2(self.dimension)
+    def __init__(self, index_manager: Optional[ICPIndexManager] = None):
+        # Index built from the ICPProfile table; hot-swaps when a new version is published
+        self.index_manager = index_manager or icp_index_manager
             
-        # Realistic ICP database for Demo
+        # Demo ICPs, used only while no profiles have been indexed
         self.icp_db = {
             0: {
                 "id": "icp_b2b_saas", 
@@ -54,19 +48,30 @@ class ICPMatcherAgent(BaseAgent):
                 "preferences": {"LinkedIn": 0.8, "Email": 0.8, "Call": 0.1}
             }
         }
+        # Channel preferences for profiles indexed without their own (e.g. the demo ICPs seeded as rows)
+        self.demo_preferences = {icp["id"]: icp["preferences"] for icp in self.icp_db.values()}
+
+    def _query_text(self, classification: ClassificationOutput) -> str:
+        return f"{classification.category} {classification.behavioral_segment} {classification.intent_summary}"
+
+    def _search(self, query_vector: List[float]) -> Dict:
+        hits = self.index_manager.search(query_vector, k=1)
+        if not hits:
+            # Fallback to first demo ICP if no data indexed
+            return self.icp_db[0]
+
+        profile, similarity = hits[0]
+        match = {**profile, "score": round(similarity, 4)}
+        if "preferences" not in match and profile["id"] in self.demo_preferences:
+            match["preferences"] = self.demo_preferences[profile["id"]]
+        return match
 
     def run(self, classification: ClassificationOutput) -> Dict:
         # Create a query string from classification
-        query_text = f"{classification.category} {classification.behavioral_segment} {classification.intent_summary}"
-        query_embedding = np.array([embedding_service.get_embeddings(query_text)]).astype('float32')
-        
-        # Search in FAISS
-        # For MVP, if index is empty, we use a simple fallback or mock search
-        if self.index.ntotal == 0:
-            # Fallback to first available for MVP demo if no data indexed
-            return self.icp_db[0]
-            
-        D, I = self.index.search(query_embedding, 1)
-        match_id = int(I[0][0])
-        
-        return self.icp_db.get(match_id, self.icp_db[0])
+        query_vector = embedding_service.get_embeddings(self._query_text(classification))
+        return self._search(query_vector)
+
+    async def arun(self, classification: ClassificationOutput) -> Dict:
+        # Encoding and FAISS search are CPU-bound; keep them off the event loop
+        query_vector = await embedding_service.aget_embeddings(self._query_text(classification))
+        return await asyncio.to_thread(self._search, query_vector)
@@ -1,25 +1,52 @@
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Tuple
 from app.agents.base import BaseAgent
 from app.schemas.agent_schemas import ClassificationOutput
-from app.services.decision_engine import DecisionEngine
+from app.services.decision_engine import decision_engine
+from app.services.engagement_stats import engagement_stats
 
 class PlatformDecisionAgent(BaseAgent):
     def __init__(self):
-        self.engine = DecisionEngine()
+        self.engine = decision_engine
 
-    def run(self, classification: ClassificationOutput, icp_match: Dict) -> str:
+    def _features(self, classification: ClassificationOutput, icp_match: Dict) -> Dict:
         # Extract features for DecisionEngine
         # In a real system, these would come from database or prior agent context
-        icp_preference = icp_match.get("preferences", {"LinkedIn": 0.8, "Email": 0.6})
-        business_objective = classification.task_type # Use task_type as objective
-        historical_engagement = {"LinkedIn": 0.5, "Email": 0.7, "Call": 0.2}
-
-        selected_channel, reasoning = self.engine.score_channels(
+        return dict(
             urgency=classification.urgency,
-            icp_preference=icp_preference,
-            business_objective=business_objective,
-            historical_engagement=historical_engagement
+            icp_preference=icp_match.get("preferences", {"LinkedIn": 0.8, "Email": 0.6}),
+            business_objective=classification.task_type, # Use task_type as objective
+            # Decayed success rates from past exports and calls for this ICP
+            historical_engagement=engagement_stats.engagement(icp_match.get("id")),
         )
-        
+
+    def run(self, classification: ClassificationOutput, icp_match: Dict) -> str:
+        selected_channel, reasoning = self.engine.score_channels(**self._features(classification, icp_match))
+
         # Log reasoning can be done here or in main flow
         return selected_channel
+
+    async def arun(self, classification: ClassificationOutput, icp_match: Dict) -> str:
+        # Pure in-memory scoring; cheaper to run inline than to hop threads
+        return self.run(classification, icp_match)
+
+    def rank(
+        self,
+        classification: ClassificationOutput,
+        icp_match: Dict,
+        top_k: int = 2,
+        channels: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """(channel, score) best first: the top_k channels, or the requested channels in ranked order."""
+        ranking = self.engine.rank_channels(**self._features(classification, icp_match))
+        if channels:
+            return [(ch, score) for ch, score in ranking if ch in channels]
+        return ranking[:top_k]
+
+    async def arank(
+        self,
+        classification: ClassificationOutput,
+        icp_match: Dict,
+        top_k: int = 2,
+        channels: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        return self.rank(classification, icp_match, top_k, channels)
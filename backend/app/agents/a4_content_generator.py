@@ -1,23 +1,24 @@
+import logging
+from typing import Any, AsyncIterator, Tuple
 from app.agents.base import BaseAgent
+from app.utils.json_stream import IncrementalJSONObjectParser
 from app.schemas.content_schemas import ContentOutput
 from app.schemas.agent_schemas import ClassificationOutput
-from app.services.content_service import ContentService
+from app.services.content_service import CompletionTruncated, ContentService
+
+logger = logging.getLogger(__name__)
+
+CONTENT_FIELDS = ("headline", "body", "cta")
 
 class ContentGeneratorAgent(BaseAgent):
     def __init__(self):
         self.content_service = ContentService()
 
-    def run(self, classification: ClassificationOutput, icp_match: dict, platform: str) -> ContentOutput:
-        # Context building for ContentService
-        context = f"Audience: {icp_match['name']}, Intent: {classification.intent_summary}, Urgency: {classification.urgency}"
-        
-        # Call the service
-        generated = self.content_service.generate_content(
-            platform=platform,
-            context=context,
-            temperature=0.8
-        )
-        
+    def build_context(self, classification: ClassificationOutput, icp_match: dict) -> str:
+        """The context A4's content prompts are rendered with; also signed for prompt near-duplicates."""
+        return f"Audience: {icp_match['name']}, Intent: {classification.intent_summary}, Urgency: {classification.urgency}"
+
+    def _to_output(self, generated, classification: ClassificationOutput, icp_match: dict, platform: str) -> ContentOutput:
         if not generated:
             # Fallback in case of failure
             return ContentOutput(
@@ -33,3 +34,56 @@ class ContentGeneratorAgent(BaseAgent):
             cta=generated.cta,
             platform=platform
         )
+
+    def run(self, classification: ClassificationOutput, icp_match: dict, platform: str, use_cache: bool = True) -> ContentOutput:
+        # Context building for ContentService
+        context = self.build_context(classification, icp_match)
+        
+        # Call the service
+        generated = self.content_service.generate_content(
+            platform=platform,
+            context=context,
+            temperature=0.8,
+            use_cache=use_cache
+        )
+        return self._to_output(generated, classification, icp_match, platform)
+
+    async def arun(self, classification: ClassificationOutput, icp_match: dict, platform: str, use_cache: bool = True) -> ContentOutput:
+        generated = await self.content_service.agenerate_content(
+            platform=platform,
+            context=self.build_context(classification, icp_match),
+            temperature=0.8,
+            use_cache=use_cache
+        )
+        return self._to_output(generated, classification, icp_match, platform)
+
+    async def astream(
+        self, classification: ClassificationOutput, icp_match: dict, platform: str, use_cache: bool = True
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yields ("token", delta) for every streamed chunk, ("field", {...}) as
+        soon as headline/body/cta is complete, ("truncated", {"detail": ...})
+        if the completion ran out of max_tokens, then ("content", ContentOutput).
+        """
+        parser = IncrementalJSONObjectParser()
+        try:
+            async for delta in self.content_service.astream_content(
+                platform=platform,
+                context=self.build_context(classification, icp_match),
+                temperature=0.8,
+                use_cache=use_cache
+            ):
+                yield "token", delta
+                for name, value in parser.feed(delta):
+                    if name in CONTENT_FIELDS:
+                        yield "field", {"name": name, "value": value}
+        except CompletionTruncated as e:
+            yield "truncated", {"detail": str(e)}
+        except Exception as e:
+            logger.error(f"Content stream failed: {str(e)}")
+
+        fields = parser.fields
+        if all(isinstance(fields.get(name), str) for name in CONTENT_FIELDS):
+            yield "content", ContentOutput(platform=platform, **{name: fields[name] for name in CONTENT_FIELDS})
+        else:
+            yield "content", self._to_output(None, classification, icp_match, platform)
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any
 
@@ -5,3 +6,10 @@ class BaseAgent(ABC):
     @abstractmethod
     def run(self, input_data: Any) -> Any:
         pass
+
+    async def arun(self, *args: Any, **kwargs: Any) -> Any:
+        """
+        Async entry point used by the pipeline. Agents with native async I/O
+        override this; the default keeps the blocking `run` off the event loop.
+        """
+        return await asyncio.to_thread(self.run, *args, **kwargs)
@@ -0,0 +1,155 @@
+"""
+pipeline.py
+Small DAG scheduler for the multi-agent flow.
+
+Each node declares the names of the nodes (or seed values) it consumes.
+A node starts as soon as all of its inputs are resolved, so independent
+branches overlap automatically. Sync callables are pushed to a worker
+thread; coroutine functions are awaited directly.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    """Raised when a node fails or times out; carries the failing node name."""
+
+    def __init__(self, node: str, cause: BaseException):
+        self.node = node
+        self.cause = cause
+        detail = "timed out" if isinstance(cause, asyncio.TimeoutError) else str(cause)
+        super().__init__(f"Pipeline node '{node}' failed: {detail}")
+
+
+@dataclass
+class Node:
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+
+
+@dataclass
+class PipelineResult:
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def __getitem__(self, name: str) -> Any:
+        return self.outputs[name]
+
+
+class Pipeline:
+    def __init__(self, name: str = "pipeline"):
+        self.name = name
+        self.nodes: Dict[str, Node] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: Iterable[str] = (),
+        timeout: Optional[float] = None,
+    ) -> "Pipeline":
+        """
+        Registers a node. `fn` is called with keyword arguments named after
+        its inputs. Returns self so graphs can be built fluently.
+        """
+        if name in self.nodes:
+            raise ValueError(f"Duplicate pipeline node '{name}'")
+        self.nodes[name] = Node(name=name, fn=fn, inputs=tuple(inputs), timeout=timeout)
+        return self
+
+    def validate(self, seeds: Iterable[str] = ()) -> None:
+        known = set(seeds) | set(self.nodes)
+        for node in self.nodes.values():
+            missing = [i for i in node.inputs if i not in known]
+            if missing:
+                raise ValueError(f"Node '{node.name}' has unknown inputs: {missing}")
+
+        # Kahn's algorithm to reject cycles up-front
+        indegree = {n: sum(1 for i in node.inputs if i in self.nodes) for n, node in self.nodes.items()}
+        ready = [n for n, d in indegree.items() if d == 0]
+        visited = 0
+        while ready:
+            current = ready.pop()
+            visited += 1
+            for other in self.nodes.values():
+                if current in other.inputs:
+                    indegree[other.name] -= 1
+                    if indegree[other.name] == 0:
+                        ready.append(other.name)
+        if visited != len(self.nodes):
+            raise ValueError(f"Pipeline '{self.name}' contains a cycle")
+
+    async def execute(
+        self,
+        on_node_done: Optional[Callable[[str, Any, float], Any]] = None,
+        **seeds: Any,
+    ) -> PipelineResult:
+        """
+        Runs every node once and returns all outputs with per-node timings.
+        The first failure cancels the nodes still in flight. `on_node_done`
+        (sync or async) is called with (name, output, elapsed_ms) as each
+        node finishes, e.g. to stream progress to a client.
+        """
+        self.validate(seeds)
+        result = PipelineResult(outputs=dict(seeds))
+        tasks: Dict[str, asyncio.Task] = {}
+        started = time.perf_counter()
+
+        async def resolve(name: str) -> Any:
+            if name in tasks:
+                return await tasks[name]
+            return seeds[name]
+
+        async def run_node(node: Node) -> Any:
+            args = {}
+            for dep in node.inputs:
+                args[dep] = await resolve(dep)
+
+            node_start = time.perf_counter()
+            try:
+                call = self._invoke(node.fn, args)
+                value = await asyncio.wait_for(call, timeout=node.timeout)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as exc:
+                raise PipelineError(node.name, exc) from exc
+            finally:
+                result.timings_ms[node.name] = round((time.perf_counter() - node_start) * 1000, 2)
+
+            result.outputs[node.name] = value
+            if on_node_done is not None:
+                notified = on_node_done(node.name, value, result.timings_ms[node.name])
+                if inspect.isawaitable(notified):
+                    await notified
+            return value
+
+        for node in self.nodes.values():
+            tasks[node.name] = asyncio.create_task(run_node(node), name=f"{self.name}:{node.name}")
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            result.total_ms = round((time.perf_counter() - started) * 1000, 2)
+            logger.info("Pipeline %s timings (ms): %s | total=%s", self.name, result.timings_ms, result.total_ms)
+
+        return result
+
+    @staticmethod
+    def _invoke(fn: Callable[..., Any], args: Dict[str, Any]) -> Awaitable[Any]:
+        if inspect.iscoroutinefunction(fn):
+            return fn(**args)
+        return asyncio.to_thread(fn, **args)
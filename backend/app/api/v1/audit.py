@@ -0,0 +1,49 @@
+"""
+audit.py  –  /api/v1/audit/*
+Audit history across the hot audit_logs table and its Parquet archive
+(see app.services.audit_archive).
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from app.database.session import get_session
+from app.schemas.audit_schemas import AuditEntry, AuditLogResponse, AuditPartition, AuditPartitionsResponse
+from app.services.audit_archive import partition_summary, search_audit
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+
+@router.get("/logs", response_model=AuditLogResponse)
+def audit_logs(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    action: Optional[str] = None,
+    channel: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    include_text: bool = False,
+    include_archive: bool = True,
+    db: Session = Depends(get_session),
+):
+    try:
+        rows = search_audit(
+            db, start=start, end=end, action=action, channel=channel,
+            limit=limit, include_text=include_text, include_archive=include_archive,
+        )
+    except RuntimeError as exc:  # pyarrow missing
+        raise HTTPException(status_code=503, detail=str(exc))
+    entries = [AuditEntry(**row) for row in rows]
+    return AuditLogResponse(entries=entries, total=len(entries))
+
+
+@router.get("/partitions", response_model=AuditPartitionsResponse)
+def audit_partitions(db: Session = Depends(get_session)):
+    summary = partition_summary(db)
+    return AuditPartitionsResponse(
+        hot_rows=summary["hot_rows"],
+        hot_since=summary["hot_since"],
+        archived_rows=summary["archived_rows"],
+        partitions=[AuditPartition.model_validate(p, from_attributes=True) for p in summary["partitions"]],
+    )
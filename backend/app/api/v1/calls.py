@@ -0,0 +1,54 @@
+"""
+calls.py  –  /api/v1/calls/*
+Dialer-facing queue API: claim the next calls under a lease, extend the
+lease while dialling, then complete with done/failed.
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.database.session import get_session
+from app.schemas.call_schemas import (
+    CallClaimRequest, CallClaimResponse, ClaimedCall,
+    CallLeaseRequest, CallCompleteRequest, CallLeaseResponse,
+)
+from app.services.call_queue_service import claim_calls, extend_lease, complete_call
+
+router = APIRouter(prefix="/calls", tags=["calls"])
+
+LEASE_LOST = "Lease not held: the call was completed, requeued or claimed by another worker"
+
+
+@router.post("/claim", response_model=CallClaimResponse)
+def claim(req: CallClaimRequest, db: Session = Depends(get_session)):
+    calls = claim_calls(db, req.worker_id, req.limit, req.lease_seconds or settings.CALL_LEASE_SECONDS)
+    items = [
+        ClaimedCall(
+            id=c.id,
+            lead_name=c.lead_name,
+            phone=c.phone,
+            script=c.script,
+            priority=c.priority,
+            campaign_id=c.campaign_id,
+            lease_token=c.lease_token,
+            lease_expires_at=c.lease_expires_at,
+        )
+        for c in calls
+    ]
+    return CallClaimResponse(calls=items, count=len(items))
+
+
+@router.post("/{call_id}/extend", response_model=CallLeaseResponse)
+def extend(call_id: int, req: CallLeaseRequest, db: Session = Depends(get_session)):
+    call = extend_lease(db, call_id, req.lease_token, req.lease_seconds or settings.CALL_LEASE_SECONDS)
+    if not call:
+        raise HTTPException(status_code=409, detail=LEASE_LOST)
+    return CallLeaseResponse(id=call.id, status=call.status, lease_expires_at=call.lease_expires_at)
+
+
+@router.post("/{call_id}/complete", response_model=CallLeaseResponse)
+def complete(call_id: int, req: CallCompleteRequest, db: Session = Depends(get_session)):
+    call = complete_call(db, call_id, req.lease_token, req.status)
+    if not call:
+        raise HTTPException(status_code=409, detail=LEASE_LOST)
+    return CallLeaseResponse(id=call.id, status=call.status)
@@ -2,19 +2,24 @@
 dashboard.py  –  GET /api/v1/dashboard/*
 """
 from typing import Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session
 
+from app.core.config import settings
 from app.database.session import get_session
 from app.schemas.dashboard_schemas import (
     DashboardStats, PipelineHistoryResponse, ActivityResponse,
-    CallQueueResponse,
+    CallQueueResponse, LLMCacheStats, SemanticCacheStats, OutboxStats,
+    SimilarCampaignsResponse,
 )
 from app.services.dashboard_service import (
-    get_dashboard_stats, get_pipeline_history,
+    get_dashboard_stats, get_pipeline_history, get_similar_campaigns,
     get_call_queue, update_call_status,
 )
 from app.services.activity_service import get_activity
+from app.services.export_outbox import export_outbox
+from app.services.llm_cache import llm_cache
+from app.services.semantic_cache import semantic_cache
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
@@ -25,25 +30,71 @@ def dashboard_stats(db: Session = Depends(get_session)):
 
 
 @router.get("/pipelines", response_model=PipelineHistoryResponse)
-def pipeline_history(limit: int = 50, db: Session = Depends(get_session)):
-    return get_pipeline_history(db, limit=limit)
+def pipeline_history(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    try:
+        return get_pipeline_history(db, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/pipelines/{campaign_id}/similar", response_model=SimilarCampaignsResponse)
+def similar_campaigns(
+    campaign_id: int,
+    threshold: Optional[float] = Query(None, ge=0.0, le=1.0),  # default: DEDUP_THRESHOLD
+    limit: int = Query(10, ge=1, le=50),
+    same_icp: bool = False,
+    db: Session = Depends(get_session),
+):
+    result = get_similar_campaigns(
+        db, campaign_id,
+        threshold=settings.DEDUP_THRESHOLD if threshold is None else threshold,
+        limit=limit, same_icp=same_icp,
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return result
 
 
 @router.get("/activity", response_model=ActivityResponse)
-def activity_log(channel: Optional[str] = None, limit: int = 100, db: Session = Depends(get_session)):
-    return get_activity(db, channel=channel, limit=limit)
+def activity_log(
+    channel: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    try:
+        return get_activity(db, channel=channel, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/llm-cache", response_model=LLMCacheStats)
+def llm_cache_stats():
+    return llm_cache.stats()
+
+
+@router.get("/semantic-cache", response_model=SemanticCacheStats)
+def semantic_cache_stats():
+    return semantic_cache.stats()
+
 
+@router.get("/outbox", response_model=OutboxStats)
+def outbox_stats(db: Session = Depends(get_session)):
+    return export_outbox.stats(db)
 
 
 @router.get("/call-queue", response_model=CallQueueResponse)
-def call_queue(db: Session = Depends(get_session)):
-    return get_call_queue(db)
+def call_queue(status: Optional[str] = None, limit: int = 200, db: Session = Depends(get_session)):
+    return get_call_queue(db, status=status, limit=limit)
 
 
 @router.patch("/call-queue/{call_id}")
 def update_call(call_id: int, status: str, db: Session = Depends(get_session)):
     updated = update_call_status(db, call_id, status)
     if not updated:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Call not found")
     return updated
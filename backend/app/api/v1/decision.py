@@ -0,0 +1,62 @@
+"""
+decision.py  –  /api/v1/decision/*
+Batch channel planning for lead lists, runtime tuning of factor weights and
+the historical engagement rates A3 feeds into the engine.
+"""
+from typing import Optional
+
+from fastapi import APIRouter
+
+from app.schemas.decision_schemas import (
+    BatchDecisionRequest, BatchDecisionResponse, ChannelDecision,
+    DecisionWeights, DecisionWeightsUpdate, EngagementResponse,
+)
+from app.services.decision_engine import decision_engine, FACTORS
+from app.services.engagement_stats import engagement_stats
+
+router = APIRouter(prefix="/decision", tags=["decision"])
+
+
+@router.post("/score-batch", response_model=BatchDecisionResponse)
+def score_batch(payload: BatchDecisionRequest):
+    reqs = payload.requests
+    result = decision_engine.score_batch(
+        urgencies=[r.urgency for r in reqs],
+        icp_preferences=[r.icp_preference for r in reqs],
+        business_objectives=[r.business_objective for r in reqs],
+        historical_engagements=[r.historical_engagement for r in reqs],
+    )
+    channels = decision_engine.CHANNELS
+    scores = result.scores.round(4).tolist()
+    contributions = (
+        {f: result.contributions[f].round(4).tolist() for f in FACTORS}
+        if payload.include_contributions else None
+    )
+
+    decisions = [
+        ChannelDecision(
+            channel=channel,
+            scores=dict(zip(channels, scores[i])),
+            contributions=(
+                {f: dict(zip(channels, contributions[f][i])) for f in FACTORS}
+                if contributions else None
+            ),
+        )
+        for i, channel in enumerate(result.channels)
+    ]
+    return BatchDecisionResponse(decisions=decisions, total=len(decisions))
+
+
+@router.get("/weights", response_model=DecisionWeights)
+def get_weights():
+    return decision_engine.weights
+
+
+@router.patch("/weights", response_model=DecisionWeights)
+def update_weights(payload: DecisionWeightsUpdate):
+    return decision_engine.set_weights(payload.model_dump(exclude_none=True))
+
+
+@router.get("/engagement", response_model=EngagementResponse)
+def get_engagement(icp_id: Optional[str] = None):
+    return EngagementResponse(icp_id=icp_id, rates=engagement_stats.engagement(icp_id))
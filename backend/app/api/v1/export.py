@@ -1,21 +1,30 @@
 """
-export.py  –  POST /api/v1/export/{linkedin|email|call}
-All business logic delegated to export_service.
+export.py  –  POST /api/v1/export/{linkedin|email|email/batch|call}
+GET  /api/v1/export/{export_id}        – outbox delivery status
+POST /api/v1/export/{export_id}/retry  – requeue a dead-lettered export
+All business logic delegated to export_service. Routes are plain `def`:
+their Session work runs in FastAPI's threadpool, off the event loop.
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session
 
+from app.core.config import settings
+from app.database.models.exports import Export
 from app.database.session import get_session
 from app.schemas.export_schemas import (
     LinkedInExportRequest, LinkedInExportResponse,
     EmailExportRequest, EmailExportResponse,
+    EmailBatchExportRequest, EmailBatchExportResponse,
     CallExportRequest, CallExportResponse,
+    ExportStatusResponse,
 )
 from app.services.export_service import (
     export_to_linkedin,
     export_via_email,
+    export_email_batch,
     export_to_call_queue,
 )
+from app.services.export_outbox import export_outbox
 
 router = APIRouter(prefix="/export", tags=["export"])
 
@@ -24,32 +33,74 @@ MVP_USER_ID = 1
 
 
 @router.post("/linkedin", response_model=LinkedInExportResponse)
-async def linkedin_export(
+def linkedin_export(
     req: LinkedInExportRequest,
     db: Session = Depends(get_session),
 ):
-    result = await export_to_linkedin(req, db, user_id=MVP_USER_ID)
+    result = export_to_linkedin(req, db, user_id=MVP_USER_ID)
     if not result.success:
         raise HTTPException(status_code=500, detail=result.message)
     return result
 
 
 @router.post("/email", response_model=EmailExportResponse)
-async def email_export(
+def email_export(
     req: EmailExportRequest,
     db: Session = Depends(get_session),
 ):
-    result = await export_via_email(req, db, user_id=MVP_USER_ID)
+    result = export_via_email(req, db, user_id=MVP_USER_ID)
     # Email failures are returned as 200 with success=False so the FE can show the message
     return result
 
 
+@router.post("/email/batch", response_model=EmailBatchExportResponse)
+def email_batch_export(
+    req: EmailBatchExportRequest,
+    db: Session = Depends(get_session),
+):
+    if len(req.messages) > settings.SMTP_BATCH_MAX_MESSAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.SMTP_BATCH_MAX_MESSAGES} messages per batch.",
+        )
+    # Per-message failures are reported in `results`, as with the single-send endpoint
+    return export_email_batch(req, db, user_id=MVP_USER_ID)
+
+
 @router.post("/call", response_model=CallExportResponse)
-async def call_export(
+def call_export(
     req: CallExportRequest,
     db: Session = Depends(get_session),
 ):
-    result = await export_to_call_queue(req, db, user_id=MVP_USER_ID)
+    result = export_to_call_queue(req, db, user_id=MVP_USER_ID)
     if not result.success:
         raise HTTPException(status_code=500, detail=result.message)
     return result
+
+
+def _status_response(record: Export) -> ExportStatusResponse:
+    return ExportStatusResponse(
+        export_id=record.id,
+        channel=record.channel,
+        status=record.status,
+        attempts=record.attempts or 0,
+        next_attempt_at=record.next_attempt_at,
+        delivered_at=record.delivered_at,
+        error_message=record.error_message,
+    )
+
+
+@router.get("/{export_id}", response_model=ExportStatusResponse)
+def export_status(export_id: int, db: Session = Depends(get_session)):
+    record = db.get(Export, export_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return _status_response(record)
+
+
+@router.post("/{export_id}/retry", response_model=ExportStatusResponse)
+def retry_export(export_id: int, db: Session = Depends(get_session)):
+    record = export_outbox.requeue(db, export_id)
+    if not record:
+        raise HTTPException(status_code=409, detail="Only dead or failed exports with a stored payload can be retried")
+    return _status_response(record)
@@ -1,20 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
-from app.database.session import get_session
+from app.core.config import settings
+from app.database.session import engine
 from app.database.models.campaigns import Campaign
 from app.database.models.exports import CallQueue
 from app.agents.a1_classification import ClassificationAgent
 from app.agents.a2_icp_matcher import ICPMatcherAgent
 from app.agents.a3_platform_decision import PlatformDecisionAgent
 from app.agents.a4_content_generator import ContentGeneratorAgent
-from app.schemas.content_schemas import ContentOutput
+from app.agents.pipeline import Pipeline
+from app.services import rollups
+from app.services.decision_engine import CHANNELS
+from app.services.near_duplicates import CONTENT, PROMPT, content_text, near_duplicates, prompt_text, signature
+from app.schemas.agent_schemas import ClassificationOutput
+from app.schemas.content_schemas import ChannelVariant, ContentOutput, MultiChannelResponse
 from app.utils.audit_logger import AuditLogger
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 class GenerateRequest(BaseModel):
     context: str
+    use_cache: bool = True  # False forces fresh LLM calls
+
+
+class MultiGenerateRequest(GenerateRequest):
+    top_k: int = Field(default=2, ge=1, le=len(CHANNELS))  # best-scoring channels to generate for
+    channels: Optional[List[str]] = None  # explicit channels instead of the top k
+    queue_calls: bool = False  # comparison copy by default; True also queues a Call variant for dialling
 
 # Instantiate agents
 a1 = ClassificationAgent()
@@ -22,67 +43,322 @@ a2 = ICPMatcherAgent()
 a3 = PlatformDecisionAgent()
 a4 = ContentGeneratorAgent()
 
-@router.post("/generate", response_model=ContentOutput)
-def generate_content(request: GenerateRequest, db: Session = Depends(get_session)):
-    try:
-        # Step 1: Classification
-        classification = a1.run(request.context)
-        
-        # Step 2: ICP Matching
-        icp_match = a2.run(classification)
-        
-        # Step 3: Platform Decision
-        platform = a3.run(classification, icp_match)
-        
-        # Step 4: Content Generation
-        content = a4.run(classification, icp_match, platform)
-        
-        # Step 5: Persist as a Campaign for History
-        campaign = Campaign(
-            user_id=1,  # Default for MVP
-            intent=classification.intent_summary,
-            audience="General",  # Audience could be parsed from context in future
-            urgency=classification.urgency,
-            channel=platform,
-            headline=content.headline,
-            body=content.body,
-            cta=content.cta,
-            platform=platform,
-            icp_id=icp_match.get('id', ""),
-            priority_score=icp_match.get('score', 0.0)
-        )
-        db.add(campaign)
+
+# ── Persistence ────────────────────────────────────────────────────────────────
+# A run's Campaign, CallQueue entry, rollup counter and audit row are one unit
+# of work: one transaction and one commit (fsync) per run instead of three.
+
+def _persist_run(context: str, classification: ClassificationOutput, icp_match: dict, platform: str, content: ContentOutput) -> int:
+    with Session(engine) as db:
+        campaign_id = _add_run(db, context, classification, icp_match, platform, content)
+        db.commit()
+        return campaign_id
+
+
+def _persist_variants(
+    context: str, classification: ClassificationOutput, icp_match: dict, variants: List[ChannelVariant], queue_calls: bool = False,
+) -> List[int]:
+    """Every channel's campaign from a fan-out run, still in a single commit; CallQueue entries only if asked for."""
+    with Session(engine) as db:
+        campaign_ids = [
+            _add_run(db, context, classification, icp_match, v.platform, v.content, queue_call=queue_calls) for v in variants
+        ]
         db.commit()
-        db.refresh(campaign)
-        
-        # Step 5.1: If channel is 'call', add to CallQueue
-        if platform.lower() == "call":
-            call_entry = CallQueue(
-                user_id=1,
-                lead_name="John Doe",  # Placeholder, should ideally come from context
-                phone="+1-555-0199",   # Placeholder
-                script=content.body,
-                priority=5,
-                status="queued"
-            )
-            db.add(call_entry)
-            db.commit()
-        
-        # Step 6: Log to AuditLog table
-        AuditLogger.log_generation(
-            db=db,
+        return campaign_ids
+
+
+def _add_run(
+    db: Session, context: str, classification: ClassificationOutput, icp_match: dict, platform: str, content: ContentOutput,
+    queue_call: bool = True,
+) -> int:
+    """Adds one run's campaign, call entry, rollup and audit row to the session; the caller commits."""
+    campaign = Campaign(
+        user_id=1,  # Default for MVP
+        intent=classification.intent_summary,
+        audience="General",  # Audience could be parsed from context in future
+        urgency=classification.urgency,
+        channel=platform,
+        headline=content.headline,
+        body=content.body,
+        cta=content.cta,
+        platform=platform,
+        icp_id=icp_match.get('id', ""),
+        priority_score=icp_match.get('score', 0.0)
+    )
+    db.add(campaign)
+    db.flush()  # assigns campaign.id for the call entry, inside the same transaction
+    rollups.increment(db, rollups.CAMPAIGNS)
+    if settings.DEDUP_MODE != "off":
+        _index_near_duplicates(db, campaign, classification, icp_match, content)
+
+    # Only 'call' decisions land in the CallQueue
+    if queue_call and platform.lower() == "call":
+        db.add(CallQueue(
             user_id=1,
-            task_type=classification.task_type,
-            input_text=request.context,
-            output_text=content.body,
-            channel=platform,
-            icp_id=icp_match.get('id', ""),
-            priority_score=icp_match.get('score', 0.0)
+            campaign_id=campaign.id,  # links call outcomes back to the ICP for engagement stats
+            lead_name="John Doe",  # Placeholder, should ideally come from context
+            phone="+1-555-0199",   # Placeholder
+            script=content.body,
+            priority=5,
+            status="queued"
+        ))
+
+    AuditLogger.log_generation(
+        db=db,
+        user_id=1,
+        task_type=classification.task_type,
+        input_text=context,
+        output_text=content.body,
+        channel=platform,
+        icp_id=icp_match.get('id', ""),
+        priority_score=icp_match.get('score', 0.0),
+        commit=False,
+    )
+    return campaign.id
+
+
+def _index_near_duplicates(db: Session, campaign: Campaign, classification: ClassificationOutput, icp_match: dict, content: ContentOutput) -> None:
+    """Flags copy that nearly repeats an earlier campaign for the same ICP, then indexes this one."""
+    content_sig = signature(content_text(content.headline, content.body))
+    if content.duplicate_of is None:
+        matches = near_duplicates.find(
+            db, CONTENT, content_sig, settings.DEDUP_THRESHOLD, limit=1,
+            icp_id=campaign.icp_id, exclude_id=campaign.id,
+        )
+        if matches:
+            content.duplicate_of, content.duplicate_similarity = matches[0]
+            near_duplicates.count("flagged")
+    campaign.duplicate_of = content.duplicate_of
+    near_duplicates.add(db, campaign.id, CONTENT, content_sig, campaign.icp_id, campaign.platform)
+    prompt_sig = signature(prompt_text(a4.build_context(classification, icp_match), campaign.platform))
+    near_duplicates.add(db, campaign.id, PROMPT, prompt_sig, campaign.icp_id, campaign.platform)
+
+
+def _find_reusable_content(classification: ClassificationOutput, icp_match: dict, platform: str) -> Optional[ContentOutput]:
+    prompt_sig = signature(prompt_text(a4.build_context(classification, icp_match), platform))
+    with Session(engine) as db:
+        matches = near_duplicates.find(
+            db, PROMPT, prompt_sig, settings.DEDUP_REUSE_THRESHOLD, limit=1,
+            icp_id=icp_match.get('id', ""), platform=platform,
+        )
+        if not matches:
+            return None
+        campaign_id, score = matches[0]
+        previous = db.get(Campaign, campaign_id)
+        if previous is None:
+            return None
+    near_duplicates.count("reused")
+    return ContentOutput(
+        headline=previous.headline,
+        body=previous.body,
+        cta=previous.cta,
+        platform=platform,
+        duplicate_of=campaign_id,
+        duplicate_similarity=score,
+    )
+
+
+async def _reuse_content(classification: ClassificationOutput, icp_match: dict, platform: str, use_cache: bool) -> Optional[ContentOutput]:
+    """With DEDUP_MODE=reuse, copy from an earlier campaign whose A4 prompt was nearly identical."""
+    if settings.DEDUP_MODE != "reuse" or not use_cache:
+        return None
+    return await asyncio.to_thread(_find_reusable_content, classification, icp_match, platform)
+
+
+async def _generate_content(classification: ClassificationOutput, icp_match: dict, platform: str, use_cache: bool = True) -> ContentOutput:
+    reused = await _reuse_content(classification, icp_match, platform, use_cache)
+    if reused is not None:
+        return reused
+    return await a4.arun(classification, icp_match, platform, use_cache=use_cache)
+
+
+async def _generate_variants(
+    classification: ClassificationOutput, icp_match: dict, ranking: List[Tuple[str, float]], use_cache: bool = True,
+) -> List[ChannelVariant]:
+    """One A4 call per ranked channel, all in flight at once: latency is the slowest call, not the sum."""
+    async def variant(platform: str, score: float) -> ChannelVariant:
+        start = time.perf_counter()
+        content = await _generate_content(classification, icp_match, platform, use_cache)
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        return ChannelVariant(platform=platform, score=round(score, 4), elapsed_ms=elapsed_ms, content=content)
+
+    return list(await asyncio.gather(*(variant(platform, score) for platform, score in ranking)))
+
+
+async def _build_response(content: ContentOutput, campaign_id: int) -> ContentOutput:
+    content.campaign_id = campaign_id
+    return content
+
+
+async def _build_multi_response(variants: List[ChannelVariant], campaign_ids: List[int]) -> List[ChannelVariant]:
+    for variant, campaign_id in zip(variants, campaign_ids):
+        variant.content.campaign_id = campaign_id
+    return variants
+
+
+def _add_match_nodes(pipeline: Pipeline) -> Pipeline:
+    """A1 → A2: classification and ICP match, shared by every channel."""
+    return (
+        pipeline
+        .add("classification", a1.arun, inputs=("context", "use_cache"), timeout=settings.PIPELINE_LLM_TIMEOUT)
+        .add("icp_match", a2.arun, inputs=("classification",), timeout=settings.PIPELINE_STEP_TIMEOUT)
+    )
+
+
+def _add_agent_nodes(pipeline: Pipeline) -> Pipeline:
+    """A1 → A2 → A3: everything needed before content generation."""
+    return _add_match_nodes(pipeline).add(
+        "platform", a3.arun, inputs=("classification", "icp_match"), timeout=settings.PIPELINE_STEP_TIMEOUT,
+    )
+
+
+def _add_persistence_nodes(pipeline: Pipeline) -> Pipeline:
+    """One transactional write for the whole run; the response waits on its campaign id."""
+    step_timeout = settings.PIPELINE_STEP_TIMEOUT
+    return (
+        pipeline
+        .add("campaign_id", _persist_run, inputs=("context", "classification", "icp_match", "platform", "content"), timeout=step_timeout)
+        .add("response", _build_response, inputs=("content", "campaign_id"))
+    )
+
+
+def build_generate_pipeline() -> Pipeline:
+    pipeline = _add_agent_nodes(Pipeline("generate"))
+    pipeline.add(
+        "content", _generate_content,
+        inputs=("classification", "icp_match", "platform", "use_cache"),
+        timeout=settings.PIPELINE_LLM_TIMEOUT,
+    )
+    return _add_persistence_nodes(pipeline)
+
+
+def build_multi_channel_pipeline() -> Pipeline:
+    """
+    A1 → A2 once, A3 ranks the channels, then A4 runs for the top k
+    concurrently. All campaigns are written in one transaction. A Call
+    variant is only queued for dialling when the request sets queue_calls.
+    """
+    step_timeout = settings.PIPELINE_STEP_TIMEOUT
+    return (
+        _add_match_nodes(Pipeline("generate_multi"))
+        .add("ranking", a3.arank, inputs=("classification", "icp_match", "top_k", "channels"), timeout=step_timeout)
+        .add(
+            "variants", _generate_variants,
+            inputs=("classification", "icp_match", "ranking", "use_cache"),
+            timeout=settings.PIPELINE_LLM_TIMEOUT,
+        )
+        .add(
+            "campaign_ids", _persist_variants,
+            inputs=("context", "classification", "icp_match", "variants", "queue_calls"), timeout=step_timeout,
         )
-        
-        content.campaign_id = campaign.id
-        return content
+        .add("response", _build_multi_response, inputs=("variants", "campaign_ids"))
+    )
+
+
+generate_pipeline = build_generate_pipeline()
+multi_channel_pipeline = build_multi_channel_pipeline()
+prelude_pipeline = _add_agent_nodes(Pipeline("generate_prelude"))
+persist_pipeline = _add_persistence_nodes(Pipeline("generate_persist"))
+
+
+@router.post("/generate", response_model=ContentOutput)
+async def generate_content(request: GenerateRequest):
+    try:
+        result = await generate_pipeline.execute(context=request.context, use_cache=request.use_cache)
+        return result["response"]
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate/multi", response_model=MultiChannelResponse)
+async def generate_multi_channel(request: MultiGenerateRequest):
+    """Copy for several channels from one classification/ICP match, e.g. to compare LinkedIn and Email."""
+    channels = None
+    if request.channels:
+        by_name = {ch.lower(): ch for ch in CHANNELS}
+        unknown = [ch for ch in request.channels if ch.lower() not in by_name]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown channels {unknown}; expected some of {CHANNELS}")
+        channels = [by_name[ch.lower()] for ch in request.channels]
+    try:
+        result = await multi_channel_pipeline.execute(
+            context=request.context, use_cache=request.use_cache, top_k=request.top_k, channels=channels,
+            queue_calls=request.queue_calls,
+        )
+    except Exception as e:
+        logger.exception("Multi-channel generation failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    return MultiChannelResponse(variants=result["response"], content_ms=result.timings_ms.get("variants", 0.0))
+
+
+# ── Streaming (Server-Sent Events) ─────────────────────────────────────────────
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _stream_generation(context: str, use_cache: bool = True) -> AsyncIterator[str]:
+    """
+    Event order: one `stage` per agent (classification, icp_match, platform,
+    content), `token` deltas and `field` events while A4 streams, then
+    `done` with the persisted ContentOutput. A completion cut off at its
+    token cap emits `truncated` before `done` (the content is then the
+    fallback copy). Failures emit `error`.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def on_stage(name: str, output: Any, elapsed_ms: float) -> None:
+        await events.put(_sse("stage", {"stage": name, "elapsed_ms": elapsed_ms, "output": output}))
+
+    async def run_prelude():
+        try:
+            return await prelude_pipeline.execute(on_node_done=on_stage, context=context, use_cache=use_cache)
+        finally:
+            await events.put(None)
+
+    prelude = asyncio.create_task(run_prelude())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        stages = await prelude
+
+        classification = stages["classification"]
+        icp_match = stages["icp_match"]
+        platform = stages["platform"]
+
+        content_start = time.perf_counter()
+        content = await _reuse_content(classification, icp_match, platform, use_cache)
+        if content is None:
+            async for kind, payload in a4.astream(classification, icp_match, platform, use_cache=use_cache):
+                if kind == "content":
+                    content = payload
+                else:
+                    yield _sse(kind, {"delta": payload} if kind == "token" else payload)
+        elapsed_ms = round((time.perf_counter() - content_start) * 1000, 2)
+        yield _sse("stage", {"stage": "content", "elapsed_ms": elapsed_ms, "output": content})
+
+        persisted = await persist_pipeline.execute(
+            context=context,
+            classification=classification,
+            icp_match=icp_match,
+            platform=platform,
+            content=content,
+        )
+        yield _sse("done", persisted["response"])
+    except Exception as e:
+        logger.exception("Streaming generation failed")
+        yield _sse("error", {"detail": str(e)})
+    finally:
+        if not prelude.done():
+            prelude.cancel()
+
+
+@router.post("/generate/stream")
+async def generate_content_stream(request: GenerateRequest):
+    return StreamingResponse(
+        _stream_generation(request.context, request.use_cache),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,41 @@
+"""
+search.py  –  /api/v1/search
+Full-text search over campaigns and audit history (SQLite FTS5, BM25 ranking).
+"""
+import time
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.database.session import engine
+from app.schemas.search_schemas import SearchHit, SearchResponse
+from app.services.search_service import SearchUnavailable, search
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=SearchResponse)
+def search_content(
+    q: str = Query(..., min_length=1, max_length=500),
+    scope: Literal["campaigns", "audit"] = "campaigns",
+    channel: Optional[str] = None,
+    icp_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    started = time.perf_counter()
+    try:
+        rows = search(engine, q, scope=scope, channel=channel, icp_id=icp_id, start=start, end=end, limit=limit)
+    except SearchUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    hits = [SearchHit(**row) for row in rows]
+    return SearchResponse(
+        query=q,
+        hits=hits,
+        total=len(hits),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
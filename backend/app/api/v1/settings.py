@@ -25,6 +25,7 @@ def get_settings():
         linkedin_webhook_url=getattr(app_settings, "LINKEDIN_WEBHOOK_URL", None),
         openrouter_api_key_set=bool(app_settings.OPENROUTER_API_KEY),
         huggingface_api_key_set=bool(app_settings.HUGGINGFACE_API_KEY),
+        semantic_cache_threshold=app_settings.SEMANTIC_CACHE_THRESHOLD,
     )
 
 
@@ -42,6 +43,7 @@ def update_settings(payload: SettingsUpdate):
         "linkedin_webhook_url": "LINKEDIN_WEBHOOK_URL",
         "openrouter_api_key": "OPENROUTER_API_KEY",
         "huggingface_api_key": "HUGGINGFACE_API_KEY",
+        "semantic_cache_threshold": "SEMANTIC_CACHE_THRESHOLD",
     }
     
     env_path = find_dotenv()
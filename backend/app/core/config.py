@@ -14,17 +14,113 @@ class Settings(BaseSettings):
     # LLM model
     DEFAULT_LLM_MODEL: str = "amazon/nova-micro-v1"
 
+    # Embeddings (model loads lazily on first use)
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"  # torch | onnx | onnx-int8 (onnx needs the optional onnxruntime + optimum)
+    EMBEDDING_ONNX_INT8_FILE: str = "onnx/model_qint8_avx512_vnni.onnx"
+    EMBEDDING_PRELOAD: bool = False  # load at startup instead of on the first request
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = "data/embedding_cache"
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 4096
+    EMBEDDING_BATCH_ENABLED: bool = True  # coalesce concurrent async encode calls
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+
+    # Prompt registry token budgets (per-template input/output caps)
+    PROMPT_BUDGETS_ENABLED: bool = True  # off = no context truncation and no max_tokens on requests
+    PROMPT_TOKEN_ENCODING: str = "cl100k_base"  # tiktoken encoding (optional package); a character estimate is used without it
+
+    # Pipeline scheduler (per-node timeouts, seconds)
+    PIPELINE_LLM_TIMEOUT: float = 60.0
+    PIPELINE_STEP_TIMEOUT: float = 15.0
+
+    # LLM response cache (in-process LRU + SQLite tier)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "data/llm_cache.db"
+    LLM_CACHE_MEMORY_ENTRIES: int = 1024
+    LLM_CACHE_TTL_SECONDS: int = 60 * 60 * 24  # 1 day
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Semantic near-duplicate cache for A1 classification
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # cosine similarity
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 5000
+
+    # ICP FAISS index (versioned files + hot-swap pointer)
+    ICP_INDEX_DIR: str = "data/vector_db"
+    ICP_INDEX_AUTOBUILD: bool = True  # build once at startup if nothing is published yet
+
+    # Historical engagement counters used by the platform decision (A3)
+    ENGAGEMENT_HALF_LIFE_DAYS: float = 14.0
+    ENGAGEMENT_CHECKPOINT_SECONDS: float = 60.0
+    ENGAGEMENT_PRIOR_WEIGHT: float = 5.0  # pseudo-events pulling sparse ICPs toward the global rate
+
+    # Near-duplicate campaigns (MinHash/LSH over copy and prompts)
+    DEDUP_MODE: str = "flag"  # off | flag (mark duplicate_of) | reuse (also skip A4 for near-identical prompts)
+    DEDUP_THRESHOLD: float = 0.8  # estimated Jaccard similarity of headline + body
+    DEDUP_REUSE_THRESHOLD: float = 0.9  # prompt similarity needed to reuse earlier copy
+
     # SMTP (optional – email export)
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     SMTP_USERNAME: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
+    SMTP_TIMEOUT: float = 10.0
+    SMTP_POOL_SIZE: int = 4  # max open connections (= max concurrent sends)
+    SMTP_POOL_IDLE_CHECK_SECONDS: float = 30.0  # NOOP before reusing a connection idle this long
+    SMTP_POOL_MAX_MESSAGES: int = 100  # recycle a connection after this many sends
+    SMTP_RATE_LIMIT_PER_SECOND: float = 25.0  # per provider host; 0 disables
+    SMTP_BATCH_MAX_MESSAGES: int = 1000
+
+    # Background audit writer: group-commits AuditLog rows (off = written in the request's transaction)
+    AUDIT_WRITER_ENABLED: bool = False
+    AUDIT_WRITER_BATCH_SIZE: int = 200  # rows per executemany transaction
+    AUDIT_WRITER_FLUSH_MS: float = 50.0  # longest a buffered row waits
+    AUDIT_WRITER_MAX_BUFFER: int = 10000  # beyond this, rows are written in the caller's transaction
+
+    # Audit log retention: months older than this move from audit_logs to Parquet partitions
+    AUDIT_HOT_MONTHS: int = 3  # current month plus this many full months stay in the database
+    AUDIT_ARCHIVE_DIR: str = "data/audit_archive"
+    AUDIT_ARCHIVE_COMPRESSION_LEVEL: int = 9  # zstd
+
+    # Call queue dialer leases
+    CALL_LEASE_SECONDS: float = 300.0  # claimed calls return to queued if not completed/extended in time
+
+    # Export outbox (LinkedIn / email delivery workers)
+    EXPORT_WORKERS: int = 4  # started with the API; 0 = run `python -m app.services.export_outbox` instead
+    EXPORT_POLL_SECONDS: float = 1.0
+    EXPORT_CLAIM_BATCH: int = 10
+    EXPORT_LEASE_SECONDS: float = 120.0  # a claimed export is reclaimed if not finished by then
+    EXPORT_MAX_ATTEMPTS: int = 5  # then dead-lettered
+    EXPORT_RETRY_BASE_SECONDS: float = 5.0
+    EXPORT_RETRY_MAX_SECONDS: float = 900.0
 
     # LinkedIn webhook (optional – simulated in MVP)
     LINKEDIN_WEBHOOK_URL: Optional[str] = None
+    LINKEDIN_WEBHOOK_BATCH_SIZE: int = 50  # payloads per POST (JSON array body)
+    LINKEDIN_WEBHOOK_BATCH_WAIT_MS: float = 50.0
+    LINKEDIN_WEBHOOK_CONCURRENCY: int = 4  # POSTs in flight
+    LINKEDIN_WEBHOOK_MAX_CONNECTIONS: int = 10
+    LINKEDIN_WEBHOOK_MAX_RETRIES: int = 4  # on 429/5xx, honouring Retry-After
+    LINKEDIN_WEBHOOK_TIMEOUT: float = 10.0
+    LINKEDIN_WEBHOOK_RETRY_BUDGET_SECONDS: float = 50.0  # all attempts of one batch; capped at half of EXPORT_LEASE_SECONDS
 
     # DB
     DATABASE_URL: str = "sqlite:///./data/sqlite.db"
+    DB_ECHO: bool = False
+
+    # SQLite pragmas, applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"      # readers no longer block behind a writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"    # durable with WAL; FULL fsyncs on every commit
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000    # wait for the write lock instead of "database is locked"
+    SQLITE_CACHE_SIZE_KB: int = 65536     # page cache per connection
+    SQLITE_MMAP_SIZE: int = 268435456     # bytes of the file memory-mapped for reads (0 = off)
+
+    # Connection pool for server databases (Postgres etc. via DATABASE_URL)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800   # drop connections before server/proxy idle timeouts do
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,129 @@
+"""
+benchmark.py
+Concurrent write-throughput benchmark: bare engine vs build_engine().
+
+Each writer thread commits one small row per transaction (the shape of a
+generate or export write) while reader threads keep scanning the table, so
+lock contention between writers, and between readers and writers, shows
+up in the numbers. Both engines hit the same database in a scratch table
+(`bench_writes`) that is dropped afterwards.
+
+    python -m app.database.benchmark --writers 8 --readers 4 --writes 500
+    python -m app.database.benchmark --url "$DATABASE_URL"
+
+"bare" is what session.py used to build: create_engine(url) with only
+check_same_thread=False for SQLite, library defaults elsewhere.
+"""
+import argparse
+import statistics
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, event, func, select
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
+
+from app.database.session import build_engine
+
+_metadata = MetaData()
+bench_writes = Table(
+    "bench_writes",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("worker", Integer, nullable=False),
+    Column("payload", String(256), nullable=False),
+)
+
+
+def bare_engine(url: str) -> Engine:
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(url)
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _default_journal(dbapi_conn, _record):
+        # WAL persists in the file; put back SQLite's default so the baseline is honest
+        dbapi_conn.execute("PRAGMA journal_mode=DELETE")
+
+    return engine
+
+
+def run(engine: Engine, writers: int, readers: int, writes: int) -> Dict[str, float]:
+    _metadata.drop_all(engine)
+    _metadata.create_all(engine)
+
+    latencies: List[float] = []
+    errors = [0]
+    reads = [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def write(worker: int) -> None:
+        local = []
+        for i in range(writes):
+            start = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(bench_writes.insert().values(
+                        created_at=datetime.utcnow(), worker=worker, payload=f"{worker}:{i}".ljust(200, "x"),
+                    ))
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    def read() -> None:
+        while not done.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(select(func.count()).select_from(bench_writes)).scalar()
+                with lock:
+                    reads[0] += 1
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+    for t in reader_threads:
+        t.start()
+    started = time.perf_counter()
+    for t in writer_threads:
+        t.start()
+    for t in writer_threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for t in reader_threads:
+        t.join()
+
+    _metadata.drop_all(engine)
+    engine.dispose()
+    latencies.sort()
+    return {
+        "writes_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "reads_per_sec": round(reads[0] / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else 0.0,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2) if latencies else 0.0,
+        "errors": errors[0],
+        "seconds": round(elapsed, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare write throughput of the bare and tuned engines")
+    parser.add_argument("--url", default="sqlite:///./data/bench.db", help="Defaults to a scratch SQLite file")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=500, help="Commits per writer thread")
+    args = parser.parse_args()
+
+    for name, engine in (("bare", bare_engine(args.url)), ("tuned", build_engine(args.url))):
+        result = run(engine, args.writers, args.readers, args.writes)
+        print(f"{name:>5}: " + "  ".join(f"{k}={v}" for k, v in result.items()))
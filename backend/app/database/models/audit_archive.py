@@ -0,0 +1,18 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+
+class AuditArchive(SQLModel, table=True):
+    """One archived audit_logs partition: a zstd Parquet file holding part of a month (see app.services.audit_archive)."""
+    __tablename__ = "audit_archives"
+
+    path: str = Field(primary_key=True)   # relative to settings.AUDIT_ARCHIVE_DIR
+    month: str = Field(index=True)        # YYYY-MM
+    rows: int = 0
+    size_bytes: int = 0
+    min_id: Optional[int] = None
+    max_id: Optional[int] = None
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
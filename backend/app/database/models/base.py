@@ -12,7 +12,7 @@ class AuditLog(SQLModel, table=True):
     __tablename__ = "audit_logs"
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=datetime.utcnow, index=True)
     user_id: Optional[int] = Field(default=None, foreign_key="user.id")
     action: str = "generate"   # generate | export_linkedin | export_email | export_call
     task_type: str = ""
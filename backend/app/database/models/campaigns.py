@@ -1,10 +1,12 @@
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
 class Campaign(SQLModel, table=True):
     __tablename__ = "campaigns"
+    __table_args__ = (Index("ix_campaigns_created_id", "created_at", "id"),)  # keyset pagination
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -19,3 +21,4 @@ class Campaign(SQLModel, table=True):
     platform: str
     icp_id: Optional[str] = None
     priority_score: float = 0.0
+    duplicate_of: Optional[int] = Field(default=None, foreign_key="campaigns.id")  # earlier near-identical campaign
@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+
+class EngagementStat(SQLModel, table=True):
+    """Checkpoint of the decayed per-ICP, per-channel outcome counters."""
+    __tablename__ = "engagement_stats"
+
+    icp_id: str = Field(primary_key=True)   # "*" holds the all-ICP totals
+    channel: str = Field(primary_key=True)  # LinkedIn | Email | Call | SMS
+    attempts: float = 0.0                   # decayed as of updated_at
+    successes: float = 0.0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,29 +1,50 @@
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
 class Export(SQLModel, table=True):
+    """Also the export outbox: rows start `pending` and are delivered by export_outbox workers."""
     __tablename__ = "exports"
+    __table_args__ = (
+        Index("ix_exports_status_next_attempt", "status", "next_attempt_at"),
+        Index("ux_exports_idempotency_key", "idempotency_key", unique=True),
+        # Keyset pagination of the activity log, unfiltered and per channel
+        Index("ix_exports_created_id", "created_at", "id"),
+        Index("ix_exports_channel_created_id", "channel", "created_at", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     user_id: Optional[int] = Field(default=None, foreign_key="user.id")
     campaign_id: Optional[int] = Field(default=None, foreign_key="campaigns.id")
     channel: str            # linkedin | email | call
-    status: str             # success | failed | pending
+    status: str             # pending | delivering | retrying | success | failed | dead
     destination: Optional[str] = None  # email address, webhook url, CRM id
     error_message: Optional[str] = None
+    idempotency_key: Optional[str] = None
+    payload: Optional[str] = None       # JSON export request, replayed by the delivery worker
+    attempts: Optional[int] = 0
+    next_attempt_at: Optional[datetime] = None
+    locked_until: Optional[datetime] = None  # delivery lease; expired leases are reclaimed
+    delivered_at: Optional[datetime] = None
 
 
 class CallQueue(SQLModel, table=True):
     __tablename__ = "call_queue"
+    # Serves the dialer claim (status='queued' ORDER BY priority, created_at) and lease sweeps
+    __table_args__ = (Index("ix_call_queue_status_priority_created", "status", "priority", "created_at"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     user_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    campaign_id: Optional[int] = Field(default=None, foreign_key="campaigns.id")
     lead_name: str
     phone: str
     script: str
     priority: int = 5       # 1 (highest) – 10 (lowest)
     status: str = "queued"  # queued | dialling | done | failed
+    claimed_by: Optional[str] = None        # dialer worker id
+    lease_token: Optional[str] = Field(default=None, index=True)
+    lease_expires_at: Optional[datetime] = None  # expired leases go back to queued
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from sqlmodel import SQLModel, Field
 
@@ -9,3 +10,12 @@ class ICPProfile(SQLModel, table=True):
     description: str
     pain_points: str
     embedding_id: Optional[str] = None
+    preferences: Optional[str] = None  # JSON {channel: weight}; A3's ICP preference factor
+    # Set on every ORM insert/update; with the row count, lets each process spot edits made elsewhere
+    updated_at: Optional[datetime] = Field(
+        default_factory=datetime.utcnow, index=True, sa_column_kwargs={"onupdate": datetime.utcnow},
+    )
+
+    def embedding_text(self) -> str:
+        """Text both ICP embedding stores (matcher matrix and FAISS index) encode for this profile."""
+        return f"{self.industry} {self.size} {self.description} {self.pain_points}"
@@ -0,0 +1,25 @@
+from typing import Optional
+from sqlalchemy import BigInteger, Column, LargeBinary
+from sqlmodel import SQLModel, Field
+
+
+class CampaignSignature(SQLModel, table=True):
+    """MinHash signature of a campaign's copy or prompt (see app.services.near_duplicates)."""
+    __tablename__ = "campaign_signatures"
+
+    campaign_id: int = Field(foreign_key="campaigns.id", primary_key=True)
+    kind: str = Field(primary_key=True)    # content | prompt
+    icp_id: Optional[str] = None
+    platform: Optional[str] = None
+    signature: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
+class CampaignLSHBand(SQLModel, table=True):
+    """One LSH band bucket per signature band; the primary key doubles as the lookup index."""
+    __tablename__ = "campaign_lsh_bands"
+
+    # Key order (kind, bucket, ...) so a lookup is an IN over bucket on the key prefix
+    kind: str = Field(primary_key=True)
+    bucket: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    band: int = Field(primary_key=True)
+    campaign_id: int = Field(foreign_key="campaigns.id", primary_key=True)
@@ -0,0 +1,9 @@
+from sqlmodel import SQLModel, Field
+
+
+class StatCounter(SQLModel, table=True):
+    """Write-time rollups behind /dashboard/stats (see app.services.rollups)."""
+    __tablename__ = "stat_counters"
+
+    name: str = Field(primary_key=True)   # campaigns | exports:<channel> | _built
+    value: int = 0
@@ -1,10 +1,81 @@
+import os
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine, make_url
 from sqlmodel import SQLModel, create_engine, Session
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+
+def build_engine(url: str = None) -> Engine:
+    """
+    Engine for DATABASE_URL (or `url`), tuned from Settings.
+    SQLite gets WAL, busy timeout, cache and mmap pragmas on every connection;
+    server databases get a sized QueuePool with pre-ping and recycling.
+    """
+    url = make_url(url or settings.DATABASE_URL)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            echo=settings.DB_ECHO,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=True,
+        )
+
+    in_memory = url.database in (None, "", ":memory:")
+    if not in_memory:
+        directory = os.path.dirname(url.database)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    pool_args = {} if in_memory else {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    sqlite_engine = create_engine(
+        url,
+        echo=settings.DB_ECHO,
+        connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        **pool_args,
+    )
+    event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+    return sqlite_engine
+
+
+def _apply_sqlite_pragmas(dbapi_conn, _record) -> None:
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KB)}")  # negative = KiB
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    finally:
+        cursor.close()
+
+
+engine = build_engine()
 
 def init_db():
     SQLModel.metadata.create_all(engine)
+    _upgrade_existing_tables()
+
+def _upgrade_existing_tables():
+    # create_all() never alters existing tables; add new nullable columns and indexes in place
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
 
 def get_session():
     with Session(engine) as session:
@@ -7,12 +7,31 @@ from app.api.v1.generate import router as generate_router
 from app.api.v1.export import router as export_router
 from app.api.v1.dashboard import router as dashboard_router
 from app.api.v1.settings import router as settings_router
-from app.database.session import init_db
+from app.api.v1.decision import router as decision_router
+from app.api.v1.calls import router as calls_router
+from app.api.v1.audit import router as audit_router
+from app.api.v1.search import router as search_router
+from app.database.session import init_db, engine
+from app.services.icp_index_manager import ensure_index
+from app.services.embedding_service import embedding_service
+from app.services.engagement_stats import engagement_stats
+from app.services.rollups import ensure_rollups
+from app.services.search_service import ensure_search_index
+from app.services.smtp_pool import close_smtp_pool
+from app.services.export_outbox import export_outbox
+from app.services.audit_writer import audit_writer
+from app.services.webhook_client import webhook_client
+from sqlmodel import Session
 
 # Ensure new models are registered with SQLModel metadata before init_db()
 import app.database.models.base         # noqa: F401
 import app.database.models.campaigns    # noqa: F401
 import app.database.models.exports      # noqa: F401
+import app.database.models.icp          # noqa: F401
+import app.database.models.engagement   # noqa: F401
+import app.database.models.rollups      # noqa: F401
+import app.database.models.audit_archive  # noqa: F401
+import app.database.models.near_duplicates  # noqa: F401
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
@@ -29,10 +48,39 @@ app.include_router(generate_router, prefix="/api/v1/content", tags=["content"])
 app.include_router(export_router, prefix="/api/v1")
 app.include_router(dashboard_router, prefix="/api/v1")
 app.include_router(settings_router, prefix="/api/v1")
+app.include_router(decision_router, prefix="/api/v1")
+app.include_router(calls_router, prefix="/api/v1")
+app.include_router(audit_router, prefix="/api/v1")
+app.include_router(search_router, prefix="/api/v1")
 
 @app.on_event("startup")
 def on_startup():
     init_db()
+    ensure_search_index(engine)
+    if settings.EMBEDDING_PRELOAD:
+        embedding_service.model  # noqa: B018 — force the lazy load
+    with Session(engine) as db:
+        ensure_index(db)
+        engagement_stats.load(db)
+        ensure_rollups(db)
+    if settings.AUDIT_WRITER_ENABLED:
+        audit_writer.start()
+
+@app.on_event("startup")
+async def start_export_workers():
+    await export_outbox.start()
+
+@app.on_event("shutdown")
+async def stop_export_workers():
+    await export_outbox.stop()
+    await webhook_client.aclose()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    audit_writer.stop()
+    with Session(engine) as db:
+        engagement_stats.checkpoint(db)
+    close_smtp_pool()
 
 @app.get("/")
 def health_check():
@@ -1,4 +1,4 @@
-from .agent_schemas import ClassificationResponse
+from .agent_schemas import ClassificationResponse, ICPMatch, ICPResponse
 from .content_schemas import GenerateRequest, ContentResponse
 
-__all__ = ["ClassificationResponse", "GenerateRequest", "ContentResponse"]
+__all__ = ["ClassificationResponse", "ICPMatch", "ICPResponse", "GenerateRequest", "ContentResponse"]
@@ -12,3 +12,15 @@ class ClassificationOutput(BaseModel):
 class ClassificationResponse(ClassificationOutput):
     """Extended schema returned by the classification service (includes confidence)."""
     confidence_score: float = Field(default=0.5, ge=0.0, le=1.0)
+
+
+class ICPMatch(BaseModel):
+    icp_id: str
+    name: str
+    score: float
+    likelihood: str
+
+
+class ICPResponse(BaseModel):
+    matches: List[ICPMatch]
+    primary_match: ICPMatch
@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import datetime
+
+
+# ── Audit Log Search ──────────────────────────────────────────────────────────
+class AuditEntry(BaseModel):
+    id: int
+    timestamp: datetime
+    user_id: Optional[int] = None
+    action: str
+    task_type: str
+    channel: str
+    icp_id: str
+    priority_score: float
+    input_text: Optional[str] = None   # only with include_text=true
+    output_text: Optional[str] = None
+    source: Literal["hot", "archive"]
+
+
+class AuditLogResponse(BaseModel):
+    entries: List[AuditEntry]
+    total: int
+
+
+# ── Archive Partitions ────────────────────────────────────────────────────────
+class AuditPartition(BaseModel):
+    month: str
+    path: str
+    rows: int
+    size_bytes: int
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
+    archived_at: datetime
+
+
+class AuditPartitionsResponse(BaseModel):
+    hot_rows: int
+    hot_since: datetime        # audit_logs keeps this month onwards; older months are archived
+    archived_rows: int
+    partitions: List[AuditPartition]
@@ -0,0 +1,42 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+
+
+# ── Dialer Claims ─────────────────────────────────────────────────────────────
+class CallClaimRequest(BaseModel):
+    worker_id: str
+    limit: int = Field(default=1, ge=1, le=100)
+    lease_seconds: Optional[float] = Field(default=None, gt=0)  # default: CALL_LEASE_SECONDS
+
+
+class ClaimedCall(BaseModel):
+    id: int
+    lead_name: str
+    phone: str
+    script: str
+    priority: int
+    campaign_id: Optional[int] = None
+    lease_token: str
+    lease_expires_at: datetime
+
+
+class CallClaimResponse(BaseModel):
+    calls: List[ClaimedCall]
+    count: int
+
+
+class CallLeaseRequest(BaseModel):
+    lease_token: str
+    lease_seconds: Optional[float] = Field(default=None, gt=0)
+
+
+class CallCompleteRequest(BaseModel):
+    lease_token: str
+    status: Literal["done", "failed"]
+
+
+class CallLeaseResponse(BaseModel):
+    id: int
+    status: str
+    lease_expires_at: Optional[datetime] = None
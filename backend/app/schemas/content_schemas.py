@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -14,9 +14,25 @@ class ContentOutput(BaseModel):
     cta: str
     platform: str
     campaign_id: Optional[int] = None
+    duplicate_of: Optional[int] = None           # earlier campaign this copy nearly repeats
+    duplicate_similarity: Optional[float] = None  # estimated Jaccard similarity to it
 
 
 class ContentResponse(ContentOutput):
     """API response model (identical shape, separated for clarity)."""
 
     pass
+
+
+class ChannelVariant(BaseModel):
+    """One channel's copy from a fan-out generation."""
+
+    platform: str
+    score: float        # DecisionEngine score that ranked this channel
+    elapsed_ms: float   # this channel's content call
+    content: ContentOutput
+
+
+class MultiChannelResponse(BaseModel):
+    variants: List[ChannelVariant]  # best-scoring channel first
+    content_ms: float               # wall time of all content calls together
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -37,6 +37,22 @@ class PipelineRun(BaseModel):
 class PipelineHistoryResponse(BaseModel):
     runs: List[PipelineRun]
     total: int
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next (older) page
+
+
+class SimilarCampaign(BaseModel):
+    id: int
+    timestamp: datetime
+    headline: str
+    icp_id: str
+    channel: str
+    similarity: float  # estimated Jaccard similarity of headline + body
+
+
+class SimilarCampaignsResponse(BaseModel):
+    campaign_id: int
+    matches: List[SimilarCampaign]
+    total: int
 
 
 # ── Activity (export logs) ─────────────────────────────────────────────────────
@@ -51,6 +67,7 @@ class ActivityEntry(BaseModel):
 class ActivityResponse(BaseModel):
     entries: List[ActivityEntry]
     total: int
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next (older) page
 
 # ── Call Queue ────────────────────────────────────────────────────────────────
 class CallQueueItem(BaseModel):
@@ -66,3 +83,43 @@ class CallQueueItem(BaseModel):
 class CallQueueResponse(BaseModel):
     calls: List[CallQueueItem]
     total: int
+
+
+# ── LLM Cache ─────────────────────────────────────────────────────────────────
+class LLMCacheStats(BaseModel):
+    enabled: bool
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    stores: int
+    memory_evictions: int
+    disk_evictions: int
+    bypassed: int
+    hit_rate: float
+    memory_entries: int
+    disk_bytes: int
+
+
+# ── Semantic Classification Cache ─────────────────────────────────────────────
+class SemanticCacheStats(BaseModel):
+    enabled: bool
+    threshold: float
+    hits: int
+    misses: int
+    near_misses: int
+    stores: int
+    hit_rate: float
+    avg_hit_similarity: float
+    entries: int
+    capacity: int
+
+
+# ── Export Outbox ─────────────────────────────────────────────────────────────
+class OutboxStats(BaseModel):
+    depth: int                      # pending + retrying
+    delivering: int
+    dead: int
+    by_status: Dict[str, int]
+    oldest_due_seconds: float       # how long the oldest due export has been waiting
+    avg_delivery_lag_seconds: float # created → delivered, recent successes
+    workers: int
@@ -0,0 +1,47 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+
+# ── Batch Channel Scoring ─────────────────────────────────────────────────────
+class DecisionInput(BaseModel):
+    urgency: str
+    business_objective: str
+    icp_preference: Dict[str, float] = Field(default_factory=dict)
+    historical_engagement: Dict[str, float] = Field(default_factory=dict)
+
+
+class BatchDecisionRequest(BaseModel):
+    requests: List[DecisionInput]
+    include_contributions: bool = False
+
+
+class ChannelDecision(BaseModel):
+    channel: str
+    scores: Dict[str, float]
+    contributions: Optional[Dict[str, Dict[str, float]]] = None   # factor → channel → weighted value
+
+
+class BatchDecisionResponse(BaseModel):
+    decisions: List[ChannelDecision]
+    total: int
+
+
+# ── Weights ───────────────────────────────────────────────────────────────────
+class DecisionWeights(BaseModel):
+    urgency: float
+    icp_preference: float
+    business_objective: float
+    historical_engagement: float
+
+
+class DecisionWeightsUpdate(BaseModel):
+    urgency: Optional[float] = Field(default=None, ge=0.0)
+    icp_preference: Optional[float] = Field(default=None, ge=0.0)
+    business_objective: Optional[float] = Field(default=None, ge=0.0)
+    historical_engagement: Optional[float] = Field(default=None, ge=0.0)
+
+
+# ── Historical Engagement ─────────────────────────────────────────────────────
+class EngagementResponse(BaseModel):
+    icp_id: Optional[str] = None
+    rates: Dict[str, float]   # channel → smoothed, decayed success rate
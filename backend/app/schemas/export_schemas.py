@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 
 
 # ── LinkedIn Export ────────────────────────────────────────────────────────────
@@ -10,6 +11,7 @@ class LinkedInExportRequest(BaseModel):
     recipient_name: Optional[str] = None
     export_type: str = "post" # "post" or "message"
     campaign_id: Optional[int] = None
+    idempotency_key: Optional[str] = Field(default=None, max_length=128)  # replays return the original export
 
 
 class LinkedInExportResponse(BaseModel):
@@ -24,6 +26,7 @@ class EmailExportRequest(BaseModel):
     body: str
     recipient: str          # plain string so it works without email-validator installed
     campaign_id: Optional[int] = None
+    idempotency_key: Optional[str] = Field(default=None, max_length=128)  # replays return the original export
 
 
 class EmailExportResponse(BaseModel):
@@ -32,6 +35,27 @@ class EmailExportResponse(BaseModel):
     message: str
 
 
+class EmailBatchExportRequest(BaseModel):
+    messages: List[EmailExportRequest] = Field(min_length=1)
+
+
+class EmailBatchExportResponse(BaseModel):
+    results: List[EmailExportResponse]   # same order as the request
+    queued: int
+    failed: int
+
+
+# ── Outbox ─────────────────────────────────────────────────────────────────────
+class ExportStatusResponse(BaseModel):
+    export_id: int
+    channel: str
+    status: str             # pending | delivering | retrying | success | failed | dead
+    attempts: int
+    next_attempt_at: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+
+
 # ── Call Export ────────────────────────────────────────────────────────────────
 class CallExportRequest(BaseModel):
     lead_name: str
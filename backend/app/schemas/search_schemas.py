@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List, Literal
+from datetime import datetime
+
+
+# ── Full-Text Search ──────────────────────────────────────────────────────────
+class SearchHit(BaseModel):
+    id: int
+    source: Literal["campaigns", "audit"]
+    timestamp: datetime
+    channel: str
+    icp_id: str
+    title: str       # campaign headline, or the audit action
+    snippet: str     # best-matching fragment, matches wrapped in <mark>
+    score: float     # bm25 relevance, higher is better
+
+
+class SearchResponse(BaseModel):
+    query: str
+    hits: List[SearchHit]
+    total: int
+    elapsed_ms: float
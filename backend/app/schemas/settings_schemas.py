@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 
@@ -10,6 +10,7 @@ class SettingsRead(BaseModel):
     linkedin_webhook_url: Optional[str]
     openrouter_api_key_set: bool
     huggingface_api_key_set: bool
+    semantic_cache_threshold: float
 
 
 class SettingsUpdate(BaseModel):
@@ -21,6 +22,7 @@ class SettingsUpdate(BaseModel):
     linkedin_webhook_url: Optional[str] = None
     openrouter_api_key: Optional[str] = None
     huggingface_api_key: Optional[str] = None
+    semantic_cache_threshold: Optional[float] = Field(default=None, ge=0.0, le=1.0)
 
 
 class SMTPTestResponse(BaseModel):
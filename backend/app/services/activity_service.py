@@ -1,23 +1,27 @@
 """
 activity_service.py
-Reads export log entries, with optional channel filter.
+Reads export log entries, with optional channel filter and keyset pagination.
 """
 from typing import Optional
 from sqlmodel import Session, select
 from app.database.models.exports import Export
 from app.schemas.dashboard_schemas import ActivityEntry, ActivityResponse
+from app.utils.pagination import keyset_page, split_page
 
 
 def get_activity(
     db: Session,
     channel: Optional[str] = None,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> ActivityResponse:
-    query = select(Export).order_by(Export.created_at.desc()).limit(limit)
+    # Only the columns ActivityEntry shows; payload/error text stay on disk
+    query = select(Export.id, Export.created_at, Export.channel, Export.status, Export.destination)
     if channel:
-        query = select(Export).where(Export.channel == channel).order_by(Export.created_at.desc()).limit(limit)
+        query = query.where(Export.channel == channel)  # served by ix_exports_channel_created_id
 
-    rows = db.exec(query).all()
+    rows = db.exec(keyset_page(query, Export.created_at, Export.id, cursor, limit)).all()
+    page, next_cursor = split_page(rows, limit)
     entries = [
         ActivityEntry(
             id=r.id,
@@ -26,6 +30,6 @@ def get_activity(
             status=r.status,
             destination=r.destination or "",
         )
-        for r in rows
+        for r in page
     ]
-    return ActivityResponse(entries=entries, total=len(entries))
+    return ActivityResponse(entries=entries, total=len(entries), next_cursor=next_cursor)
@@ -0,0 +1,309 @@
+"""
+audit_archive.py
+Monthly partitioning and Parquet archival of audit_logs.
+
+audit_logs is the hot partition: the current month plus
+settings.AUDIT_HOT_MONTHS full months. Older months are cold. The retention
+job moves them out of the database, one month at a time, into
+zstd-compressed Parquet files under settings.AUDIT_ARCHIVE_DIR:
+
+    <YYYY-MM>/audit_logs-<min_id>-<max_id>.parquet
+
+Each file is written to a temp name, row-count checked and renamed into
+place. Only then are its rows deleted from audit_logs, in the same
+transaction that records the file in audit_archives. A crash therefore
+leaves either the rows in the database or a registered file, never
+neither. Rows that arrive late for an archived month (for example from
+the buffered audit writer) get a new part file on the next run.
+
+Readers go through `search_audit`. It merges hot rows with archived rows
+from the partitions that overlap the requested time range, filtered and
+projected inside pyarrow. Partitions are read newest first and reading
+stops once `limit` rows are in hand and no older partition can beat them,
+so a page of recent history never scans the whole archive.
+
+    python -m app.services.audit_archive archive [--hot-months 3] [--vacuum]
+    python -m app.services.audit_archive list
+"""
+import argparse
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlmodel import Session, delete, func, select
+
+from app.core.config import settings
+from app.database.models.audit_archive import AuditArchive
+from app.database.models.base import AuditLog
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 10000  # rows per read from audit_logs, and per Parquet row group
+
+SUMMARY_COLUMNS = ("id", "timestamp", "user_id", "action", "task_type", "channel", "icp_id", "priority_score")
+TEXT_COLUMNS = ("input_text", "output_text")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # optional: only the archive needs it
+        raise RuntimeError("Audit archival needs pyarrow (pip install pyarrow)") from exc
+    return pa, ds, pq
+
+
+def _schema(pa):
+    return pa.schema([
+        ("id", pa.int64()),
+        ("timestamp", pa.timestamp("us")),
+        ("user_id", pa.int64()),
+        ("action", pa.string()),
+        ("task_type", pa.string()),
+        ("channel", pa.string()),
+        ("icp_id", pa.string()),
+        ("priority_score", pa.float64()),
+        ("input_text", pa.string()),
+        ("output_text", pa.string()),
+    ])
+
+
+# ── Partition boundaries ──────────────────────────────────────────────────────
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def hot_cutoff(now: Optional[datetime] = None, hot_months: Optional[int] = None) -> datetime:
+    """Start of the oldest month kept in audit_logs."""
+    hot_months = settings.AUDIT_HOT_MONTHS if hot_months is None else hot_months
+    return add_months(month_start(now or datetime.utcnow()), -hot_months)
+
+
+def _archive_path(relative: str) -> str:
+    return os.path.join(settings.AUDIT_ARCHIVE_DIR, relative)
+
+
+# ── Retention job ─────────────────────────────────────────────────────────────
+
+def archive_month(db: Session, start: datetime) -> Optional[AuditArchive]:
+    """Moves the audit_logs rows of one month into a new Parquet part; None if there are none."""
+    pa, _, pq = _pyarrow()
+    end = add_months(start, 1)
+    in_month = (AuditLog.timestamp >= start, AuditLog.timestamp < end)
+    count, min_id, max_id, first_ts, last_ts = db.exec(
+        select(
+            func.count(), func.min(AuditLog.id), func.max(AuditLog.id),
+            func.min(AuditLog.timestamp), func.max(AuditLog.timestamp),
+        ).where(*in_month)
+    ).one()
+    if not count:
+        return None
+
+    # Rows inserted from here on get ids above max_id and wait for the next run
+    in_part = (*in_month, AuditLog.id >= min_id, AuditLog.id <= max_id)
+    relative = f"{start:%Y-%m}/audit_logs-{min_id}-{max_id}.parquet"
+    path = _archive_path(relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+
+    schema = _schema(pa)
+    columns = [getattr(AuditLog, name) for name in schema.names]
+    written, last_id = 0, min_id - 1
+    with pq.ParquetWriter(
+        tmp_path, schema, compression="zstd", compression_level=settings.AUDIT_ARCHIVE_COMPRESSION_LEVEL,
+    ) as writer:
+        while True:
+            rows = db.exec(
+                select(*columns).where(*in_part, AuditLog.id > last_id).order_by(AuditLog.id).limit(CHUNK_ROWS)
+            ).all()
+            if not rows:
+                break
+            writer.write_table(pa.Table.from_pylist([dict(r._mapping) for r in rows], schema=schema))
+            written += len(rows)
+            last_id = rows[-1].id
+
+    if pq.ParquetFile(tmp_path).metadata.num_rows != written or written != count:
+        os.remove(tmp_path)
+        raise RuntimeError(f"Audit archive for {start:%Y-%m} wrote {written} of {count} rows; left in audit_logs")
+    os.replace(tmp_path, path)
+
+    archive = AuditArchive(
+        path=relative,
+        month=f"{start:%Y-%m}",
+        rows=written,
+        size_bytes=os.path.getsize(path),
+        min_id=min_id,
+        max_id=max_id,
+        first_timestamp=first_ts,
+        last_timestamp=last_ts,
+    )
+    db.merge(archive)  # a re-run after a crash rewrites the same file name
+    deleted = db.exec(delete(AuditLog).where(*in_part)).rowcount
+    if deleted != written:
+        db.rollback()
+        raise RuntimeError(f"Audit archive for {start:%Y-%m}: deleting {deleted} rows, expected {written}; rolled back")
+    db.commit()
+    logger.info("Archived %d audit rows for %s to %s (%d bytes)", written, archive.month, relative, archive.size_bytes)
+    return archive
+
+
+def archive_cold_partitions(db: Session, now: Optional[datetime] = None, hot_months: Optional[int] = None) -> List[AuditArchive]:
+    """Archives every month older than the hot window, oldest first."""
+    cutoff = hot_cutoff(now, hot_months)
+    oldest = db.exec(select(func.min(AuditLog.timestamp)).where(AuditLog.timestamp < cutoff)).one()
+    archived = []
+    start = month_start(oldest) if oldest else cutoff
+    while start < cutoff:
+        archive = archive_month(db, start)
+        if archive is not None:
+            archived.append(archive)
+        start = add_months(start, 1)
+    return archived
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+def list_partitions(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[AuditArchive]:
+    """Archived parts whose time span overlaps [start, end), newest (by last_timestamp) first."""
+    query = select(AuditArchive)
+    if start is not None:
+        query = query.where(AuditArchive.last_timestamp >= start)
+    if end is not None:
+        query = query.where(AuditArchive.first_timestamp < end)
+    return list(db.exec(query.order_by(AuditArchive.last_timestamp.desc(), AuditArchive.min_id.desc())).all())
+
+
+def read_archive(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    action: Optional[str] = None,
+    channel: Optional[str] = None,
+    limit: int = 100,
+    include_text: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Newest-first archived rows; partition pruning by manifest, then predicate
+    pushdown in Parquet. Parts are read one at a time in manifest order. Once
+    `limit` rows are collected, the walk stops at the first part whose
+    last_timestamp is older than the oldest row kept.
+    """
+    partitions = list_partitions(db, start, end)
+    if not partitions or limit <= 0:
+        return []
+    pa, ds, _ = _pyarrow()
+    schema = _schema(pa)
+    order = [("timestamp", "descending"), ("id", "descending")]
+
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field("timestamp") >= pa.scalar(start, pa.timestamp("us")))
+    if end is not None:
+        conditions.append(ds.field("timestamp") < pa.scalar(end, pa.timestamp("us")))
+    if action:
+        conditions.append(ds.field("action") == action)
+    if channel:
+        conditions.append(ds.field("channel") == channel)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    columns = list(SUMMARY_COLUMNS + (TEXT_COLUMNS if include_text else ()))
+    collected = None
+    for partition in partitions:
+        if collected is not None and collected.num_rows >= limit:
+            oldest_kept = collected.column("timestamp")[limit - 1].as_py()
+            if partition.last_timestamp is not None and partition.last_timestamp < oldest_kept:
+                break
+        part = ds.dataset(_archive_path(partition.path), format="parquet", schema=schema)
+        table = part.to_table(columns=columns, filter=expression).sort_by(order).slice(0, limit)
+        collected = table if collected is None else pa.concat_tables([collected, table]).sort_by(order).slice(0, limit)
+    return collected.to_pylist()
+
+
+def read_hot(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    action: Optional[str] = None,
+    channel: Optional[str] = None,
+    limit: int = 100,
+    include_text: bool = False,
+) -> List[Dict[str, Any]]:
+    names = SUMMARY_COLUMNS + (TEXT_COLUMNS if include_text else ())
+    query = select(*(getattr(AuditLog, name) for name in names))
+    if start is not None:
+        query = query.where(AuditLog.timestamp >= start)
+    if end is not None:
+        query = query.where(AuditLog.timestamp < end)
+    if action:
+        query = query.where(AuditLog.action == action)
+    if channel:
+        query = query.where(AuditLog.channel == channel)
+    rows = db.exec(query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(limit)).all()
+    return [dict(r._mapping) for r in rows]
+
+
+def search_audit(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    action: Optional[str] = None,
+    channel: Optional[str] = None,
+    limit: int = 100,
+    include_text: bool = False,
+    include_archive: bool = True,
+) -> List[Dict[str, Any]]:
+    """Newest-first audit rows across audit_logs and the archive; each row carries `source`."""
+    filters = dict(start=start, end=end, action=action, channel=channel, limit=limit, include_text=include_text)
+    rows = [{**row, "source": "hot"} for row in read_hot(db, **filters)]
+    # A full page of hot rows all newer than anything archived makes the archive irrelevant
+    if include_archive:
+        newest_archived = db.exec(select(func.max(AuditArchive.last_timestamp))).one()
+        if newest_archived is not None and (len(rows) < limit or rows[-1]["timestamp"] <= newest_archived):
+            rows += [{**row, "source": "archive"} for row in read_archive(db, **filters)]
+    rows.sort(key=lambda row: (row["timestamp"], row["id"]), reverse=True)
+    return rows[:limit]
+
+
+def partition_summary(db: Session) -> Dict[str, Any]:
+    return {
+        "hot_rows": db.exec(select(func.count()).select_from(AuditLog)).one(),
+        "hot_since": hot_cutoff(),
+        "archived_rows": db.exec(select(func.coalesce(func.sum(AuditArchive.rows), 0))).one(),
+        "partitions": list_partitions(db),
+    }
+
+
+if __name__ == "__main__":
+    import app.database.models.base  # noqa: F401 — tables referenced by foreign keys
+    from app.database.session import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Audit log retention")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("archive", help="Move months older than the hot window to Parquet")
+    run.add_argument("--hot-months", type=int, default=settings.AUDIT_HOT_MONTHS)
+    run.add_argument("--vacuum", action="store_true", help="VACUUM afterwards so a SQLite file actually shrinks")
+    sub.add_parser("list", help="Show archived partitions")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    with Session(engine) as session:
+        if args.command == "archive":
+            for part in archive_cold_partitions(session, hot_months=args.hot_months):
+                print(f"{part.month}  {part.rows:>8} rows  {part.size_bytes:>10} bytes  {part.path}")
+        else:
+            for part in list_partitions(session):
+                print(f"{part.month}  {part.rows:>8} rows  {part.size_bytes:>10} bytes  {part.path}")
+    if args.command == "archive" and args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
@@ -0,0 +1,130 @@
+"""
+audit_writer.py
+Optional background writer that group-commits AuditLog rows.
+
+When settings.AUDIT_WRITER_ENABLED is on, AuditLogger and the export audit
+hand their rows to `audit_writer.submit()` instead of adding them to the
+request's session. One thread drains the buffer and inserts up to
+`batch_size` rows per transaction with a single executemany, flushing at
+least every `flush_ms`. Many concurrent requests then share one commit
+(and one fsync) instead of paying for their own.
+
+Trade-off: an audit row is no longer atomic with the write it describes,
+and rows still buffered when the process dies are lost. Shutdown drains
+the buffer. Leave it off where the audit trail must be exact.
+
+submit() never blocks, because callers include request handlers on the
+event loop. When the buffer is full (the database has fallen behind), it
+returns False and the caller writes that row in its own transaction, as
+if the writer were off.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.database.models.base import AuditLog
+from app.database.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    def __init__(self, batch_size: int = 200, flush_ms: float = 50.0, max_buffer: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        # Bounded so a stalled database cannot grow memory; overflow goes back to the caller
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_buffer)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.counters: Dict[str, int] = {"rows": 0, "flushes": 0, "failed_rows": 0, "overflow": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, log: AuditLog) -> bool:
+        """Buffers one row; returns False when the writer is off or full so the caller adds it to its session."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(log.model_dump(exclude={"id"}))
+        except queue.Full:
+            self.counters["overflow"] += 1
+            return False
+        return True
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        logger.info("Audit writer started (batch %d, flush %.0f ms)", self.batch_size, self.flush_interval * 1000)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        # Rows submitted while the thread was exiting
+        while True:
+            batch = self._collect(block=False)
+            if not batch:
+                return
+            self._flush(batch)
+
+    # ── Writer thread ──────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect(block=True)
+            if batch:
+                self._flush(batch)
+
+    def _collect(self, block: bool) -> List[dict]:
+        """Up to batch_size rows: waits for the first, then at most flush_interval for the rest."""
+        try:
+            first = self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait()
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if block and remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List[dict]) -> None:
+        for attempt in (1, 2):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(AuditLog.__table__.insert(), batch)
+            except Exception:
+                if attempt == 1:
+                    time.sleep(self.flush_interval)
+                    continue
+                self.counters["failed_rows"] += len(batch)
+                logger.exception("Dropped %d audit rows after a failed flush", len(batch))
+                return
+            self.counters["rows"] += len(batch)
+            self.counters["flushes"] += 1
+            return
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "buffered": self._queue.qsize(), "running": int(self.running)}
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.AUDIT_WRITER_BATCH_SIZE,
+    flush_ms=settings.AUDIT_WRITER_FLUSH_MS,
+    max_buffer=settings.AUDIT_WRITER_MAX_BUFFER,
+)
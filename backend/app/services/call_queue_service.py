@@ -0,0 +1,92 @@
+"""
+call_queue_service.py
+Worker-facing claim/lease API for the call queue.
+
+Dialers claim the next N `queued` calls (priority 1 first, then oldest)
+in a single UPDATE that flips them to `dialling` under a fresh lease token.
+Only the holder of that token can complete or extend the lease. Leases
+that expire are swept back to `queued` at the start of every claim, so a
+crashed dialer's calls are picked up again. Both statements are range
+scans on ix_call_queue_status_priority_created, so claim cost does not
+grow with the number of finished calls.
+"""
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.database.models.exports import CallQueue
+from app.services.engagement_stats import engagement_stats
+
+RELEASED_LEASE = {"claimed_by": None, "lease_token": None, "lease_expires_at": None}
+
+
+def requeue_expired_leases(db: Session, now: Optional[datetime] = None) -> int:
+    result = db.execute(
+        update(CallQueue)
+        .where(CallQueue.status == "dialling", CallQueue.lease_expires_at < (now or datetime.utcnow()))
+        .values(status="queued", **RELEASED_LEASE)
+    )
+    return result.rowcount
+
+
+def claim_calls(db: Session, worker_id: str, limit: int, lease_seconds: float) -> List[CallQueue]:
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    requeue_expired_leases(db, now)
+
+    next_ids = (
+        select(CallQueue.id)
+        .where(CallQueue.status == "queued")
+        .order_by(CallQueue.priority.asc(), CallQueue.created_at.asc())
+        .limit(limit)
+        # Postgres: concurrent claimers skip each other's rows. SQLite: ignored,
+        # the statement already runs under the single-writer lock.
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(CallQueue)
+        # Match on id alone so the planner does rowid lookups instead of
+        # rescanning every queued row
+        .where(CallQueue.id.in_(next_ids))
+        .values(
+            status="dialling",
+            claimed_by=worker_id,
+            lease_token=token,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+        )
+    )
+    db.commit()
+    return list(db.exec(
+        select(CallQueue)
+        .where(CallQueue.lease_token == token)
+        .order_by(CallQueue.priority.asc(), CallQueue.created_at.asc())
+    ).all())
+
+
+def extend_lease(db: Session, call_id: int, lease_token: str, lease_seconds: float) -> Optional[CallQueue]:
+    result = db.execute(
+        update(CallQueue)
+        .where(CallQueue.id == call_id, CallQueue.status == "dialling", CallQueue.lease_token == lease_token)
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+    )
+    db.commit()
+    return db.get(CallQueue, call_id) if result.rowcount else None
+
+
+def complete_call(db: Session, call_id: int, lease_token: str, status: str) -> Optional[CallQueue]:
+    """Finishes a claimed call as done/failed; None if the lease is no longer held."""
+    result = db.execute(
+        update(CallQueue)
+        .where(CallQueue.id == call_id, CallQueue.status == "dialling", CallQueue.lease_token == lease_token)
+        .values(status=status, **RELEASED_LEASE)
+    )
+    db.commit()
+    if not result.rowcount:
+        return None
+    call = db.get(CallQueue, call_id)
+    engagement_stats.record_call_status(db, call, "dialling")
+    return call
@@ -1,43 +1,45 @@
 import json
-from openai import OpenAI
+from openai import AsyncOpenAI
 from app.core.config import settings
 from app.schemas import ClassificationResponse
+from app.services.llm_cache import llm_cache
+from app.services.prompt_registry import prompt_registry
 
 class ClassificationService:
     def __init__(self):
-        self.client = OpenAI(
+        self.client = AsyncOpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=settings.OPENROUTER_API_KEY,
         )
 
-    async def classify_intent(self, context: str) -> ClassificationResponse:
-        prompt = f"""
-        Analyze the following user context and classify it into a structured JSON format.
-        
-        Context: {context}
-        
-        Return ONLY valid JSON with these keys: 
-        - task_type (e.g., outreach, support, inquiry)
-        - urgency (High, Medium, Low)
-        - category (e.g., tech, finance, health)
-        - behavioral_segment (e.g., early_adopter, skeptic)
-        - intent_summary (A brief summary of what the user wants)
-        - confidence_score (A float between 0.0 and 1.0 representing your certainty)
-        """
-        
+    async def classify_intent(self, context: str, use_cache: bool = True) -> ClassificationResponse:
+        prompt = prompt_registry.render("classification.intent", context)
+        cache_key = llm_cache.make_key(
+            "amazon/nova-micro-v1", prompt.messages, response_format="json_object", max_tokens=prompt.max_tokens,
+        )
+
         try:
-            response = self.client.chat.completions.create(
-                model="amazon/nova-micro-v1",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                timeout=10.0
-            )
+            cached = await llm_cache.aget(cache_key, bypass=not use_cache)
+            content = cached
+            if cached is None:
+                budget = {"max_tokens": prompt.max_tokens} if prompt.max_tokens is not None else {}
+                response = await self.client.chat.completions.create(
+                    model="amazon/nova-micro-v1",
+                    messages=prompt.messages,
+                    response_format={"type": "json_object"},
+                    timeout=10.0,
+                    **budget
+                )
+                content = response.choices[0].message.content
             
-            data = json.loads(response.choices[0].message.content)
+            data = json.loads(content)
             # Basic validation of confidence_score range
             data["confidence_score"] = max(0.0, min(1.0, float(data.get("confidence_score", 0.5))))
             
-            return ClassificationResponse(**data)
+            result = ClassificationResponse(**data)
+            if cached is None:
+                await llm_cache.aset(cache_key, content)
+            return result
             
         except Exception as e:
             # Graceful failure: Log error and return a fallback response
@@ -1,21 +1,36 @@
+import asyncio
+import dataclasses
 import json
 import logging
 import time
-from typing import Optional
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from openai import OpenAI, AsyncOpenAI
 from app.core.config import settings
 from app.schemas.content_schemas import ContentOutput
+from app.services.llm_cache import llm_cache
+from app.services.prompt_registry import RenderedPrompt, content_prompt_name, prompt_registry
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TRUNCATION_RETRY_FACTOR = 2  # a completion cut off at max_tokens is retried once with this much more room
+
+
+class CompletionTruncated(Exception):
+    """The model stopped at max_tokens, so the JSON it returned is incomplete."""
+
+
 class ContentService:
     def __init__(self):
         self.client = OpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=settings.OPENROUTER_API_KEY,
         )
+        self.async_client = AsyncOpenAI(
+            base_url="https://openrouter.ai/api/v1",
+            api_key=settings.OPENROUTER_API_KEY,
+        )
         # Using the selected model from settings
         self.model = settings.DEFAULT_LLM_MODEL
 
@@ -24,50 +39,36 @@ class ContentService:
         platform: str, 
         context: str, 
         temperature: Optional[float] = None,
-        max_retries: int = 3
+        max_retries: int = 3,
+        use_cache: bool = True
     ) -> Optional[ContentOutput]:
         """
         Generates structured content using OpenAI/OpenRouter with platform-aware prompts.
+        Identical requests are served from llm_cache unless use_cache=False.
         """
-        prompt = self._get_platform_prompt(platform, context)
-        
-        # Dynamic temperature based on platform if not provided
-        if temperature is None:
-            temp_map = {
-                "LinkedIn": 0.85,  # More creative
-                "Email": 0.7,      # Balanced
-                "SMS": 0.4,        # Direct/Precise
-                "Call": 0.5        # Narrative/Scripted
-            }
-            temperature = temp_map.get(platform, 0.7)
+        prompt, temperature = self._prepare_request(platform, context, temperature)
+        cache_key = self._cache_key(prompt, temperature)
+        cached = llm_cache.get(cache_key, bypass=not use_cache)
+        if cached is not None:
+            return self._parse_output(cached, platform)
 
+        widened = False
         for attempt in range(max_retries):
             try:
-                logger.info(f"--- Content Generation Attempt {attempt + 1} ---")
-                logger.info(f"Platform: {platform} | Target Model: {self.model} | Temp: {temperature}")
-                
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are a world-class copywriter and sales strategist. Your goal is to produce high-conversion content. Return ONLY valid JSON matching the requested structure."
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=temperature,
-                    response_format={"type": "json_object"}
-                )
-                
+                self._log_attempt(attempt, platform, temperature, prompt)
+                response = self.client.chat.completions.create(**self._request_kwargs(prompt, temperature))
+                self._check_finish(response, prompt)
                 output_text = response.choices[0].message.content
-                data = json.loads(output_text)
-                
-                return ContentOutput(
-                    headline=data.get("headline", "N/A"),
-                    body=data.get("body", "N/A"),
-                    cta=data.get("cta", "N/A"),
-                    platform=platform
-                )
+                result = self._parse_output(output_text, platform)
+                llm_cache.set(cache_key, output_text)
+                return result
+
+            except CompletionTruncated as e:
+                # The same cap truncates the same way on every retry: widen it once, else fall back
+                logger.warning(str(e))
+                if widened or prompt.max_tokens is None or attempt == max_retries - 1:
+                    return None
+                prompt, widened = self._widen(prompt), True
                 
             except Exception as e:
                 logger.error(f"Error on attempt {attempt + 1}: {str(e)}")
@@ -76,44 +77,141 @@ class ContentService:
                 else:
                     return None
 
-    def _get_platform_prompt(self, platform: str, context: str) -> str:
+    async def agenerate_content(
+        self,
+        platform: str,
+        context: str,
+        temperature: Optional[float] = None,
+        max_retries: int = 3,
+        use_cache: bool = True
+    ) -> Optional[ContentOutput]:
         """
-        Provides platform-aware prompts to guide the LLM.
+        Async variant of generate_content: awaits the LLM call and backs off
+        with asyncio.sleep so retries never block the event loop.
         """
-        base_instruction = "Generate highly engaging outreach content based on the following context. Return JSON with keys: 'headline', 'body', 'cta'."
-        
-        templates = {
-            "LinkedIn": f"""
-                {base_instruction}
-                Style: Professional yet social. Use a hook in the headline. 
-                The body should be readable with bullet points if necessary. 
-                CTA should be conversational (e.g., 'Worth a quick chat?').
-                Context: {context}
-            """,
-            "Email": f"""
-                {base_instruction}
-                Style: Direct, personalized, and value-driven. 
-                Headline = Subject Line. 
-                Body = Professional email structure with clear benefit-led sentences. 
-                CTA = Specific request for time.
-                Context: {context}
-            """,
-            "SMS": f"""
-                {base_instruction}
-                Style: Extremely concise, urgent, and informal. 
-                Headline = Short intro. 
-                Body = 1-2 sentences max. 
-                CTA = Quick reply action.
-                Context: {context}
-            """,
-            "Call": f"""
-                {base_instruction}
-                Style: This is a PHONE SCRIPT. 
-                Headline = The opening hook. 
-                Body = The main pitch script including how to handle a common objection. 
-                CTA = The specific ask at the end of the call.
-                Context: {context}
-            """
-        }
+        prompt, temperature = self._prepare_request(platform, context, temperature)
+        cache_key = self._cache_key(prompt, temperature)
+        cached = await llm_cache.aget(cache_key, bypass=not use_cache)
+        if cached is not None:
+            return self._parse_output(cached, platform)
+
+        widened = False
+        for attempt in range(max_retries):
+            try:
+                self._log_attempt(attempt, platform, temperature, prompt)
+                response = await self.async_client.chat.completions.create(**self._request_kwargs(prompt, temperature))
+                self._check_finish(response, prompt)
+                output_text = response.choices[0].message.content
+                result = self._parse_output(output_text, platform)
+                await llm_cache.aset(cache_key, output_text)
+                return result
+
+            except CompletionTruncated as e:
+                # The same cap truncates the same way on every retry: widen it once, else fall back
+                logger.warning(str(e))
+                if widened or prompt.max_tokens is None or attempt == max_retries - 1:
+                    return None
+                prompt, widened = self._widen(prompt), True
+
+            except Exception as e:
+                logger.error(f"Error on attempt {attempt + 1}: {str(e)}")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)
+                else:
+                    return None
+
+    async def astream_content(
+        self,
+        platform: str,
+        context: str,
+        temperature: Optional[float] = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Streams the raw JSON completion token-by-token (stream=True).
+        No retries: once tokens have reached the client a retry would
+        duplicate output, so callers fall back on error instead. A stream
+        cut off at max_tokens raises CompletionTruncated after its last
+        token, so callers can tell the client why. A cache hit is replayed
+        as a single chunk.
+        """
+        prompt, temperature = self._prepare_request(platform, context, temperature)
+        cache_key = self._cache_key(prompt, temperature)
+        cached = await llm_cache.aget(cache_key, bypass=not use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        self._log_attempt(0, platform, temperature, prompt)
+
+        stream = await self.async_client.chat.completions.create(**self._request_kwargs(prompt, temperature), stream=True)
+        parts: List[str] = []
+        finish_reason = None
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+            finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+
+        if finish_reason == "length":
+            message = f"Streamed completion hit max_tokens={prompt.max_tokens} for {prompt.name} v{prompt.version}"
+            logger.warning(message)
+            raise CompletionTruncated(message)
+
+        output_text = "".join(parts)
+        try:
+            json.loads(output_text)
+        except ValueError:
+            return
+        await llm_cache.aset(cache_key, output_text)
+
+    def _prepare_request(self, platform: str, context: str, temperature: Optional[float]) -> Tuple[RenderedPrompt, float]:
+        prompt = prompt_registry.render(content_prompt_name(platform), context)
+        # Platform default from the template (LinkedIn more creative, SMS more precise) if not provided
+        if temperature is None:
+            temperature = prompt.temperature if prompt.temperature is not None else 0.7
+        return prompt, temperature
+
+    def _request_kwargs(self, prompt: RenderedPrompt, temperature: float) -> Dict:
+        kwargs = dict(
+            model=self.model,
+            messages=prompt.messages,
+            temperature=temperature,
+            response_format={"type": "json_object"},
+        )
+        if prompt.max_tokens is not None:
+            kwargs["max_tokens"] = prompt.max_tokens
+        return kwargs
+
+    def _check_finish(self, response, prompt: RenderedPrompt) -> None:
+        if response.choices[0].finish_reason == "length":
+            raise CompletionTruncated(f"Completion hit max_tokens={prompt.max_tokens} for {prompt.name} v{prompt.version}")
+
+    def _widen(self, prompt: RenderedPrompt) -> RenderedPrompt:
+        # The cache key stays that of the original prompt, so the complete answer serves later requests
+        return dataclasses.replace(prompt, max_tokens=prompt.max_tokens * TRUNCATION_RETRY_FACTOR)
+
+    def _log_attempt(self, attempt: int, platform: str, temperature: float, prompt: RenderedPrompt) -> None:
+        logger.info(f"--- Content Generation Attempt {attempt + 1} ---")
+        logger.info(
+            f"Platform: {platform} | Target Model: {self.model} | Temp: {temperature} | "
+            f"Prompt: {prompt.name} v{prompt.version} ({prompt.input_tokens} tokens in, max {prompt.max_tokens} out)"
+        )
+
+    def _cache_key(self, prompt: RenderedPrompt, temperature: float) -> str:
+        return llm_cache.make_key(
+            self.model, prompt.messages, temperature, response_format="json_object", max_tokens=prompt.max_tokens,
+        )
+
+    def _parse_output(self, output_text: str, platform: str) -> ContentOutput:
+        data = json.loads(output_text)
         
-        return templates.get(platform, f"{base_instruction} Context: {context}").strip()
+        return ContentOutput(
+            headline=data.get("headline", "N/A"),
+            body=data.get("body", "N/A"),
+            cta=data.get("cta", "N/A"),
+            platform=platform
+        )
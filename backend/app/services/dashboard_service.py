@@ -1,40 +1,53 @@
 """
 dashboard_service.py
 Aggregates data from campaigns and audit_logs for the Dashboard page.
+Headline counts are read from the rollup counters in app.services.rollups.
 """
+from typing import Optional
+from sqlalchemy import update
 from sqlmodel import Session, select, func
 from app.database.models.campaigns import Campaign
 from app.database.models.exports import Export, CallQueue
 from app.database.models.base import AuditLog
+from app.services import rollups
+from app.services.call_queue_service import RELEASED_LEASE
+from app.services.engagement_stats import engagement_stats
+from app.services.near_duplicates import find_similar_campaigns
+from app.utils.pagination import keyset_page, split_page
 from app.schemas.dashboard_schemas import (
     DashboardStats, ExportCountByChannel, RecentActivity,
     PipelineHistoryResponse, PipelineRun,
+    SimilarCampaignsResponse, SimilarCampaign,
     CallQueueResponse, CallQueueItem,
 )
 
 
 def get_dashboard_stats(db: Session) -> DashboardStats:
-    total_campaigns = db.exec(select(func.count()).select_from(Campaign)).one()
-
-    # Exports grouped by channel
-    rows = db.exec(
-        select(Export.channel, func.count().label("cnt")).group_by(Export.channel)
-    ).all()
-    exports_by_channel = [ExportCountByChannel(channel=r[0], count=r[1]) for r in rows]
+    # Totals come from write-time rollups, not COUNT/GROUP BY over the tables
+    counters = rollups.read_counters(db)
+    total_campaigns = counters.get(rollups.CAMPAIGNS, 0)
+    exports_by_channel = [
+        ExportCountByChannel(channel=name[len(rollups.EXPORTS_PREFIX):], count=count)
+        for name, count in sorted(counters.items())
+        if name.startswith(rollups.EXPORTS_PREFIX)
+    ]
 
-    # Last 10 audit log entries
+    # Last 10 audit log entries: only the columns shown, summary cut in SQL
     recent = db.exec(
-        select(AuditLog).order_by(AuditLog.timestamp.desc()).limit(10)
+        select(
+            AuditLog.id, AuditLog.timestamp, AuditLog.action, AuditLog.channel,
+            func.substr(AuditLog.input_text, 1, 120),
+        ).order_by(AuditLog.timestamp.desc()).limit(10)
     ).all()
     recent_activity = [
         RecentActivity(
-            id=log.id,
-            timestamp=log.timestamp,
-            action=log.action,
-            channel=log.channel,
-            summary=log.input_text[:120],
+            id=log_id,
+            timestamp=timestamp,
+            action=action,
+            channel=channel,
+            summary=summary or "",
         )
-        for log in recent
+        for log_id, timestamp, action, channel, summary in recent
     ]
 
     return DashboardStats(
@@ -44,10 +57,14 @@ def get_dashboard_stats(db: Session) -> DashboardStats:
     )
 
 
-def get_pipeline_history(db: Session, limit: int = 50) -> PipelineHistoryResponse:
-    campaigns = db.exec(
-        select(Campaign).order_by(Campaign.created_at.desc()).limit(limit)
-    ).all()
+def get_pipeline_history(db: Session, limit: int = 50, cursor: Optional[str] = None) -> PipelineHistoryResponse:
+    # Only the columns PipelineRun shows; headline/body/cta are never loaded
+    query = select(
+        Campaign.id, Campaign.created_at, Campaign.intent, Campaign.icp_id,
+        Campaign.channel, Campaign.platform, Campaign.priority_score,
+    )
+    rows = db.exec(keyset_page(query, Campaign.created_at, Campaign.id, cursor, limit)).all()
+    page, next_cursor = split_page(rows, limit)
 
     runs = [
         PipelineRun(
@@ -59,13 +76,40 @@ def get_pipeline_history(db: Session, limit: int = 50) -> PipelineHistoryRespons
             platform=c.platform,
             priority_score=c.priority_score,
         )
-        for c in campaigns
+        for c in page
     ]
-    return PipelineHistoryResponse(runs=runs, total=len(runs))
+    return PipelineHistoryResponse(runs=runs, total=len(runs), next_cursor=next_cursor)
 
-def get_call_queue(db: Session) -> CallQueueResponse:
+def get_similar_campaigns(
+    db: Session, campaign_id: int, threshold: float, limit: int = 10, same_icp: bool = False,
+) -> Optional[SimilarCampaignsResponse]:
+    campaign = db.get(Campaign, campaign_id)
+    if campaign is None:
+        return None
+    scores = dict(find_similar_campaigns(db, campaign, threshold, limit, same_icp))
+    rows = db.exec(
+        select(Campaign.id, Campaign.created_at, Campaign.headline, Campaign.icp_id, Campaign.channel)
+        .where(Campaign.id.in_(scores))
+    ).all() if scores else []
+    matches = sorted(
+        (
+            SimilarCampaign(
+                id=r.id, timestamp=r.created_at, headline=r.headline,
+                icp_id=r.icp_id or "", channel=r.channel, similarity=scores[r.id],
+            )
+            for r in rows
+        ),
+        key=lambda m: (m.similarity, m.id),
+        reverse=True,
+    )
+    return SimilarCampaignsResponse(campaign_id=campaign_id, matches=matches, total=len(matches))
+
+def get_call_queue(db: Session, status: Optional[str] = None, limit: int = 200) -> CallQueueResponse:
+    query = select(CallQueue)
+    if status:
+        query = query.where(CallQueue.status == status)
     calls = db.exec(
-        select(CallQueue).order_by(CallQueue.priority.asc(), CallQueue.created_at.desc())
+        query.order_by(CallQueue.priority.asc(), CallQueue.created_at.desc()).limit(limit)
     ).all()
 
     items = [
@@ -87,8 +131,18 @@ def update_call_status(db: Session, call_id: int, status: str):
     call = db.get(CallQueue, call_id)
     if not call:
         return None
-    call.status = status
-    db.add(call)
+    previous_status = call.status
+    values = {"status": status}
+    if status != "dialling":
+        values.update(RELEASED_LEASE)
+    # Conditional write: if a dialer claimed/completed the call since the read, its change wins
+    result = db.execute(
+        update(CallQueue)
+        .where(CallQueue.id == call_id, CallQueue.status == previous_status)
+        .values(**values)
+    )
     db.commit()
     db.refresh(call)
+    if result.rowcount:
+        engagement_stats.record_call_status(db, call, previous_status)
     return call
@@ -1,12 +1,58 @@
-from typing import Dict, Tuple
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Factor tables, built once at import instead of on every call
+URGENCY_SCORES: Dict[str, Dict[str, float]] = {
+    "High": {"Call": 1.0, "SMS": 0.8, "Email": 0.4, "LinkedIn": 0.2},
+    "Medium": {"Email": 1.0, "LinkedIn": 0.8, "SMS": 0.5, "Call": 0.3},
+    "Low": {"LinkedIn": 1.0, "Email": 0.7, "SMS": 0.2, "Call": 0.1},
+}
+
+OBJECTIVE_SCORES: Dict[str, Dict[str, float]] = {
+    "outreach": {"LinkedIn": 1.0, "Email": 0.8, "Call": 0.4, "SMS": 0.3},
+    "support": {"Email": 1.0, "Call": 0.7, "SMS": 0.6, "LinkedIn": 0.3},
+    "default": {"Email": 0.9, "LinkedIn": 0.9, "Call": 0.5, "SMS": 0.5},
+}
+
+FACTORS = ("urgency", "icp_preference", "business_objective", "historical_engagement")
+
+CHANNELS = ["LinkedIn", "Email", "Call", "SMS"]
+
+# The same tables as (rows, C) arrays over CHANNELS for the batch path
+URGENCY_LEVELS = ["High", "Medium", "Low"]
+URGENCY_MATRIX = np.array([[URGENCY_SCORES[u][ch] for ch in CHANNELS] for u in URGENCY_LEVELS])
+OBJECTIVE_BUCKETS = ["outreach", "support", "default"]
+OBJECTIVE_MATRIX = np.array([[OBJECTIVE_SCORES[o][ch] for ch in CHANNELS] for o in OBJECTIVE_BUCKETS])
+
+
+def _objective_bucket(objective: str) -> str:
+    obj = objective.lower()
+    if "outreach" in obj or "sales" in obj:
+        return "outreach"
+    if "support" in obj or "service" in obj:
+        return "support"
+    return "default"
+
+
+@dataclass
+class BatchDecision:
+    """Result of DecisionEngine.score_batch; all arrays are laid out over CHANNELS."""
+    channels: List[str]
+    scores: np.ndarray                      # (N, C) weighted totals
+    contributions: Dict[str, np.ndarray]    # factor → (N, C) weighted contribution
+
 
 class DecisionEngine:
     """
     Weighted scoring engine for channel selection.
     Factors: Urgency, ICP Preference, Business Objective, Historical Engagement.
     """
-    
-    # Weights for each factor
+
+    # Default weights for each factor (per-instance copies can be changed at runtime)
     WEIGHTS = {
         "urgency": 0.40,
         "icp_preference": 0.25,
@@ -14,7 +60,25 @@ class DecisionEngine:
         "historical_engagement": 0.15
     }
 
-    CHANNELS = ["LinkedIn", "Email", "Call", "SMS"]
+    CHANNELS = CHANNELS
+    CHANNEL_INDEX = {ch: i for i, ch in enumerate(CHANNELS)}
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self._weights_lock = threading.Lock()
+        self.weights = dict(self.WEIGHTS)
+        if weights:
+            self.set_weights(weights)
+
+    def set_weights(self, weights: Dict[str, float]) -> Dict[str, float]:
+        """Updates any subset of factor weights at runtime; returns the full set."""
+        unknown = set(weights) - set(FACTORS)
+        if unknown:
+            raise ValueError(f"Unknown decision factors: {sorted(unknown)}")
+        if any(value < 0 for value in weights.values()):
+            raise ValueError("Decision weights must be non-negative")
+        with self._weights_lock:
+            self.weights = {**self.weights, **weights}
+            return dict(self.weights)
 
     def score_channels(
         self,
@@ -26,49 +90,124 @@ class DecisionEngine:
         """
         Calculates weights and returns the best channel with reasoning.
         """
+        scores, reasoning_parts = self._score(urgency, icp_preference, business_objective, historical_engagement)
+        selected_channel = max(scores, key=scores.get)
+        reasoning = " | ".join(reasoning_parts)
+
+        return selected_channel, reasoning
+
+    def rank_channels(
+        self,
+        urgency: str,
+        icp_preference: Dict[str, float],
+        business_objective: str,
+        historical_engagement: Dict[str, float]
+    ) -> List[Tuple[str, float]]:
+        """
+        Every channel with its weighted score, best first. The head is the
+        channel score_channels picks (ties keep CHANNELS order).
+        """
+        scores, _ = self._score(urgency, icp_preference, business_objective, historical_engagement)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def _score(
+        self,
+        urgency: str,
+        icp_preference: Dict[str, float],
+        business_objective: str,
+        historical_engagement: Dict[str, float]
+    ) -> Tuple[Dict[str, float], List[str]]:
+        weights = self.weights
         scores = {channel: 0.0 for channel in self.CHANNELS}
         reasoning_parts = []
 
         # 1. Urgency Scoring (0.40)
         u_scores = self._get_urgency_scores(urgency)
         for ch, val in u_scores.items():
-            scores[ch] += val * self.WEIGHTS["urgency"]
+            scores[ch] += val * weights["urgency"]
         reasoning_parts.append(f"Urgency ({urgency}) tilted towards {max(u_scores, key=u_scores.get)}.")
 
         # 2. ICP Preference Scoring (0.25)
         for ch, val in icp_preference.items():
             if ch in scores:
-                scores[ch] += val * self.WEIGHTS["icp_preference"]
+                scores[ch] += val * weights["icp_preference"]
         reasoning_parts.append(f"ICP shows preference for {max(icp_preference, key=icp_preference.get) if icp_preference else 'None'}.")
 
         # 3. Business Objective Scoring (0.20)
         obj_scores = self._get_objective_scores(business_objective)
         for ch, val in obj_scores.items():
-            scores[ch] += val * self.WEIGHTS["business_objective"]
+            scores[ch] += val * weights["business_objective"]
         reasoning_parts.append(f"Objective ({business_objective}) favors {max(obj_scores, key=obj_scores.get)}.")
 
         # 4. Historical Engagement Scoring (0.15)
         for ch, val in historical_engagement.items():
             if ch in scores:
-                scores[ch] += val * self.WEIGHTS["historical_engagement"]
+                scores[ch] += val * weights["historical_engagement"]
         reasoning_parts.append(f"Historical data supports {max(historical_engagement, key=historical_engagement.get) if historical_engagement else 'None'}.")
 
-        selected_channel = max(scores, key=scores.get)
-        reasoning = " | ".join(reasoning_parts)
-        
-        return selected_channel, reasoning
+        return scores, reasoning_parts
+
+    def score_batch(
+        self,
+        urgencies: Sequence[str],
+        icp_preferences: Sequence[Dict[str, float]],
+        business_objectives: Sequence[str],
+        historical_engagements: Sequence[Dict[str, float]],
+    ) -> BatchDecision:
+        """
+        Scores N requests in one vectorised pass over the CHANNELS axis.
+        Picks the same channel as score_channels for each request (ties go to
+        the earlier channel in CHANNELS, as with max() over the dict).
+        """
+        n = len(urgencies)
+        if not (len(icp_preferences) == len(business_objectives) == len(historical_engagements) == n):
+            raise ValueError("score_batch inputs must all have the same length")
+
+        weights = self.weights
+        low = URGENCY_LEVELS.index("Low")
+        urgency_rows = np.fromiter(
+            (URGENCY_LEVELS.index(u) if u in URGENCY_SCORES else low for u in urgencies),
+            dtype=np.intp, count=n,
+        )
+        objective_rows = np.fromiter(
+            (OBJECTIVE_BUCKETS.index(_objective_bucket(o)) for o in business_objectives),
+            dtype=np.intp, count=n,
+        )
+
+        contributions = {
+            "urgency": URGENCY_MATRIX[urgency_rows] * weights["urgency"],
+            "icp_preference": self.encode_preferences(icp_preferences) * weights["icp_preference"],
+            "business_objective": OBJECTIVE_MATRIX[objective_rows] * weights["business_objective"],
+            "historical_engagement": self.encode_preferences(historical_engagements) * weights["historical_engagement"],
+        }
+        # Summed in the same factor order as score_channels so totals match exactly
+        scores = np.zeros((n, len(self.CHANNELS)))
+        for factor in FACTORS:
+            scores = scores + contributions[factor]
+
+        best = np.argmax(scores, axis=1) if n else np.zeros(0, dtype=np.intp)
+        return BatchDecision(
+            channels=[self.CHANNELS[i] for i in best],
+            scores=scores,
+            contributions=contributions,
+        )
+
+    def encode_preferences(self, rows: Sequence[Dict[str, float]]) -> np.ndarray:
+        """Dense (N, C) matrix from per-request {channel: value} dicts; unknown channels are ignored."""
+        matrix = np.zeros((len(rows), len(self.CHANNELS)))
+        for i, row in enumerate(rows):
+            for ch, val in row.items():
+                col = self.CHANNEL_INDEX.get(ch)
+                if col is not None:
+                    matrix[i, col] = val
+        return matrix
 
     def _get_urgency_scores(self, urgency: str) -> Dict[str, float]:
-        if urgency == "High":
-            return {"Call": 1.0, "SMS": 0.8, "Email": 0.4, "LinkedIn": 0.2}
-        if urgency == "Medium":
-            return {"Email": 1.0, "LinkedIn": 0.8, "SMS": 0.5, "Call": 0.3}
-        return {"LinkedIn": 1.0, "Email": 0.7, "SMS": 0.2, "Call": 0.1}
+        return URGENCY_SCORES.get(urgency, URGENCY_SCORES["Low"])
 
     def _get_objective_scores(self, objective: str) -> Dict[str, float]:
-        obj = objective.lower()
-        if "outreach" in obj or "sales" in obj:
-            return {"LinkedIn": 1.0, "Email": 0.8, "Call": 0.4, "SMS": 0.3}
-        if "support" in obj or "service" in obj:
-            return {"Email": 1.0, "Call": 0.7, "SMS": 0.6, "LinkedIn": 0.3}
-        return {"Email": 0.9, "LinkedIn": 0.9, "Call": 0.5, "SMS": 0.5}
+        return OBJECTIVE_SCORES[_objective_bucket(objective)]
+
+
+# Shared instance so runtime weight changes apply to the agent and the batch API alike
+decision_engine = DecisionEngine()
@@ -0,0 +1,89 @@
+"""
+embedding_batcher.py
+Coalesces concurrent single-text embedding requests into batched encodes.
+
+Callers await `submit(text)`. Requests collect until either `max_batch_size`
+texts are waiting or `max_wait_ms` has passed since the first one arrived;
+the whole batch then goes through one `encode_fn` call in a worker thread
+and each caller gets its own row back. Encodes are serialised (one batch
+in flight by default), so texts that arrive while a batch is running
+naturally pile up into the next one.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_concurrency: int = 1,
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrency = max_concurrency
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: set = set()  # strong refs so running batches aren't GC'd
+        self.stats: Dict[str, int] = {"batches": 0, "items": 0, "max_batch": 0}
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        # asyncio primitives belong to one loop; rebind if the app runs a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return loop
+
+    async def submit(self, text: str) -> np.ndarray:
+        loop = self._bind_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        async with self._semaphore:
+            try:
+                vectors = await asyncio.to_thread(self.encode_fn, texts)
+            except Exception as exc:
+                logger.exception("Batched embedding of %d texts failed", len(texts))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+
+        self.stats["batches"] += 1
+        self.stats["items"] += len(batch)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
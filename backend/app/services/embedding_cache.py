@@ -0,0 +1,186 @@
+"""
+embedding_cache.py
+Content-addressed cache in front of EmbeddingService.
+
+Vectors are keyed by blake2b(model id + text). Layout per model id:
+  vectors.f32  append-only raw float32 rows, read through a read-only np.memmap
+  keys.bin     append-only 24-byte records: 16-byte digest + int64 row number
+  meta.json    {"dimension": D}
+Writers append under an exclusive flock so several workers can share one
+directory; readers tail keys.bin to pick up rows written by other processes
+and read vectors straight out of the page cache without copying.
+A small in-process LRU sits in front for the hottest strings.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:  # POSIX only; without it the cache assumes a single writer process
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+KEY_RECORD = struct.Struct("<16sq")
+
+
+class EmbeddingCache:
+    def __init__(self, root_dir: str, model_id: str, memory_entries: int = 4096):
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id)
+        self.model_id = model_id
+        self.directory = os.path.join(root_dir, safe_id)
+        self.memory_entries = memory_entries
+
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._rows: Dict[bytes, int] = {}
+        self._keys_offset = 0
+        self._dimension: Optional[int] = None
+        self._mmap: Optional[np.memmap] = None
+        self._opened = False
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    # ── Paths / opening ────────────────────────────────────────────────────────
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def _keys_path(self) -> str:
+        return os.path.join(self.directory, "keys.bin")
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    def _open(self) -> None:
+        if self._opened:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as fh:
+                self._dimension = json.load(fh)["dimension"]
+        self._opened = True
+        self._tail_keys()
+
+    def digest(self, text: str) -> bytes:
+        return hashlib.blake2b(f"{self.model_id}\x00{text}".encode("utf-8"), digest_size=16).digest()
+
+    # ── Lookup ─────────────────────────────────────────────────────────────────
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self.digest(text)
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return vector
+
+            self._open()
+            row = self._rows.get(key)
+            if row is None:
+                # Another worker may have appended it since we last looked
+                self._tail_keys()
+                row = self._rows.get(key)
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+
+            vector = self._read_row(row)
+            self._remember(key, vector)
+            self.counters["disk_hits"] += 1
+            return vector
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        return [self.get(text) for text in texts]
+
+    # ── Store ──────────────────────────────────────────────────────────────────
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        with self._lock:
+            self._open()
+            if self._dimension is None:
+                self._dimension = int(vectors.shape[1])
+                with open(self._meta_path, "w") as fh:
+                    json.dump({"dimension": self._dimension}, fh)
+
+            with open(self._vectors_path, "ab") as vf, open(self._keys_path, "ab") as kf:
+                if fcntl is not None:
+                    fcntl.flock(kf.fileno(), fcntl.LOCK_EX)
+                try:
+                    self._tail_keys()
+                    row = os.fstat(vf.fileno()).st_size // (self._dimension * 4)
+                    records = []
+                    for text, vector in zip(texts, vectors):
+                        key = self.digest(text)
+                        if key in self._rows:
+                            continue
+                        vf.write(vector.tobytes())
+                        records.append(KEY_RECORD.pack(key, row))
+                        self._rows[key] = row
+                        self._remember(key, vector.copy())
+                        row += 1
+                    vf.flush()
+                    # Keys are written after their vectors so readers never see a dangling row
+                    kf.write(b"".join(records))
+                    kf.flush()
+                    self._keys_offset += len(records) * KEY_RECORD.size
+                    self.counters["stores"] += len(records)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(kf.fileno(), fcntl.LOCK_UN)
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        self.put_many([text], np.asarray(vector, dtype=np.float32))
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _tail_keys(self) -> None:
+        if not os.path.exists(self._keys_path):
+            return
+        size = os.path.getsize(self._keys_path)
+        usable = size - (size - self._keys_offset) % KEY_RECORD.size
+        if usable <= self._keys_offset:
+            return
+        with open(self._keys_path, "rb") as fh:
+            fh.seek(self._keys_offset)
+            chunk = fh.read(usable - self._keys_offset)
+        for key, row in KEY_RECORD.iter_unpack(chunk):
+            self._rows[key] = row
+        self._keys_offset = usable
+
+    def _read_row(self, row: int) -> np.ndarray:
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            rows = os.path.getsize(self._vectors_path) // (self._dimension * 4)
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dimension))
+        return self._mmap[row]
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.memory_entries:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> dict:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "persisted": len(self._rows),
+            "memory_entries": len(self._lru),
+        }
@@ -1,13 +1,161 @@
+"""
+embedding_service.py
+Sentence embeddings for ICP matching and the semantic caches.
+
+The model is loaded lazily on first use, so importing this module is cheap.
+settings.EMBEDDING_BACKEND selects the runtime:
+  - "torch"     : PyTorch SentenceTransformer (default)
+  - "onnx"      : ONNX Runtime, fp32 export of the same model
+  - "onnx-int8" : ONNX Runtime with the dynamically quantised int8 export
+The ONNX backends need `pip install optimum[onnxruntime]`; if that is
+missing the service logs a warning and falls back to torch.
+
+Parity check against the torch vectors (also tests/test_embedding_parity.py):
+    python -m app.services.embedding_service --parity onnx-int8
+"""
+import argparse
+import asyncio
+import logging
+import threading
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+PARITY_SAMPLES = [
+    "SaaS Decision Maker looking to automate outbound prospecting",
+    "Fintech compliance lead evaluating KYC vendors before Q3",
+    "HealthTech operations manager struggling with appointment no-shows",
+    "E-commerce marketing director planning a Black Friday SMS campaign",
+    "EduTech innovation lead piloting AI tutoring in two districts",
+]
+
 
 class EmbeddingService:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        backend: Optional[str] = None,
+        use_cache: Optional[bool] = None,
+    ):
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self.backend = backend or settings.EMBEDDING_BACKEND
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{self.backend}'; expected one of {BACKENDS}")
+        self.use_cache = settings.EMBEDDING_CACHE_ENABLED if use_cache is None else use_cache
+        self._model = None
+        self._cache: Optional[EmbeddingCache] = None
+        self._load_lock = threading.Lock()
+        self.batcher: Optional[EmbeddingBatcher] = None
+        if settings.EMBEDDING_BATCH_ENABLED:
+            self.batcher = EmbeddingBatcher(
+                self._encode_and_store,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            )
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    @property
+    def cache(self) -> Optional[EmbeddingCache]:
+        # Keyed per backend (int8 vectors differ slightly from fp32). The key is
+        # only known once the model has loaded: a failed ONNX load falls back
+        # to torch, and torch vectors must never be filed under the onnx key.
+        if not self.use_cache:
+            return None
+        if self._cache is None:
+            self.model  # resolves the backend
+            with self._load_lock:
+                if self._cache is None:
+                    self._cache = EmbeddingCache(
+                        settings.EMBEDDING_CACHE_DIR,
+                        f"{self.model_name}:{self.backend}",
+                        memory_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+                    )
+        return self._cache
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def _load_model(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend != "torch":
+            try:
+                model_kwargs = {"file_name": settings.EMBEDDING_ONNX_INT8_FILE} if self.backend == "onnx-int8" else {}
+                model = SentenceTransformer(self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+                logger.info("Loaded embedding model %s (%s backend)", self.model_name, self.backend)
+                return model
+            except Exception as e:
+                logger.warning("Embedding backend '%s' unavailable (%s); falling back to torch", self.backend, e)
+                self.backend = "torch"
+
+        model = SentenceTransformer(self.model_name)
+        logger.info("Loaded embedding model %s (torch backend)", self.model_name)
+        return model
 
     def get_embeddings(self, text: str) -> List[float]:
-        return self.model.encode(text).tolist()
+        return self.encode_batch([text])[0].tolist()
+
+    def encode_batch(self, texts: List[str], batch_size: int = 64, normalize: bool = False) -> np.ndarray:
+        """
+        Returns a (len(texts), dim) float32 matrix. Cached strings are served from
+        the embedding cache; the rest are encoded together in one model call.
+        """
+        cache = self.cache
+        if cache is None:
+            vectors = self._encode(texts, batch_size)
+        else:
+            found = cache.get_many(texts)
+            missing = list(dict.fromkeys(t for t, v in zip(texts, found) if v is None))
+            if missing:
+                fresh = self._encode(missing, batch_size)
+                cache.put_many(missing, fresh)
+                by_text = dict(zip(missing, fresh))
+                found = [v if v is not None else by_text[t] for t, v in zip(texts, found)]
+            vectors = np.vstack(found).astype(np.float32) if found else self._encode(texts, batch_size)
+
+        if normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1.0, norms)
+        return vectors
+
+    def _encode_and_store(self, texts: List[str]) -> np.ndarray:
+        """Encodes texts already known to be cache misses and writes them back."""
+        vectors = self._encode(texts, self.batcher.max_batch_size if self.batcher else 64)
+        cache = self.cache
+        if cache is not None:
+            cache.put_many(texts, vectors)
+        return vectors
+
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    async def aget_embeddings(self, text: str) -> List[float]:
+        # Cache hits are answered inline; misses are coalesced with other
+        # in-flight requests by the micro-batcher (or run in a worker thread)
+        cache = self.cache if self.loaded else await asyncio.to_thread(lambda: self.cache)
+        if cache is not None:
+            vector = cache.get(text)
+            if vector is not None:
+                return vector.tolist()
+        if self.batcher is not None:
+            return (await self.batcher.submit(text)).tolist()
+        return await asyncio.to_thread(self.get_embeddings, text)
 
     def compute_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         v1 = np.array(vec1)
@@ -17,4 +165,42 @@ class EmbeddingService:
         norm_v2 = np.linalg.norm(v2)
         return float(dot_product / (norm_v1 * norm_v2))
 
+
+def backend_parity(candidate: str, texts: Optional[List[str]] = None, reference: str = "torch") -> dict:
+    """
+    Encodes the same texts with two backends and reports per-text cosine
+    similarity, so a quantised backend can be checked before it is enabled.
+    """
+    texts = texts or PARITY_SAMPLES
+    ref = EmbeddingService(backend=reference, use_cache=False).encode_batch(texts, normalize=True)
+    cand_service = EmbeddingService(backend=candidate, use_cache=False)
+    cand = cand_service.encode_batch(texts, normalize=True)
+    if cand_service.backend != candidate:
+        # A fallback would compare torch with torch and pass trivially
+        raise RuntimeError(f"Embedding backend '{candidate}' failed to load (fell back to {cand_service.backend})")
+    cosines = np.sum(ref * cand, axis=1)
+    return {
+        "reference": reference,
+        "candidate": candidate,
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+    }
+
+
 embedding_service = EmbeddingService()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding backend utilities")
+    parser.add_argument("--parity", choices=BACKENDS, required=True, help="Backend to compare against torch")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        report = backend_parity(args.parity)
+    except RuntimeError as e:
+        raise SystemExit(f"Parity check failed: {e}")
+    print(report)
+    if report["min_cosine"] < args.min_cosine:
+        raise SystemExit(f"Parity check failed: min cosine {report['min_cosine']:.4f} < {args.min_cosine}")
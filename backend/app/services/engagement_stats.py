@@ -0,0 +1,234 @@
+"""
+engagement_stats.py
+Decayed per-ICP, per-channel outcome counters for the platform decision (A3).
+
+Every export outcome and every terminal call status adds one attempt (and a
+success when it went through) to the (icp_id, channel) bucket and to the
+all-ICP bucket "*". Counters decay exponentially with
+settings.ENGAGEMENT_HALF_LIFE_DAYS, so recent outcomes dominate.
+
+A3 reads `engagement(icp_id)`: a fixed number of dict lookups per channel, no
+queries. Sparse ICPs are smoothed toward the global rate with
+settings.ENGAGEMENT_PRIOR_WEIGHT pseudo-events.
+
+Counters live in memory and are checkpointed to the engagement_stats table
+every settings.ENGAGEMENT_CHECKPOINT_SECONDS (and on shutdown). A checkpoint
+writes only the deltas this worker has seen since the last one, then
+reloads the table, so several workers converge on the same totals. Each
+delta is merged by one atomic upsert that decays the stored row inside the
+database (attempts = stored * 0.5^(age / half-life) + delta), so workers
+checkpointing the same bucket at once never overwrite each other. Periodic
+checkpoints run on a background thread, never on the caller's (possibly
+the event loop's).
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.database.models.campaigns import Campaign
+from app.database.models.engagement import EngagementStat
+from app.database.models.exports import CallQueue, Export
+from app.database.session import engine
+from app.services.decision_engine import CHANNELS
+from app.services.rollups import insert_for
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_ICP = "*"
+
+# Exports / call queue use lower-case channel names; the decision engine does not
+CHANNEL_NAMES = {ch.lower(): ch for ch in CHANNELS}
+
+# Call statuses that close out an attempt, and whether it counts as a success
+CALL_OUTCOMES = {"done": True, "failed": False}
+
+Key = Tuple[str, str]
+
+
+class EngagementStats:
+    def __init__(self, half_life_days: float = 14.0, prior_weight: float = 5.0, checkpoint_seconds: float = 60.0):
+        self.half_life = half_life_days * 86400.0
+        self.prior_weight = prior_weight
+        self.checkpoint_seconds = checkpoint_seconds
+
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        # key → [attempts, successes, as_of]; _counters = last checkpoint + _pending
+        self._counters: Dict[Key, List[float]] = {}
+        self._pending: Dict[Key, List[float]] = {}
+        self._last_checkpoint = time.time()
+        self._checkpoint_running = False
+
+    # ── Decay helpers ──────────────────────────────────────────────────────────
+
+    def _decayed(self, entry: List[float], now: float) -> Tuple[float, float]:
+        factor = 0.5 ** (max(now - entry[2], 0.0) / self.half_life)
+        return entry[0] * factor, entry[1] * factor
+
+    def _add(self, table: Dict[Key, List[float]], key: Key, attempts: float, successes: float, now: float) -> None:
+        entry = table.get(key)
+        if entry is None:
+            table[key] = [attempts, successes, now]
+            return
+        a, s = self._decayed(entry, now)
+        table[key] = [a + attempts, s + successes, now]
+
+    # ── Recording ──────────────────────────────────────────────────────────────
+
+    def record(self, icp_id: Optional[str], channel: str, success: bool) -> None:
+        channel = CHANNEL_NAMES.get(channel.lower())
+        if channel is None:
+            return
+        now = time.time()
+        hit = 1.0 if success else 0.0
+        keys = [(GLOBAL_ICP, channel)]
+        if icp_id:
+            keys.append((icp_id, channel))
+        with self._lock:
+            for key in keys:
+                self._add(self._counters, key, 1.0, hit, now)
+                self._add(self._pending, key, 1.0, hit, now)
+        self.maybe_checkpoint()
+
+    def record_export(self, db: Session, export: Export) -> None:
+        """Counts an Export once it reaches success, failed or dead (queued rows are not outcomes yet)."""
+        if export.status not in ("success", "failed", "dead"):
+            return
+        self.record(_campaign_icp(db, export.campaign_id), export.channel, export.status == "success")
+
+    def record_call_status(self, db: Session, call: CallQueue, previous_status: str) -> None:
+        """Counts a call once, when it first reaches a terminal status."""
+        if call.status not in CALL_OUTCOMES or previous_status in CALL_OUTCOMES:
+            return
+        self.record(_campaign_icp(db, call.campaign_id), "call", CALL_OUTCOMES[call.status])
+
+    # ── Lookup ─────────────────────────────────────────────────────────────────
+
+    def engagement(self, icp_id: Optional[str]) -> Dict[str, float]:
+        """
+        Smoothed success rate per channel for one ICP, shaped like
+        DecisionEngine's historical_engagement. Channels with no history
+        anywhere are left out.
+        """
+        now = time.time()
+        k = self.prior_weight
+        rates: Dict[str, float] = {}
+        with self._lock:
+            for channel in CHANNELS:
+                overall = self._counters.get((GLOBAL_ICP, channel))
+                if overall is None:
+                    continue
+                g_attempts, g_successes = self._decayed(overall, now)
+                if g_attempts <= 0:
+                    continue
+                prior = g_successes / g_attempts
+
+                entry = self._counters.get((icp_id, channel)) if icp_id else None
+                attempts, successes = self._decayed(entry, now) if entry else (0.0, 0.0)
+                rates[channel] = round((successes + k * prior) / (attempts + k), 4)
+        return rates
+
+    # ── Checkpointing ──────────────────────────────────────────────────────────
+
+    def load(self, db: Session) -> None:
+        """Replaces the in-memory counters with the table, keeping un-checkpointed deltas."""
+        rows = db.exec(select(EngagementStat)).all()
+        now = time.time()
+        with self._lock:
+            counters = {
+                (r.icp_id, r.channel): [r.attempts, r.successes, _timestamp(r.updated_at)]
+                for r in rows
+            }
+            for key, entry in self._pending.items():
+                a, s = self._decayed(entry, now)
+                self._add(counters, key, a, s, now)
+            self._counters = counters
+        logger.info("Loaded engagement stats for %d (icp, channel) pairs", len(rows))
+
+    def checkpoint(self, db: Session) -> int:
+        """Merges pending deltas into engagement_stats and reloads; returns rows written."""
+        with self._checkpoint_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_checkpoint = time.time()
+            if pending:
+                now = time.time()
+                try:
+                    for (icp_id, channel), entry in pending.items():
+                        a, s = self._decayed(entry, now)
+                        db.execute(self._merge_statement(db, icp_id, channel, a, s, now))
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    # Put the deltas back so the next checkpoint retries them
+                    with self._lock:
+                        for key, (a, s, as_of) in pending.items():
+                            self._add(self._pending, key, a, s, as_of)
+                    raise
+            self.load(db)
+            return len(pending)
+
+    def _merge_statement(self, db: Session, icp_id: str, channel: str, attempts: float, successes: float, now: float):
+        """INSERT … ON CONFLICT that adds the delta to the stored counters decayed to `now`."""
+        if db.get_bind().dialect.name == "postgresql":
+            stored_at = func.extract("epoch", EngagementStat.updated_at)
+        else:
+            stored_at = (func.julianday(EngagementStat.updated_at) - 2440587.5) * 86400.0
+        factor = func.power(0.5, (now - stored_at) / self.half_life)
+        insert = insert_for(db)
+        stmt = insert(EngagementStat).values(
+            icp_id=icp_id, channel=channel, attempts=attempts, successes=successes,
+            updated_at=datetime.utcfromtimestamp(now),
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=["icp_id", "channel"],
+            set_={
+                "attempts": EngagementStat.attempts * factor + stmt.excluded.attempts,
+                "successes": EngagementStat.successes * factor + stmt.excluded.successes,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+
+    def maybe_checkpoint(self) -> None:
+        """Starts a background checkpoint when one is due and none is running."""
+        if time.time() - self._last_checkpoint < self.checkpoint_seconds:
+            return
+        with self._lock:
+            if self._checkpoint_running:
+                return
+            self._checkpoint_running = True
+        threading.Thread(target=self._checkpoint_in_background, name="engagement-checkpoint", daemon=True).start()
+
+    def _checkpoint_in_background(self) -> None:
+        try:
+            with Session(engine) as db:
+                self.checkpoint(db)
+        except Exception:
+            logger.exception("Engagement stats checkpoint failed")
+        finally:
+            with self._lock:
+                self._checkpoint_running = False
+
+
+def _campaign_icp(db: Session, campaign_id: Optional[int]) -> Optional[str]:
+    if campaign_id is None:
+        return None
+    campaign = db.get(Campaign, campaign_id)
+    return campaign.icp_id if campaign else None
+
+
+def _timestamp(value: datetime) -> float:
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+engagement_stats = EngagementStats(
+    half_life_days=settings.ENGAGEMENT_HALF_LIFE_DAYS,
+    prior_weight=settings.ENGAGEMENT_PRIOR_WEIGHT,
+    checkpoint_seconds=settings.ENGAGEMENT_CHECKPOINT_SECONDS,
+)
@@ -0,0 +1,362 @@
+"""
+export_outbox.py
+Durable outbox for exports, backed by the exports table.
+
+Export endpoints only insert a `pending` Export row (with the request
+payload and an idempotency key) and return. A pool of asyncio workers then:
+  1. claims due rows: pending/retrying rows whose next_attempt_at has passed,
+     plus `delivering` rows whose lease expired (a crashed worker). Each row
+     is flipped with a conditional UPDATE, so a row is only ever claimed once
+     per lease, even with several processes polling the same table. While a
+     batch is being delivered its leases are renewed every third of the
+     lease, so a slow destination never lets another worker reclaim a row
+     that is still in flight;
+  2. calls the channel's registered delivery handler with the payload and
+     the idempotency key, which destinations can use to drop duplicates;
+  3. marks the row `success`, or `retrying` with exponential backoff and
+     jitter, or `dead` (dead letter) after settings.EXPORT_MAX_ATTEMPTS.
+
+Workers start with the API unless settings.EXPORT_WORKERS is 0. They can
+also run as a separate process:
+    python -m app.services.export_outbox
+"""
+import asyncio
+import json
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import and_, func, or_, update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.database.models.exports import Export
+from app.database.session import engine
+from app.services import rollups
+from app.services.engagement_stats import engagement_stats
+
+logger = logging.getLogger(__name__)
+
+# payload dict, idempotency key → destination string stored on the Export row
+DeliveryHandler = Callable[[dict, str], Awaitable[Optional[str]]]
+
+QUEUED_STATUSES = ("pending", "retrying")
+
+
+class ExportOutbox:
+    def __init__(
+        self,
+        workers: int = 4,
+        poll_seconds: float = 1.0,
+        claim_batch: int = 10,
+        lease_seconds: float = 120.0,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 5.0,
+        retry_max_seconds: float = 900.0,
+    ):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.claim_batch = claim_batch
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+
+        self._handlers: Dict[str, DeliveryHandler] = {}
+        self._limits: Dict[str, int] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, channel: str, handler: DeliveryHandler, max_concurrency: Optional[int] = None) -> None:
+        """`max_concurrency` caps in-flight deliveries for the channel across all workers."""
+        self._handlers[channel] = handler
+        if max_concurrency:
+            self._limits[channel] = max_concurrency
+
+    # ── Producer side ──────────────────────────────────────────────────────────
+
+    def enqueue(
+        self,
+        db: Session,
+        channel: str,
+        payload: BaseModel,
+        user_id: int,
+        campaign_id: Optional[int] = None,
+        destination: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        known: Optional[Dict[str, Export]] = None,
+    ) -> Tuple[Export, bool]:
+        """
+        Adds a pending Export to the session (the caller commits, so audit rows
+        land in the same transaction). Returns (export, created); a repeated
+        idempotency key returns the original row with created=False. Batch
+        callers pass `known` from find_many() instead of one lookup per row;
+        rows created here are added to it, so repeats within the batch match too.
+        """
+        if idempotency_key:
+            existing = known.get(idempotency_key) if known is not None else self.find(db, idempotency_key)
+            if existing is not None:
+                return existing, False
+
+        record = Export(
+            user_id=user_id,
+            campaign_id=campaign_id,
+            channel=channel,
+            status="pending",
+            destination=destination,
+            idempotency_key=idempotency_key or uuid.uuid4().hex,
+            payload=payload.model_dump_json(exclude={"idempotency_key"}),
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+        )
+        db.add(record)
+        rollups.increment(db, rollups.export_counter(channel))
+        if known is not None:
+            known[record.idempotency_key] = record
+        return record, True
+
+    @staticmethod
+    def find(db: Session, idempotency_key: str) -> Optional[Export]:
+        return db.exec(select(Export).where(Export.idempotency_key == idempotency_key)).first()
+
+    @staticmethod
+    def find_many(db: Session, idempotency_keys: List[str]) -> Dict[str, Export]:
+        """Existing exports by idempotency key, in one IN (...) query."""
+        keys = list({key for key in idempotency_keys if key})
+        if not keys:
+            return {}
+        return {r.idempotency_key: r for r in db.exec(select(Export).where(Export.idempotency_key.in_(keys))).all()}
+
+    def notify(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def requeue(self, db: Session, export_id: int) -> Optional[Export]:
+        """Moves a dead (or failed) export back to pending with a fresh attempt budget."""
+        record = db.get(Export, export_id)
+        if record is None or record.status not in ("dead", "failed") or not record.payload:
+            return None
+        record.status = "pending"
+        record.attempts = 0
+        record.next_attempt_at = datetime.utcnow()
+        record.locked_until = None
+        db.add(record)
+        db.commit()
+        db.refresh(record)
+        self.notify()
+        return record
+
+    # ── Worker side ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(
+            and_(Export.status.in_(QUEUED_STATUSES), Export.next_attempt_at <= now),
+            and_(Export.status == "delivering", Export.locked_until < now),
+        )
+
+    def claim(self, limit: int) -> List[Export]:
+        now = datetime.utcnow()
+        with Session(engine) as db:
+            candidates = db.exec(
+                select(Export.id)
+                .where(self._claimable(now))
+                .order_by(Export.next_attempt_at)
+                .limit(limit)
+            ).all()
+            claimed = []
+            for export_id in candidates:
+                # Conditional flip: loses cleanly if another worker got there first
+                result = db.execute(
+                    update(Export)
+                    .where(Export.id == export_id, self._claimable(now))
+                    .values(
+                        status="delivering",
+                        locked_until=now + self.lease,
+                        attempts=func.coalesce(Export.attempts, 0) + 1,
+                    )
+                )
+                if result.rowcount:
+                    claimed.append(export_id)
+            db.commit()
+            if not claimed:
+                return []
+            return list(db.exec(select(Export).where(Export.id.in_(claimed)).order_by(Export.next_attempt_at)).all())
+
+    def renew(self, export_ids: List[int]) -> int:
+        """Pushes locked_until out by one lease for rows still being delivered; returns rows renewed."""
+        if not export_ids:
+            return 0
+        with Session(engine) as db:
+            result = db.execute(
+                update(Export)
+                .where(Export.id.in_(export_ids), Export.status == "delivering")
+                .values(locked_until=datetime.utcnow() + self.lease)
+            )
+            db.commit()
+            return result.rowcount
+
+    async def _keep_leases(self, in_flight: set) -> None:
+        interval = self.lease.total_seconds() / 3
+        while in_flight:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.renew, list(in_flight))
+            except Exception:
+                logger.exception("Export outbox lease renewal failed")
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** max(attempts - 1, 0))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _finish(self, export_id: int, error: Optional[str], destination: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        with Session(engine) as db:
+            record = db.get(Export, export_id)
+            if record is None or record.status != "delivering":
+                return
+            record.locked_until = None
+            if error is None:
+                record.status = "success"
+                record.error_message = None
+                record.delivered_at = now
+                if destination:
+                    record.destination = destination
+            elif (record.attempts or 0) >= self.max_attempts:
+                record.status = "dead"
+                record.error_message = error
+                logger.warning("Export %d dead-lettered after %d attempts: %s", export_id, record.attempts, error)
+            else:
+                record.status = "retrying"
+                record.error_message = error
+                record.next_attempt_at = now + timedelta(seconds=self._backoff(record.attempts or 1))
+            db.add(record)
+            db.commit()
+            db.refresh(record)
+            # Stats are best-effort: the row is already finished whatever happens here
+            try:
+                engagement_stats.record_export(db, record)
+            except Exception:
+                logger.exception("Engagement stats update failed for export %d", export_id)
+
+    async def deliver(self, record: Export, in_flight: Optional[set] = None) -> None:
+        handler = self._handlers.get(record.channel)
+        try:
+            if handler is None:
+                raise RuntimeError(f"No delivery handler for channel '{record.channel}'")
+            semaphore = self._semaphores.get(record.channel)
+            if semaphore is None:
+                destination = await handler(json.loads(record.payload or "{}"), record.idempotency_key)
+            else:
+                async with semaphore:
+                    destination = await handler(json.loads(record.payload or "{}"), record.idempotency_key)
+        except Exception as exc:
+            logger.warning("Export %d (%s) attempt %d failed: %s", record.id, record.channel, record.attempts, exc)
+            error, destination = str(exc) or type(exc).__name__, None
+        else:
+            error = None
+        if in_flight is not None:
+            in_flight.discard(record.id)
+        try:
+            await asyncio.to_thread(self._finish, record.id, error, destination)
+        except Exception:
+            # The row stays `delivering` and is reclaimed once its lease expires
+            logger.exception("Export %d (%s): recording the outcome failed", record.id, record.channel)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                batch = await asyncio.to_thread(self.claim, self.claim_batch)
+            except Exception:
+                logger.exception("Export outbox claim failed")
+                batch = []
+            if batch:
+                # Delivered concurrently so batching handlers (the webhook client) can coalesce them
+                in_flight = {record.id for record in batch}
+                heartbeat = asyncio.create_task(self._keep_leases(in_flight))
+                try:
+                    await asyncio.gather(*(self.deliver(record, in_flight) for record in batch))
+                except Exception:
+                    logger.exception("Export outbox delivery batch failed")
+                finally:
+                    heartbeat.cancel()
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        if self._tasks or self.workers <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._semaphores = {channel: asyncio.Semaphore(limit) for channel, limit in self._limits.items()}
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info("Started %d export delivery workers", self.workers)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = self._wakeup = None
+
+    # ── Monitoring ─────────────────────────────────────────────────────────────
+
+    def stats(self, db: Session, sample: int = 100) -> dict:
+        now = datetime.utcnow()
+        by_status = dict(db.exec(select(Export.status, func.count()).group_by(Export.status)).all())
+        oldest_due = db.exec(
+            select(func.min(Export.next_attempt_at))
+            .where(Export.status.in_(QUEUED_STATUSES), Export.next_attempt_at <= now)
+        ).one()
+        recent = db.exec(
+            select(Export.created_at, Export.delivered_at)
+            .where(Export.status == "success", Export.delivered_at.is_not(None))
+            .order_by(Export.delivered_at.desc())
+            .limit(sample)
+        ).all()
+        lags = [(delivered - created).total_seconds() for created, delivered in recent]
+        return {
+            "depth": sum(by_status.get(s, 0) for s in QUEUED_STATUSES),
+            "delivering": by_status.get("delivering", 0),
+            "dead": by_status.get("dead", 0),
+            "by_status": by_status,
+            "oldest_due_seconds": round((now - oldest_due).total_seconds(), 3) if oldest_due else 0.0,
+            "avg_delivery_lag_seconds": round(sum(lags) / len(lags), 3) if lags else 0.0,
+            "workers": len(self._tasks),
+        }
+
+
+export_outbox = ExportOutbox(
+    workers=settings.EXPORT_WORKERS,
+    poll_seconds=settings.EXPORT_POLL_SECONDS,
+    claim_batch=settings.EXPORT_CLAIM_BATCH,
+    lease_seconds=settings.EXPORT_LEASE_SECONDS,
+    max_attempts=settings.EXPORT_MAX_ATTEMPTS,
+    retry_base_seconds=settings.EXPORT_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.EXPORT_RETRY_MAX_SECONDS,
+)
+
+
+if __name__ == "__main__":
+    import app.database.models.base  # noqa: F401 — tables referenced by foreign keys
+    import app.services.export_service  # noqa: F401 — registers the delivery handlers
+    from app.database.session import init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    export_outbox.workers = max(export_outbox.workers, 1)
+
+    async def _run() -> None:
+        await export_outbox.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(_run())
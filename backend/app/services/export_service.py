@@ -2,21 +2,37 @@
 export_service.py
 Business logic for LinkedIn, Email, and Call exports.
 No logic lives in the route handler — only here.
+
+LinkedIn and email exports go through the export outbox: the request only
+writes a pending Export row, and deliver_linkedin / deliver_email run later
+in the outbox workers. The export_* functions do blocking Session work and
+are plain functions, so their (sync) routes run in FastAPI's threadpool
+rather than on the event loop. Call exports stay inline — they are a local
+CallQueue insert with no remote destination to wait on.
 """
+import asyncio
 import smtplib
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
+from typing import Dict, Optional, Tuple
 
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
 
 from app.core.config import settings
 from app.database.models.exports import Export, CallQueue
 from app.database.models.base import AuditLog
+from app.services import rollups
+from app.services.audit_writer import audit_writer
+from app.services.export_outbox import export_outbox
+from app.services.smtp_pool import get_smtp_pool, provider_rate_limiter
+from app.services.webhook_client import webhook_client
 from app.schemas.export_schemas import (
     LinkedInExportRequest, LinkedInExportResponse,
     EmailExportRequest, EmailExportResponse,
+    EmailBatchExportRequest, EmailBatchExportResponse,
     CallExportRequest, CallExportResponse,
 )
 
@@ -34,140 +50,228 @@ def _write_audit(db: Session, user_id: int, action: str, channel: str, summary:
         icp_id="",
         priority_score=0.0,
     )
-    db.add(log)
+    if not audit_writer.submit(log):
+        db.add(log)
+
+
+# ── Outbox helpers ─────────────────────────────────────────────────────────────
+
+def _enqueue_export(
+    db: Session,
+    channel: str,
+    req,
+    user_id: int,
+    destination: str,
+    audit_action: str,
+    audit_summary: str,
+    known: Optional[Dict[str, Export]] = None,
+) -> Tuple[Export, bool]:
+    """Writes the pending Export plus its audit row; a replayed idempotency key is a no-op."""
+    record, created = export_outbox.enqueue(
+        db, channel, req,
+        user_id=user_id,
+        campaign_id=req.campaign_id,
+        destination=destination,
+        idempotency_key=req.idempotency_key,
+        known=known,
+    )
+    if created:
+        _write_audit(db, user_id, audit_action, channel, audit_summary)
+    return record, created
+
+
+def _commit_enqueued(db: Session, record: Export, idempotency_key: Optional[str]) -> Export:
+    """Commits and wakes the outbox workers; returns the row that holds the idempotency key."""
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent request carrying the same idempotency key
+        db.rollback()
+        existing = export_outbox.find(db, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return existing
+    export_outbox.notify()
+    return record
 
 
 # ── LinkedIn ───────────────────────────────────────────────────────────────────
 
-async def export_to_linkedin(
+def _linkedin_summary(req: LinkedInExportRequest) -> str:
+    type_label = "Direct Message" if req.export_type == "message" else "Post"
+    target_label = f"To: {req.recipient_name}" if req.recipient_name else "To: Feed"
+    return f"[LinkedIn {type_label}] {target_label} | {req.headline[:50]}"
+
+
+async def deliver_linkedin(payload: dict, idempotency_key: str) -> str:
+    """
+    Outbox handler. With LINKEDIN_WEBHOOK_URL set, the payload is batched with
+    other exports and POSTed by the shared webhook client; otherwise the post
+    is only logged (simulated).
+    """
+    req = LinkedInExportRequest(**payload)
+    webhook_url = settings.LINKEDIN_WEBHOOK_URL
+
+    if webhook_url:
+        await webhook_client.submit(webhook_url, {"idempotency_key": idempotency_key, **payload})
+    else:
+        logger.info("LinkedIn export (simulated — no webhook): %s", _linkedin_summary(req))
+    return f"{req.export_type} via {webhook_url or 'simulated'}"
+
+
+def export_to_linkedin(
     req: LinkedInExportRequest,
     db: Session,
     user_id: int = 1,
 ) -> LinkedInExportResponse:
-    """
-    MVP: logs payload as a simulated LinkedIn post via webhook/logging.
-    Structure is ready for real LinkedIn API integration.
-    """
+    """Queues the post/message in the export outbox; delivery happens in the background."""
+    type_label = "message" if req.export_type == "message" else "post"
     try:
-        webhook_url = settings.LINKEDIN_WEBHOOK_URL
-        
-        type_label = "Direct Message" if req.export_type == "message" else "Post"
-        target_label = f"To: {req.recipient_name}" if req.recipient_name else "To: Feed"
-        payload_summary = f"[LinkedIn {type_label}] {target_label} | {req.headline[:50]}"
-
-        if webhook_url:
-            # Future: POST to LinkedIn API or internal webhook router
-            logger.info("LinkedIn webhook (%s) target: %s | payload: %s", req.export_type, webhook_url, payload_summary)
-        else:
-            logger.info("LinkedIn export (simulated — no webhook): %s", payload_summary)
-
-        record = Export(
-            user_id=user_id,
-            campaign_id=req.campaign_id,
-            channel="linkedin",
-            status="success",
-            destination=f"{req.export_type} via {webhook_url or 'simulated'}",
+        record, _ = _enqueue_export(
+            db, "linkedin", req, user_id,
+            destination=f"{req.export_type} via {settings.LINKEDIN_WEBHOOK_URL or 'simulated'}",
+            audit_action="export_linkedin",
+            audit_summary=_linkedin_summary(req),
         )
-        db.add(record)
-        _write_audit(db, user_id, "export_linkedin", "linkedin", payload_summary)
-        db.commit()
-        db.refresh(record)
+        record = _commit_enqueued(db, record, req.idempotency_key)
 
         return LinkedInExportResponse(
             success=True,
             export_id=record.id,
-            message=f"LinkedIn {type_label.lower()} queued successfully.",
+            message=f"LinkedIn {type_label} queued successfully.",
         )
 
     except Exception as exc:
         logger.exception("LinkedIn export failed")
+        db.rollback()
+        return LinkedInExportResponse(
+            success=False,
+            export_id=-1,
+            message=f"Export failed: {str(exc)}",
+        )
+
+
+# ── Email ──────────────────────────────────────────────────────────────────────
+
+SMTP_NOT_CONFIGURED = (
+    "SMTP credentials are not configured. "
+    "Set SMTP_USERNAME and SMTP_PASSWORD in your .env file. "
+    "For Gmail, generate a 16-character App Password at "
+    "https://myaccount.google.com/apppasswords"
+)
+
+SMTP_AUTH_FAILED = (
+    "SMTP authentication failed. "
+    "For Gmail, make sure you are using an App Password (not your account password). "
+    "Generate one at https://myaccount.google.com/apppasswords"
+)
+
+
+def _smtp_configured() -> bool:
+    return bool(settings.SMTP_USERNAME and settings.SMTP_PASSWORD)
+
+
+def _send_email(req: EmailExportRequest, idempotency_key: str) -> None:
+    """Blocking send over a pooled connection."""
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = req.subject
+    msg["From"] = settings.SMTP_USERNAME
+    msg["To"] = req.recipient
+    # Stable across retries, so a duplicate delivery can be recognised downstream
+    msg["Message-ID"] = f"<{idempotency_key}@{settings.SMTP_USERNAME.rpartition('@')[2] or 'localhost'}>"
+    msg.attach(MIMEText(req.body, "plain"))
+
+    try:
+        get_smtp_pool().send(settings.SMTP_USERNAME, [req.recipient], msg.as_string())
+    except smtplib.SMTPAuthenticationError as exc:
+        logger.exception("Email export to %s failed — authentication error", req.recipient)
+        raise RuntimeError(SMTP_AUTH_FAILED) from exc
+
+
+async def deliver_email(payload: dict, idempotency_key: str) -> str:
+    """Outbox handler: rate-limited per provider, smtplib kept off the event loop."""
+    req = EmailExportRequest(**payload)
+    if not _smtp_configured():
+        raise RuntimeError(SMTP_NOT_CONFIGURED)
+    await provider_rate_limiter(settings.SMTP_HOST).acquire()
+    await asyncio.to_thread(_send_email, req, idempotency_key)
+    return req.recipient
+
+
+def _enqueue_email(
+    req: EmailExportRequest, db: Session, user_id: int, known: Optional[Dict[str, Export]] = None,
+) -> Tuple[Export, str]:
+    # Guard: refuse to queue if SMTP is not configured — retrying cannot fix that
+    if not _smtp_configured():
         record = Export(
             user_id=user_id,
             campaign_id=req.campaign_id,
-            channel="linkedin",
+            channel="email",
             status="failed",
-            error_message=str(exc),
+            destination=req.recipient,
+            error_message=SMTP_NOT_CONFIGURED,
         )
         db.add(record)
-        db.commit()
-        return LinkedInExportResponse(
-            success=False,
-            export_id=record.id,
-            message=f"Export failed: {str(exc)}",
-        )
+        rollups.increment(db, rollups.export_counter("email"))
+        _write_audit(db, user_id, "export_email", "email", f"To: {req.recipient} | {req.subject}")
+        return record, "failed"
 
+    record, _ = _enqueue_export(
+        db, "email", req, user_id,
+        destination=req.recipient,
+        audit_action="export_email",
+        audit_summary=f"To: {req.recipient} | {req.subject}",
+        known=known,
+    )
+    return record, record.status
+
+
+def _email_response(export_id: int, status: str) -> EmailExportResponse:
+    if status == "failed":
+        return EmailExportResponse(success=False, export_id=export_id, message=f"Email failed: {SMTP_NOT_CONFIGURED}")
+    return EmailExportResponse(success=True, export_id=export_id, message="Email queued for delivery.")
 
-# ── Email ──────────────────────────────────────────────────────────────────────
 
-async def export_via_email(
+def export_via_email(
     req: EmailExportRequest,
     db: Session,
     user_id: int = 1,
 ) -> EmailExportResponse:
-    status = "success"
-    error_msg = None
-
-    # Guard: refuse to attempt send if SMTP is not configured
-    if not settings.SMTP_USERNAME or not settings.SMTP_PASSWORD:
-        status = "failed"
-        error_msg = (
-            "SMTP credentials are not configured. "
-            "Set SMTP_USERNAME and SMTP_PASSWORD in your .env file. "
-            "For Gmail, generate a 16-character App Password at "
-            "https://myaccount.google.com/apppasswords"
-        )
+    record, status = _enqueue_email(req, db, user_id)
+    if status == "failed":
         logger.warning("Email export skipped — SMTP not configured")
-    else:
-        try:
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = req.subject
-            msg["From"] = settings.SMTP_USERNAME
-            msg["To"] = req.recipient
-            msg.attach(MIMEText(req.body, "plain"))
-
-            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=10) as server:
-                server.ehlo()
-                if settings.SMTP_PORT == 587:
-                    server.starttls()
-                server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-                server.sendmail(settings.SMTP_USERNAME, [req.recipient], msg.as_string())
-
-        except smtplib.SMTPAuthenticationError:
-            logger.exception("Email export to %s failed — authentication error", req.recipient)
-            status = "failed"
-            error_msg = (
-                "SMTP authentication failed. "
-                "For Gmail, make sure you are using an App Password (not your account password). "
-                "Generate one at https://myaccount.google.com/apppasswords"
-            )
-        except Exception as exc:
-            logger.exception("Email export to %s failed", req.recipient)
-            status = "failed"
-            error_msg = str(exc)
-
-    record = Export(
-        user_id=user_id,
-        campaign_id=req.campaign_id,
-        channel="email",
-        status=status,
-        destination=req.recipient,
-        error_message=error_msg,
-    )
-    db.add(record)
-    _write_audit(db, user_id, "export_email", "email", f"To: {req.recipient} | {req.subject}")
+    record = _commit_enqueued(db, record, req.idempotency_key)
+    return _email_response(record.id, status)
+
+
+def export_email_batch(
+    req: EmailBatchExportRequest,
+    db: Session,
+    user_id: int = 1,
+) -> EmailBatchExportResponse:
+    """
+    Queues every message in one transaction, with one idempotency lookup for
+    the whole batch. The outbox workers deliver them over the shared SMTP
+    pool, spaced by the provider rate limit.
+    """
+    known = export_outbox.find_many(db, [message.idempotency_key for message in req.messages])
+    enqueued = [_enqueue_email(message, db, user_id, known) for message in req.messages]
+    db.flush()
+    results = [_email_response(record.id, status) for record, status in enqueued]
     db.commit()
-    db.refresh(record)
+    export_outbox.notify()
+
+    queued = sum(1 for r in results if r.success)
+    return EmailBatchExportResponse(results=results, queued=queued, failed=len(results) - queued)
 
-    return EmailExportResponse(
-        success=(status == "success"),
-        export_id=record.id,
-        message="Email sent successfully." if status == "success" else f"Email failed: {error_msg}",
-    )
+
+export_outbox.register("linkedin", deliver_linkedin)
+export_outbox.register("email", deliver_email, max_concurrency=settings.SMTP_POOL_SIZE)
 
 
 # ── Call Queue ─────────────────────────────────────────────────────────────────
 
-async def export_to_call_queue(
+def export_to_call_queue(
     req: CallExportRequest,
     db: Session,
     user_id: int = 1,
@@ -175,6 +279,7 @@ async def export_to_call_queue(
     try:
         entry = CallQueue(
             user_id=user_id,
+            campaign_id=req.campaign_id,
             lead_name=req.lead_name,
             phone=req.phone,
             script=req.script,
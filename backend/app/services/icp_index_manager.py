@@ -0,0 +1,390 @@
+"""
+icp_index_manager.py
+Lifecycle of the FAISS index behind ICPMatcherAgent.
+
+- Bulk ingest from the ICPProfile table or a JSONL file, encoded in batches.
+- IndexIDMap over inner product on unit vectors (= cosine), so profiles can
+  be added/updated/removed incrementally by FAISS id.
+- A persistent FAISS-id → ICPProfile mapping is saved next to every index.
+- Committed ICPProfile inserts/updates/deletes are tracked by mapper events;
+  the next search re-reads those profiles (sync_from_db) and publishes.
+- Each publish writes a new versioned pair of files and then atomically
+  repoints `icp.current`; other workers notice the pointer change and
+  hot-swap the new version on their next search, without a restart.
+- Load → apply changes → publish runs under an exclusive flock on
+  `icp.lock`, starting from the newest published version. Two workers
+  publishing at once therefore never drop each other's changes.
+
+CLI:
+    python -m app.services.icp_index_manager build
+    python -m app.services.icp_index_manager ingest-jsonl profiles.jsonl [--persist]
+"""
+import argparse
+import contextlib
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import faiss
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session as ORMSession, object_session
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.database.models.icp import ICPProfile
+from app.database.session import engine
+from app.services.embedding_service import embedding_service
+
+try:  # POSIX only; without it publishing assumes a single writer process
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+POINTER_FILE = "icp.current"
+LOCK_FILE = "icp.lock"
+KEEP_VERSIONS = 2
+
+
+def _profile_meta(profile: ICPProfile) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {"id": profile.id, "name": profile.name, "industry": profile.industry}
+    if profile.preferences:
+        meta["preferences"] = json.loads(profile.preferences)
+    return meta
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    batch: List = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _atomic_write(path: str, write) -> None:
+    """Writes via a temp file in the same directory, then os.replace()s it into place."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ICPIndexManager:
+    def __init__(self, index_dir: str = "data/vector_db", batch_size: int = 256):
+        self.index_dir = index_dir
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self.index = self._empty_index()
+        self.version = 0
+        self.next_id = 0
+        self.profiles: Dict[int, Dict[str, Any]] = {}   # FAISS id → profile metadata
+        self._faiss_id_of: Dict[str, int] = {}           # ICPProfile.id → FAISS id
+        self._pending: Set[str] = set()                  # committed ICPProfile changes not yet indexed
+        self._pointer_mtime: Optional[float] = None
+        self._last_check = 0.0
+        self.reload_interval = 1.0  # seconds between pointer-file stats
+
+    # ── Loading / hot swap ─────────────────────────────────────────────────────
+
+    @staticmethod
+    def _empty_index() -> faiss.Index:
+        return faiss.IndexIDMap(faiss.IndexFlatIP(DIMENSION))
+
+    def _pointer_path(self) -> str:
+        return os.path.join(self.index_dir, POINTER_FILE)
+
+    def _version_paths(self, version: int) -> Tuple[str, str]:
+        base = os.path.join(self.index_dir, f"icp.v{version:06d}")
+        return f"{base}.index", f"{base}.ids.json"
+
+    def published_version(self) -> int:
+        try:
+            with open(self._pointer_path()) as fh:
+                return int(json.load(fh)["version"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0
+
+    def load(self) -> bool:
+        """Loads the currently published version; returns False if none exists."""
+        version = self.published_version()
+        if not version:
+            return False
+        index_path, ids_path = self._version_paths(version)
+        index = faiss.read_index(index_path)
+        with open(ids_path) as fh:
+            mapping = json.load(fh)
+        profiles = {int(fid): meta for fid, meta in mapping["profiles"].items()}
+
+        with self._lock:
+            self.index = index
+            self.version = version
+            self.next_id = mapping["next_id"]
+            self.profiles = profiles
+            self._faiss_id_of = {meta["id"]: fid for fid, meta in profiles.items()}
+            self._pointer_mtime = os.path.getmtime(self._pointer_path())
+        logger.info("Loaded ICP index v%d (%d vectors)", version, index.ntotal)
+        return True
+
+    def maybe_reload(self) -> None:
+        """Cheap check (one stat, rate-limited) for a newer published version."""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self._pointer_path())
+        except FileNotFoundError:
+            return
+        if mtime != self._pointer_mtime and self.published_version() != self.version:
+            self.load()
+
+    # ── Ingest / incremental updates ───────────────────────────────────────────
+
+    def add_profiles(self, profiles: Iterable[ICPProfile]) -> int:
+        """Adds or replaces profiles, encoding them in batches. Returns the count."""
+        added = 0
+        for batch in _batched(profiles, self.batch_size):
+            vectors = embedding_service.encode_batch([p.embedding_text() for p in batch], normalize=True)
+            with self._lock:
+                self._remove_locked([p.id for p in batch])
+                ids = np.arange(self.next_id, self.next_id + len(batch), dtype=np.int64)
+                self.next_id += len(batch)
+                self.index.add_with_ids(vectors, ids)
+                for fid, profile in zip(ids.tolist(), batch):
+                    self.profiles[fid] = _profile_meta(profile)
+                    self._faiss_id_of[profile.id] = fid
+            added += len(batch)
+        return added
+
+    def remove_profiles(self, profile_ids: Iterable[str]) -> int:
+        with self._lock:
+            return self._remove_locked(list(profile_ids))
+
+    def _remove_locked(self, profile_ids: List[str]) -> int:
+        fids = [self._faiss_id_of.pop(pid) for pid in profile_ids if pid in self._faiss_id_of]
+        if not fids:
+            return 0
+        for fid in fids:
+            self.profiles.pop(fid, None)
+        return int(self.index.remove_ids(np.asarray(fids, dtype=np.int64)))
+
+    def rebuild_from_db(self, db: Session) -> int:
+        """Re-ingests every ICPProfile into a fresh index (does not publish)."""
+        with self._lock:
+            self.index = self._empty_index()
+            self.profiles = {}
+            self._faiss_id_of = {}
+            self.next_id = 0
+        rows = db.exec(select(ICPProfile).execution_options(yield_per=self.batch_size))
+        return self.add_profiles(rows)
+
+    def sync_from_db(self, db: Session, profile_ids: Iterable[str]) -> None:
+        """Re-reads the given profiles; rows that no longer exist are removed."""
+        wanted = list(profile_ids)
+        rows = db.exec(select(ICPProfile).where(ICPProfile.id.in_(wanted))).all()
+        present = {p.id for p in rows}
+        self.remove_profiles([pid for pid in wanted if pid not in present])
+        self.add_profiles(rows)
+
+    def mark_dirty(self, profile_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._pending.update(profile_ids)
+
+    def apply_pending(self) -> None:
+        """
+        Indexes committed profile changes and publishes them for the other
+        workers, on top of the newest published version (another worker may
+        have published since this one last loaded).
+        """
+        with self._lock:
+            changed, self._pending = list(self._pending), set()
+        if not changed:
+            return
+        try:
+            with self.publish_lock():
+                if self.published_version() > self.version:
+                    self.load()
+                with Session(engine) as db:
+                    self.sync_from_db(db, changed)
+                self._publish_locked()
+        except Exception:
+            self.mark_dirty(changed)
+            logger.exception("Re-indexing %d changed ICP profiles failed; will retry", len(changed))
+
+    def ingest_jsonl(self, path: str, db: Optional[Session] = None) -> int:
+        """
+        Streams profiles from a JSONL file (one ICPProfile dict per line).
+        When `db` is given the rows are upserted into the table as well.
+        """
+        def records() -> Iterator[ICPProfile]:
+            with open(path) as fh:
+                for line in fh:
+                    if line.strip():
+                        record = json.loads(line)
+                        if isinstance(record.get("preferences"), dict):
+                            record["preferences"] = json.dumps(record["preferences"])
+                        yield ICPProfile(**record)
+
+        count = 0
+        for batch in _batched(records(), self.batch_size):
+            if db is not None:
+                for profile in batch:
+                    db.merge(profile)
+                db.commit()
+            count += self.add_profiles(batch)
+        return count
+
+    # ── Publishing ─────────────────────────────────────────────────────────────
+
+    @contextlib.contextmanager
+    def publish_lock(self) -> Iterator[None]:
+        """Exclusive across processes (and threads): wrap load → change → _publish_locked in it."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(os.path.join(self.index_dir, LOCK_FILE), "a") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    def publish(self) -> int:
+        """Writes a new index version atomically and repoints icp.current at it."""
+        with self.publish_lock():
+            return self._publish_locked()
+
+    def _publish_locked(self) -> int:
+        with self._lock:
+            version = max(self.version, self.published_version()) + 1
+            index_path, ids_path = self._version_paths(version)
+            mapping = {
+                "version": version,
+                "next_id": self.next_id,
+                "profiles": {str(fid): meta for fid, meta in self.profiles.items()},
+            }
+            _atomic_write(index_path, lambda tmp: faiss.write_index(self.index, tmp))
+            _atomic_write(ids_path, lambda tmp: self._dump_json(tmp, mapping))
+            _atomic_write(self._pointer_path(), lambda tmp: self._dump_json(tmp, {"version": version}))
+            self.version = version
+            self._pointer_mtime = os.path.getmtime(self._pointer_path())
+
+        self._prune_old_versions(version)
+        logger.info("Published ICP index v%d (%d vectors)", version, self.index.ntotal)
+        return version
+
+    @staticmethod
+    def _dump_json(path: str, payload: dict) -> None:
+        with open(path, "w") as fh:
+            json.dump(payload, fh)
+
+    def _prune_old_versions(self, current: int) -> None:
+        for path in glob.glob(os.path.join(self.index_dir, "icp.v*.index")):
+            version = int(os.path.basename(path)[len("icp.v"):-len(".index")])
+            if version <= current - KEEP_VERSIONS:
+                for stale in self._version_paths(version):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+
+    # ── Search ─────────────────────────────────────────────────────────────────
+
+    def search(self, query_vector: List[float], k: int = 1) -> List[Tuple[Dict[str, Any], float]]:
+        self.maybe_reload()
+        if self._pending:
+            self.apply_pending()
+        query = np.asarray([query_vector], dtype=np.float32)
+        faiss.normalize_L2(query)
+        with self._lock:
+            if self.index.ntotal == 0:
+                return []
+            scores, ids = self.index.search(query, min(k, self.index.ntotal))
+            return [
+                (self.profiles[int(fid)], float(score))
+                for fid, score in zip(ids[0], scores[0])
+                if int(fid) in self.profiles
+            ]
+
+    @property
+    def size(self) -> int:
+        return self.index.ntotal
+
+
+icp_index_manager = ICPIndexManager(index_dir=settings.ICP_INDEX_DIR)
+
+
+# Profile changes are collected per session at flush and handed to the index
+# only once committed, so a re-read never sees (or misses) uncommitted rows.
+@event.listens_for(ICPProfile, "after_insert")
+@event.listens_for(ICPProfile, "after_update")
+@event.listens_for(ICPProfile, "after_delete")
+def _track_icp_change(mapper, connection, target: ICPProfile) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("icp_changed", set()).add(target.id)
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _queue_committed_icp_changes(session) -> None:
+    changed = session.info.pop("icp_changed", None)
+    if changed:
+        icp_index_manager.mark_dirty(changed)
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _drop_rolled_back_icp_changes(session) -> None:
+    session.info.pop("icp_changed", None)
+
+
+def ensure_index(db: Session) -> None:
+    """
+    Startup hook: load the published version if there is one; otherwise build
+    and publish from the ICPProfile table once (never on every deploy).
+    """
+    if icp_index_manager.load() or not settings.ICP_INDEX_AUTOBUILD:
+        return
+    with icp_index_manager.publish_lock():
+        # Workers starting together: only the first builds, the rest load its version
+        if icp_index_manager.load():
+            return
+        if icp_index_manager.rebuild_from_db(db):
+            icp_index_manager._publish_locked()
+
+
+if __name__ == "__main__":
+    from app.database.session import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Manage the ICP FAISS index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="Rebuild from the ICPProfile table and publish")
+    jsonl = sub.add_parser("ingest-jsonl", help="Add profiles from a JSONL file and publish")
+    jsonl.add_argument("path")
+    jsonl.add_argument("--persist", action="store_true", help="Also upsert rows into ICPProfile")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    with Session(engine) as session, icp_index_manager.publish_lock():
+        if args.command == "build":
+            total = icp_index_manager.rebuild_from_db(session)
+        else:
+            icp_index_manager.load()
+            total = icp_index_manager.ingest_jsonl(args.path, db=session if args.persist else None)
+        version = icp_index_manager._publish_locked()
+    print(f"Indexed {total} profiles → version {version}")
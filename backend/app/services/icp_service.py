@@ -1,66 +1,252 @@
-from typing import List, Dict
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session as ORMSession, object_session
 from sqlmodel import Session, select
 from app.database.models.icp import ICPProfile
 from app.services.embedding_service import embedding_service
 from app.schemas import ClassificationResponse, ICPResponse, ICPMatch
 
+TOP_K = 3
+# Edits committed elsewhere can carry an updated_at slightly older than the newest
+# one already seen (clock skew, long transactions); re-read this far back
+UPDATE_SLACK = timedelta(seconds=60)
+
+
+class ICPProfileMatrix:
+    """
+    Pre-normalised float32 matrix of ICP profile embeddings.
+
+    Built once from the ICPProfile table; afterwards only profiles touched
+    by an insert/update/delete are re-read and re-encoded on the next match,
+    so per-request cost is a single matrix-vector product. Changes committed
+    in this process are tracked by mapper events (marked on commit, dropped
+    on rollback). Changes made by other workers are noticed by a
+    rate-limited (COUNT, MAX(updated_at)) check of the table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.industries: List[str] = []       # lower-cased for the category bonus
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._row_of: Dict[str, int] = {}
+        self._pending: Set[str] = set()
+        self._industry_masks: Dict[str, np.ndarray] = {}
+        self._db_state: Optional[Tuple[int, Optional[datetime]]] = None  # (row count, newest updated_at)
+        self._last_check = 0.0
+        self.check_interval = 1.0  # seconds between table freshness checks
+
+    # ── Change tracking ────────────────────────────────────────────────────────
+
+    def mark_dirty(self, profile_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._pending.update(profile_ids)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.loaded = False
+            self._pending.clear()
+            self._db_state = None
+
+    # ── Build / incremental refresh ────────────────────────────────────────────
+
+    def ensure_fresh(self, db: Session) -> None:
+        with self._lock:
+            if not self.loaded:
+                self._rebuild(db)
+                return
+            if self._pending:
+                self._apply_pending(db)
+            self._sync_external_changes(db)
+
+    @staticmethod
+    def _table_state(db: Session) -> Tuple[int, Optional[datetime]]:
+        return tuple(db.exec(select(func.count(), func.max(ICPProfile.updated_at)).select_from(ICPProfile)).one())
+
+    def _sync_external_changes(self, db: Session) -> None:
+        """Picks up profiles other processes changed since the last check (at most once per check_interval)."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        state = self._table_state(db)
+        if state == self._db_state:
+            return
+        count, _ = state
+        newest_seen = self._db_state[1] if self._db_state else None
+        query = select(ICPProfile.id)
+        if newest_seen is not None:
+            query = query.where(ICPProfile.updated_at >= newest_seen - UPDATE_SLACK)
+        self._pending.update(db.exec(query).all())
+        self._apply_pending(db)
+        if len(self.ids) != count:
+            # Deletes (and rows written without updated_at) only show up in the id set
+            self._pending.update(set(db.exec(select(ICPProfile.id)).all()).symmetric_difference(self.ids))
+            self._apply_pending(db)
+        self._db_state = state
+
+    def _rebuild(self, db: Session) -> None:
+        # Read the state first: anything committed while the rows load shows up as a change later
+        self._db_state = self._table_state(db)
+        self._last_check = time.monotonic()
+        profiles = db.exec(select(ICPProfile)).all()
+        self.ids = [p.id for p in profiles]
+        self.names = [p.name for p in profiles]
+        self.industries = [p.industry.lower() for p in profiles]
+        self._row_of = {pid: i for i, pid in enumerate(self.ids)}
+        if profiles:
+            self.matrix = embedding_service.encode_batch([p.embedding_text() for p in profiles], normalize=True)
+        else:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._industry_masks.clear()
+        self._pending.clear()
+        self.loaded = True
+
+    def _apply_pending(self, db: Session) -> None:
+        changed = list(self._pending)
+        self._pending.clear()
+        rows = db.exec(select(ICPProfile).where(ICPProfile.id.in_(changed))).all()
+        present = {p.id: p for p in rows}
+
+        removed = {pid for pid in changed if pid not in present and pid in self._row_of}
+        if removed:
+            keep = [i for i, pid in enumerate(self.ids) if pid not in removed]
+            self.ids = [self.ids[i] for i in keep]
+            self.names = [self.names[i] for i in keep]
+            self.industries = [self.industries[i] for i in keep]
+            self.matrix = self.matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+            self._row_of = {pid: i for i, pid in enumerate(self.ids)}
+
+        if present:
+            profiles = list(present.values())
+            vectors = embedding_service.encode_batch([p.embedding_text() for p in profiles], normalize=True)
+            new_rows = []
+            for profile, vector in zip(profiles, vectors):
+                row = self._row_of.get(profile.id)
+                if row is None:
+                    new_rows.append(vector)
+                    self._row_of[profile.id] = len(self.ids)
+                    self.ids.append(profile.id)
+                    self.names.append(profile.name)
+                    self.industries.append(profile.industry.lower())
+                else:
+                    self.matrix[row] = vector
+                    self.names[row] = profile.name
+                    self.industries[row] = profile.industry.lower()
+            if new_rows:
+                stacked = np.vstack(new_rows).astype(np.float32)
+                self.matrix = stacked if self.matrix.size == 0 else np.vstack([self.matrix, stacked])
+
+        self._industry_masks.clear()
+
+    # ── Scoring ────────────────────────────────────────────────────────────────
+
+    def industry_mask(self, category: str) -> np.ndarray:
+        """Boolean mask of profiles whose industry contains `category` (memoised per category)."""
+        key = category.lower()
+        mask = self._industry_masks.get(key)
+        if mask is None:
+            mask = np.fromiter((key in ind for ind in self.industries), dtype=bool, count=len(self.industries))
+            self._industry_masks[key] = mask
+        return mask
+
+    def top_k(self, query: np.ndarray, classification: ClassificationResponse, k: int = TOP_K) -> List[ICPMatch]:
+        with self._lock:
+            if not self.ids:
+                return []
+            # Cosine similarity: rows and query are both unit-length
+            similarity = self.matrix @ query
+            scores = ICPService.weighted_scores(similarity, self.industry_mask(classification.category), classification)
+
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                ICPMatch(
+                    icp_id=self.ids[i],
+                    name=self.names[i],
+                    score=round(float(scores[i]), 4),
+                    likelihood=ICPService.likelihood(float(scores[i])),
+                )
+                for i in top
+            ]
+
+
+icp_matrix = ICPProfileMatrix()
+
+
+# Same pattern as the FAISS index (icp_index_manager): ids are collected per
+# session at flush and reach the matrix only once committed, so a concurrent
+# match never consumes an id before its row is visible.
+@event.listens_for(ICPProfile, "after_insert")
+@event.listens_for(ICPProfile, "after_update")
+@event.listens_for(ICPProfile, "after_delete")
+def _track_icp_change(mapper, connection, target: ICPProfile) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("icp_matrix_changed", set()).add(target.id)
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _mark_committed_icp_changes(session) -> None:
+    changed = session.info.pop("icp_matrix_changed", None)
+    if changed:
+        icp_matrix.mark_dirty(changed)
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _drop_rolled_back_icp_changes(session) -> None:
+    session.info.pop("icp_matrix_changed", None)
+
+
 class ICPService:
+    def __init__(self, matrix: Optional[ICPProfileMatrix] = None):
+        self.matrix = matrix or icp_matrix
+
     async def match_icp(self, db: Session, classification: ClassificationResponse) -> ICPResponse:
-        # Load all ICPs from database
-        statement = select(ICPProfile)
-        icp_profiles = db.exec(statement).all()
-        
+        # First call builds the profile matrix; later calls only re-encode changed profiles
+        await asyncio.to_thread(self.matrix.ensure_fresh, db)
+
         # If no profiles, return empty/mock for MVP
-        if not icp_profiles:
+        if not self.matrix.ids:
             return self._get_empty_response()
 
         # Query text for embedding
         query_text = f"{classification.category} {classification.behavioral_segment} {classification.intent_summary}"
-        query_embedding = embedding_service.get_embeddings(query_text)
-        
-        matches = []
-        for profile in icp_profiles:
-            # For MVP, if profile has no embedding_id, we use its description
-            # In a prod system, embeddings would be pre-calculated
-            profile_text = f"{profile.industry} {profile.size} {profile.description} {profile.pain_points}"
-            profile_embedding = embedding_service.get_embeddings(profile_text)
-            
-            similarity = embedding_service.compute_similarity(query_embedding, profile_embedding)
-            
-            # Weighted scoring logic (as per flow.md concept)
-            # We combine semantic similarity with urgency/category weights
-            weighted_score = self._apply_weighted_scoring(similarity, classification, profile)
-            
-            likelihood = "High" if weighted_score > 0.8 else "Medium" if weighted_score > 0.5 else "Low"
-            
-            matches.append(ICPMatch(
-                icp_id=profile.id,
-                name=profile.name,
-                score=round(weighted_score, 4),
-                likelihood=likelihood
-            ))
-
-        # Sort and take top 3
-        matches.sort(key=lambda x: x.score, reverse=True)
-        top_matches = matches[:3]
-        
+        query_embedding = await embedding_service.aget_embeddings(query_text)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query /= norm
+
+        top_matches = self.matrix.top_k(query, classification)
         return ICPResponse(
             matches=top_matches,
             primary_match=top_matches[0]
         )
 
-    def _apply_weighted_scoring(self, similarity: float, classification: ClassificationResponse, profile: ICPProfile) -> float:
+    @staticmethod
+    def weighted_scores(similarity: np.ndarray, industry_match: np.ndarray, classification: ClassificationResponse) -> np.ndarray:
         # Simplified weighted scoring for MVP
         score = similarity * 0.7  # 70% semantic similarity
-        
+
         # 30% heuristic weights
-        bonus = 0.0
-        if classification.category.lower() in profile.industry.lower():
-            bonus += 0.2
+        bonus = np.where(industry_match, 0.2, 0.0)
         if classification.urgency == "High":
-            bonus += 0.1
-            
-        return min(1.0, score + bonus)
+            bonus = bonus + 0.1
+
+        return np.minimum(1.0, score + bonus)
+
+    @staticmethod
+    def likelihood(score: float) -> str:
+        return "High" if score > 0.8 else "Medium" if score > 0.5 else "Low"
 
     def _get_empty_response(self) -> ICPResponse:
         # Fallback for empty database
@@ -0,0 +1,233 @@
+"""
+llm_cache.py
+Two-tier cache for LLM completions.
+
+Tier 1 is an in-process LRU (OrderedDict) with per-entry TTL.
+Tier 2 is a standalone SQLite file shared by every worker on the host,
+bounded by total payload bytes (least-recently-used rows go first).
+Keys hash the model, messages, temperature and any extra request options,
+so only byte-identical prompts hit.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    def __init__(
+        self,
+        path: str,
+        memory_entries: int = 1024,
+        ttl_seconds: int = 86400,
+        max_bytes: int = 256 * 1024 * 1024,
+        enabled: bool = True,
+    ):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        self.counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "bypassed": 0,
+        }
+
+    # ── Keys ───────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], temperature: Optional[float] = None, **extra: Any) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "extra": extra},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ── Sync API ───────────────────────────────────────────────────────────────
+
+    def get(self, key: str, bypass: bool = False) -> Optional[str]:
+        if not self.enabled:
+            return None
+        if bypass:
+            self.counters["bypassed"] += 1
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            row = self._db().execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+
+            value, expires_at = row
+            if expires_at <= now:
+                self._delete_rows([key])
+                self.counters["misses"] += 1
+                return None
+
+            self._db().execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._db().commit()
+            self._remember(key, value, expires_at)
+            self.counters["disk_hits"] += 1
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._remember(key, value, expires_at)
+            db = self._db()
+            previous = db.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, size, now, expires_at, now),
+            )
+            db.commit()
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            self.counters["stores"] += 1
+            if self._disk_bytes > self.max_bytes:
+                self._evict_disk(now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._db().execute("DELETE FROM llm_cache")
+            self._db().commit()
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            "enabled": self.enabled,
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    # ── Async API (disk tier runs in a worker thread) ──────────────────────────
+
+    async def aget(self, key: str, bypass: bool = False) -> Optional[str]:
+        if not self.enabled:
+            return None
+        if bypass:
+            self.counters["bypassed"] += 1
+            return None
+        # Memory hits are served inline; only fall through to a thread for SQLite
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[0]
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self.set, key, value, ttl_seconds)
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened lazily so importing the module never touches the filesystem
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+            conn.commit()
+            self._disk_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.counters["memory_evictions"] += 1
+
+    def _delete_rows(self, keys: List[str]) -> None:
+        db = self._db()
+        freed = 0
+        for key in keys:
+            row = db.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row:
+                freed += row[0]
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        db.commit()
+        self._disk_bytes -= freed
+
+    def _evict_disk(self, now: float) -> None:
+        """Drops expired rows, then least-recently-used rows down to 90% of max_bytes."""
+        db = self._db()
+        expired = db.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM llm_cache WHERE expires_at <= ?", (now,)).fetchone()
+        db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self._disk_bytes -= expired[0]
+        self.counters["disk_evictions"] += expired[1]
+
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        if self._disk_bytes > target:
+            for key, size in db.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC"):
+                if self._disk_bytes <= target:
+                    break
+                victims.append(key)
+                self._disk_bytes -= size
+        db.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in victims])
+        db.commit()
+        self.counters["disk_evictions"] += len(victims)
+        logger.info("LLM cache evicted %d rows; disk tier now %d bytes", expired[1] + len(victims), self._disk_bytes)
+
+
+llm_cache = LLMCache(
+    path=settings.LLM_CACHE_PATH,
+    memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    enabled=settings.LLM_CACHE_ENABLED,
+)
@@ -0,0 +1,243 @@
+"""
+near_duplicates.py
+MinHash/LSH index of generated campaigns for near-duplicate detection.
+
+Text is lower-cased, cut into words and then into overlapping word
+3-gram shingles. A NUM_PERM-value MinHash signature estimates the Jaccard
+similarity of two shingle sets as the fraction of positions where the
+signatures agree. Each signature is split into BANDS bands of ROWS values.
+Every band is hashed to a bucket and stored in campaign_lsh_bands.
+
+A lookup probes one bucket per band on the primary-key index, then
+compares signatures for the handful of candidates it finds. Its cost
+depends on the number of near matches, not on the number of campaigns.
+With 16 bands of 8 rows, a pair shares a bucket with probability
+1 - (1 - s^8)^16: about 6% at similarity 0.5, 61% at 0.7, 95% at 0.8
+and 99.99% at 0.9.
+
+Two texts are indexed per campaign, in the same transaction as the
+campaign itself:
+  content  headline + body. Used to flag duplicate_of and by
+           GET /dashboard/pipelines/{id}/similar.
+  prompt   A4's prompt context + platform. With DEDUP_MODE=reuse, a
+           request whose prompt nearly repeats an earlier one for the same
+           ICP and platform reuses that campaign's copy instead of making
+           a fresh LLM call.
+
+Index campaigns created before this existed (content only):
+    python -m app.services.near_duplicates rebuild
+"""
+import argparse
+import hashlib
+import logging
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session, delete, select
+
+from app.database.models.campaigns import Campaign
+from app.database.models.near_duplicates import CampaignLSHBand, CampaignSignature
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+MAX_CANDIDATES = 500  # signatures compared per lookup; only hit by pathological buckets
+
+CONTENT = "content"
+PROMPT = "prompt"
+
+# Universal hashing h(x) = (a*x + b) mod p. With x, a, b < 2^31 the product
+# stays below 2^62, so uint64 arithmetic never overflows.
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(0x5EED)  # fixed: stored signatures must stay comparable
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """uint32[NUM_PERM] MinHash of the text's shingles; None for text without words."""
+    items = shingles(text)
+    if not items:
+        return None
+    hashed = np.fromiter((zlib.crc32(s.encode("utf-8")) % _PRIME for s in items), dtype=np.uint64, count=len(items))
+    return ((np.outer(hashed, _A) + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def band_buckets(sig: np.ndarray) -> List[int]:
+    """One signed 64-bit bucket per band (fits BIGINT / SQLite INTEGER)."""
+    return [
+        int.from_bytes(hashlib.blake2b(sig[b * ROWS:(b + 1) * ROWS].tobytes(), digest_size=8).digest(), "big", signed=True)
+        for b in range(BANDS)
+    ]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def content_text(headline: str, body: str) -> str:
+    return f"{headline}\n{body}"
+
+
+def prompt_text(prompt_context: str, platform: str) -> str:
+    return f"{platform}\n{prompt_context}"
+
+
+class NearDuplicateIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"indexed": 0, "lookups": 0, "candidates": 0, "flagged": 0, "reused": 0}
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def add(
+        self,
+        db: Session,
+        campaign_id: int,
+        kind: str,
+        sig: Optional[np.ndarray],
+        icp_id: Optional[str] = None,
+        platform: Optional[str] = None,
+    ) -> None:
+        """Adds the signature and its band buckets to the session; the caller commits."""
+        if sig is None:
+            return
+        db.add(CampaignSignature(campaign_id=campaign_id, kind=kind, icp_id=icp_id, platform=platform, signature=sig.tobytes()))
+        for band, bucket in enumerate(band_buckets(sig)):
+            db.add(CampaignLSHBand(kind=kind, band=band, bucket=bucket, campaign_id=campaign_id))
+        self.count("indexed")
+
+    def find(
+        self,
+        db: Session,
+        kind: str,
+        sig: Optional[np.ndarray],
+        threshold: float,
+        limit: int = 10,
+        icp_id: Optional[str] = None,
+        platform: Optional[str] = None,
+        exclude_id: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """(campaign_id, similarity) at or above threshold, most similar first (newest on ties)."""
+        if sig is None:
+            return []
+        self.count("lookups")
+        buckets = band_buckets(sig)
+        probes = set(enumerate(buckets))
+        hits = db.exec(
+            select(CampaignLSHBand.campaign_id, CampaignLSHBand.band, CampaignLSHBand.bucket)
+            .where(CampaignLSHBand.kind == kind, CampaignLSHBand.bucket.in_(buckets))
+            .limit(MAX_CANDIDATES * BANDS)
+        ).all()
+        candidate_ids = list(dict.fromkeys(
+            cid for cid, band, bucket in hits if (band, bucket) in probes and cid != exclude_id
+        ))[:MAX_CANDIDATES]
+        if not candidate_ids:
+            return []
+        self.count("candidates", len(candidate_ids))
+
+        query = select(CampaignSignature).where(
+            CampaignSignature.kind == kind, CampaignSignature.campaign_id.in_(candidate_ids)
+        )
+        if icp_id is not None:
+            query = query.where(CampaignSignature.icp_id == icp_id)
+        if platform is not None:
+            query = query.where(CampaignSignature.platform == platform)
+        matches = []
+        for row in db.exec(query).all():
+            score = similarity(sig, np.frombuffer(row.signature, dtype=np.uint32))
+            if score >= threshold:
+                matches.append((row.campaign_id, round(score, 4)))
+        matches.sort(key=lambda m: (m[1], m[0]), reverse=True)
+        return matches[:limit]
+
+    def rebuild(self, db: Session, batch: int = 1000) -> int:
+        """
+        Re-indexes the content of every campaign (prompts are not stored, so
+        prompt rows are kept). Runs as one transaction: lookups keep seeing
+        the old index until the new one commits, and a failure leaves it intact.
+        """
+        db.exec(delete(CampaignLSHBand).where(CampaignLSHBand.kind == CONTENT))
+        db.exec(delete(CampaignSignature).where(CampaignSignature.kind == CONTENT))
+        indexed, last_id = 0, 0
+        while True:
+            rows = db.exec(
+                select(Campaign.id, Campaign.headline, Campaign.body, Campaign.icp_id, Campaign.platform)
+                .where(Campaign.id > last_id).order_by(Campaign.id).limit(batch)
+            ).all()
+            if not rows:
+                break
+            signatures, bands = [], []
+            for row in rows:
+                sig = signature(content_text(row.headline, row.body))
+                if sig is None:
+                    continue
+                signatures.append(dict(
+                    campaign_id=row.id, kind=CONTENT, icp_id=row.icp_id, platform=row.platform, signature=sig.tobytes(),
+                ))
+                bands.extend(
+                    dict(kind=CONTENT, band=band, bucket=bucket, campaign_id=row.id)
+                    for band, bucket in enumerate(band_buckets(sig))
+                )
+            # Core executemany: the ORM unit of work is far too slow for a full backfill
+            if signatures:
+                db.connection().execute(CampaignSignature.__table__.insert(), signatures)
+                db.connection().execute(CampaignLSHBand.__table__.insert(), bands)
+            indexed += len(rows)
+            last_id = rows[-1].id
+        db.commit()
+        logger.info("Indexed %d campaigns for near-duplicate detection", indexed)
+        return indexed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+
+near_duplicates = NearDuplicateIndex()
+
+
+def find_similar_campaigns(
+    db: Session, campaign: Campaign, threshold: float, limit: int = 10, same_icp: bool = False,
+) -> List[Tuple[int, float]]:
+    """Near-duplicates of an existing campaign's copy (signed on the fly if it predates the index)."""
+    stored = db.get(CampaignSignature, (campaign.id, CONTENT))
+    sig = (
+        np.frombuffer(stored.signature, dtype=np.uint32) if stored is not None
+        else signature(content_text(campaign.headline, campaign.body))
+    )
+    return near_duplicates.find(
+        db, CONTENT, sig, threshold, limit,
+        icp_id=campaign.icp_id if same_icp else None,
+        exclude_id=campaign.id,
+    )
+
+
+if __name__ == "__main__":
+    import app.database.models.base  # noqa: F401 — tables referenced by foreign keys
+    from app.database.session import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Near-duplicate index maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="Index the copy of every campaign")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    with Session(engine) as session:
+        print(near_duplicates.rebuild(session))
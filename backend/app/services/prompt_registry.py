@@ -0,0 +1,300 @@
+"""
+prompt_registry.py
+Versioned, precompiled prompt templates with per-template token budgets.
+
+Every LLM prompt in the app is registered here under a name
+("classification", "content.sms", ...) and an integer version. Each
+template holds an optional system prompt and a user message containing
+`{context}` exactly once. Registration splits the user message around the
+placeholder and counts the tokens of the fixed text once. Rendering is then
+string concatenation plus one token count of the context. Caller text is
+never run through str.format, so braces in a brief are safe.
+
+Each template carries its own budget:
+  max_input_tokens  cap on the whole prompt. The context is truncated
+                    (with a trailing …) to whatever the fixed text leaves.
+  max_tokens        completion cap sent with the request. It keeps an SMS
+                    from running as long as an email. Prompt and
+                    completion length drive both latency and cost.
+
+Tokens are counted with tiktoken (settings.PROMPT_TOKEN_ENCODING) when it
+is installed. Otherwise a deliberately high estimate of one token per
+three characters is used. OpenRouter models use their own tokenizers, so
+either way the count is an estimate and budgets leave some headroom.
+
+Registering a template with a higher version makes it the one
+`render()` uses. Older versions stay available through `version=`, and
+the rendered prompt carries the version for logging. Prompt text and
+max_tokens are part of the LLM cache key, so a new version never serves
+completions made for an old one.
+"""
+import functools
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = "{context}"
+MESSAGE_OVERHEAD_TOKENS = 4  # role/separator tokens the chat format adds per message
+CHARS_PER_TOKEN = 3          # fallback estimate; English averages ~4, so this over-counts
+ELLIPSIS = "…"
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    version: int
+    user: str                               # must contain {context} exactly once
+    system: Optional[str] = None
+    max_input_tokens: Optional[int] = None  # system + user, including context
+    max_tokens: Optional[int] = None        # completion cap
+    temperature: Optional[float] = None     # default when the caller passes none
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    name: str
+    version: int
+    messages: List[Dict[str, str]]
+    max_tokens: Optional[int]
+    temperature: Optional[float]
+    input_tokens: int
+    truncated: bool
+
+
+@dataclass(frozen=True)
+class _Compiled:
+    template: PromptTemplate
+    prefix: str
+    suffix: str
+    fixed_tokens: int
+
+
+# ── Token counting ────────────────────────────────────────────────────────────
+
+@functools.lru_cache(maxsize=None)
+def _encoding(name: str):
+    try:
+        import tiktoken
+    except ImportError:  # optional: fall back to a character estimate
+        logger.info("tiktoken not installed; prompt token counts are estimated from length")
+        return None
+    return tiktoken.get_encoding(name)
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding(settings.PROMPT_TOKEN_ENCODING)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, limit: int) -> Tuple[str, bool]:
+    """Cuts text to at most `limit` tokens (ending in …); returns (text, truncated)."""
+    if count_tokens(text) <= limit:
+        return text, False
+    if limit <= 1:
+        return "", True
+    encoding = _encoding(settings.PROMPT_TOKEN_ENCODING)
+    if encoding is None:
+        cut = text[:(limit - 1) * CHARS_PER_TOKEN]
+        space = cut.rfind(" ")
+        if space > len(cut) // 2:  # prefer a word boundary unless it throws away too much
+            cut = cut[:space]
+        return cut.rstrip() + ELLIPSIS, True
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode(tokens[:limit - 1]).rstrip() + ELLIPSIS, True
+
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+class PromptRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates: Dict[str, Dict[int, _Compiled]] = {}
+        self.counters: Dict[str, int] = {"renders": 0, "truncated": 0}
+
+    def register(self, template: PromptTemplate) -> None:
+        if template.user.count(PLACEHOLDER) != 1:
+            raise ValueError(f"Prompt '{template.name}' v{template.version} needs {PLACEHOLDER} exactly once")
+        prefix, suffix = template.user.split(PLACEHOLDER)
+        messages = 2 if template.system is not None else 1
+        fixed = (
+            count_tokens(template.system or "") + count_tokens(prefix) + count_tokens(suffix)
+            + messages * MESSAGE_OVERHEAD_TOKENS
+        )
+        if template.max_input_tokens is not None and fixed >= template.max_input_tokens:
+            raise ValueError(
+                f"Prompt '{template.name}' v{template.version} uses {fixed} tokens before any context; "
+                f"budget is {template.max_input_tokens}"
+            )
+        with self._lock:
+            self._templates.setdefault(template.name, {})[template.version] = _Compiled(template, prefix, suffix, fixed)
+
+    def has(self, name: str) -> bool:
+        return name in self._templates
+
+    def versions(self, name: str) -> List[int]:
+        return sorted(self._templates.get(name, {}))
+
+    def get(self, name: str, version: Optional[int] = None) -> PromptTemplate:
+        return self._compiled(name, version).template
+
+    def _compiled(self, name: str, version: Optional[int]) -> _Compiled:
+        versions = self._templates.get(name)
+        if not versions:
+            raise KeyError(f"Unknown prompt '{name}'")
+        if version is None:
+            version = max(versions)
+        if version not in versions:
+            raise KeyError(f"Prompt '{name}' has no version {version}; registered: {sorted(versions)}")
+        return versions[version]
+
+    def render(self, name: str, context: str, version: Optional[int] = None) -> RenderedPrompt:
+        compiled = self._compiled(name, version)
+        template = compiled.template
+        enforce = settings.PROMPT_BUDGETS_ENABLED
+
+        truncated = False
+        if enforce and template.max_input_tokens is not None:
+            original = count_tokens(context)
+            context, truncated = truncate_tokens(context, template.max_input_tokens - compiled.fixed_tokens)
+            if truncated:
+                logger.info(
+                    "Prompt %s v%d: context cut from %d to %d tokens",
+                    name, template.version, original, template.max_input_tokens - compiled.fixed_tokens,
+                )
+
+        messages = []
+        if template.system is not None:
+            messages.append({"role": "system", "content": template.system})
+        messages.append({"role": "user", "content": compiled.prefix + context + compiled.suffix})
+
+        with self._lock:
+            self.counters["renders"] += 1
+            self.counters["truncated"] += int(truncated)
+        return RenderedPrompt(
+            name=name,
+            version=template.version,
+            messages=messages,
+            max_tokens=template.max_tokens if enforce else None,
+            temperature=template.temperature,
+            input_tokens=compiled.fixed_tokens + count_tokens(context),
+            truncated=truncated,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, "templates": sum(len(v) for v in self._templates.values())}
+
+
+prompt_registry = PromptRegistry()
+
+
+# ── Templates ─────────────────────────────────────────────────────────────────
+
+CLASSIFICATION_SYSTEM = """\
+You are a highly sophisticated Classification Agent in a Multi-Agent Outreach System.
+Your task is to analyze user context and classify it into structured data for downstream agents.
+
+Analyze the intent, audience, and urgency to provide precise categories.
+
+Fields:
+- task_type: The primary action (e.g., 'Initial Outreach', 'Follow-up', 'Nudge', 'Announcement', 'Support')
+- urgency: High, Medium, or Low based on the timeline and tone.
+- category: Industry or product vertical (e.g., 'SaaS', 'Fintech', 'LegalTech', 'DevTools', 'HRTech')
+- behavioral_segment: Persona traits or stage (e.g., 'Decision Maker', 'Technical Evaluator', 'Early Adopter')
+- intent_summary: A 1-sentence summary of the core value proposition or request.
+
+Return ONLY valid JSON."""
+
+CLASSIFICATION_INTENT_USER = """\
+Analyze the following user context and classify it into a structured JSON format.
+
+Context: {context}
+
+Return ONLY valid JSON with these keys:
+- task_type (e.g., outreach, support, inquiry)
+- urgency (High, Medium, Low)
+- category (e.g., tech, finance, health)
+- behavioral_segment (e.g., early_adopter, skeptic)
+- intent_summary (A brief summary of what the user wants)
+- confidence_score (A float between 0.0 and 1.0 representing your certainty)"""
+
+CONTENT_SYSTEM = (
+    "You are a world-class copywriter and sales strategist. Your goal is to produce high-conversion content. "
+    "Return ONLY valid JSON matching the requested structure."
+)
+
+CONTENT_INSTRUCTION = (
+    "Generate highly engaging outreach content based on the following context. "
+    "Return JSON with keys: 'headline', 'body', 'cta'."
+)
+
+# platform: (style lines, max_input_tokens, max_tokens, default temperature)
+CONTENT_PLATFORMS = {
+    "linkedin": (
+        "Style: Professional yet social. Use a hook in the headline.\n"
+        "The body should be readable with bullet points if necessary.\n"
+        "CTA should be conversational (e.g., 'Worth a quick chat?').",
+        800, 450, 0.85,
+    ),
+    "email": (
+        "Style: Direct, personalized, and value-driven.\n"
+        "Headline = Subject Line.\n"
+        "Body = Professional email structure with clear benefit-led sentences.\n"
+        "CTA = Specific request for time.",
+        800, 500, 0.7,
+    ),
+    "sms": (
+        "Style: Extremely concise, urgent, and informal.\n"
+        "Headline = Short intro.\n"
+        "Body = 1-2 sentences max.\n"
+        "CTA = Quick reply action.",
+        400, 160, 0.4,
+    ),
+    "call": (
+        "Style: This is a PHONE SCRIPT.\n"
+        "Headline = The opening hook.\n"
+        "Body = The main pitch script including how to handle a common objection.\n"
+        "CTA = The specific ask at the end of the call.",
+        800, 700, 0.5,
+    ),
+}
+
+
+def content_prompt_name(platform: str) -> str:
+    """Registry name of A4's prompt for a platform; unknown platforms get content.default."""
+    name = f"content.{platform.lower()}"
+    return name if prompt_registry.has(name) else "content.default"
+
+
+def _register_builtin() -> None:
+    prompt_registry.register(PromptTemplate(
+        name="classification", version=1, system=CLASSIFICATION_SYSTEM, user=PLACEHOLDER,
+        max_input_tokens=2000, max_tokens=300,
+    ))
+    prompt_registry.register(PromptTemplate(
+        name="classification.intent", version=1, user=CLASSIFICATION_INTENT_USER,
+        max_input_tokens=2000, max_tokens=300,
+    ))
+    for platform, (style, max_input, max_output, temperature) in CONTENT_PLATFORMS.items():
+        prompt_registry.register(PromptTemplate(
+            name=f"content.{platform}", version=1, system=CONTENT_SYSTEM,
+            user=f"{CONTENT_INSTRUCTION}\n{style}\nContext: {PLACEHOLDER}",
+            max_input_tokens=max_input, max_tokens=max_output, temperature=temperature,
+        ))
+    prompt_registry.register(PromptTemplate(
+        name="content.default", version=1, system=CONTENT_SYSTEM,
+        user=f"{CONTENT_INSTRUCTION} Context: {PLACEHOLDER}",
+        max_input_tokens=800, max_tokens=500, temperature=0.7,
+    ))
+
+
+_register_builtin()
@@ -0,0 +1,95 @@
+"""
+rollups.py
+Counters for /dashboard/stats, maintained on write instead of counted on read.
+
+Writers call `increment(db, name)` inside the same transaction as the row
+they insert, so a counter can never drift from a committed write. The
+increment is an atomic upsert (value = value + delta), so concurrent
+workers do not lose updates. Reading the stats is then a scan of a
+handful of counter rows, whatever the size of campaigns/exports.
+
+Counters:
+  campaigns            rows in campaigns
+  exports:<channel>    rows in exports per channel
+  _built               marker set by rebuild()
+
+Rebuild from scratch (also runs once at startup if the marker is missing):
+    python -m app.services.rollups rebuild
+"""
+import argparse
+import logging
+from typing import Dict
+
+from sqlmodel import Session, delete, func, select
+
+from app.database.models.campaigns import Campaign
+from app.database.models.exports import Export
+from app.database.models.rollups import StatCounter
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGNS = "campaigns"
+EXPORTS_PREFIX = "exports:"
+BUILT_MARKER = "_built"
+
+
+def export_counter(channel: str) -> str:
+    return f"{EXPORTS_PREFIX}{channel}"
+
+
+def insert_for(db: Session):
+    """The dialect's insert() construct, which has on_conflict_do_update (SQLite and Postgres)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def increment(db: Session, name: str, delta: int = 1) -> None:
+    """Adds delta to a counter in the caller's transaction (the caller commits)."""
+    insert = insert_for(db)
+    stmt = insert(StatCounter).values(name=name, value=delta)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"value": StatCounter.value + stmt.excluded.value},
+    ))
+
+
+def read_counters(db: Session) -> Dict[str, int]:
+    return {row.name: row.value for row in db.exec(select(StatCounter)).all()}
+
+
+def rebuild(db: Session) -> Dict[str, int]:
+    """Recounts every rollup from the source tables in one transaction."""
+    counters = {CAMPAIGNS: db.exec(select(func.count()).select_from(Campaign)).one()}
+    for channel, count in db.exec(select(Export.channel, func.count()).group_by(Export.channel)).all():
+        counters[export_counter(channel)] = count
+    counters[BUILT_MARKER] = 1
+
+    db.execute(delete(StatCounter))
+    db.add_all([StatCounter(name=name, value=value) for name, value in counters.items()])
+    db.commit()
+    logger.info("Rebuilt dashboard rollups: %s", counters)
+    return counters
+
+
+def ensure_rollups(db: Session) -> None:
+    """Startup hook: backfill once for databases that predate the rollup table."""
+    if db.get(StatCounter, BUILT_MARKER) is None:
+        rebuild(db)
+
+
+if __name__ == "__main__":
+    import app.database.models.base  # noqa: F401 — tables referenced by foreign keys
+    from app.database.session import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Dashboard rollup maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="Recount all rollups from campaigns/exports")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    with Session(engine) as session:
+        print(rebuild(session))
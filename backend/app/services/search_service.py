@@ -0,0 +1,264 @@
+"""
+search_service.py
+Full-text search over campaigns and audit_logs, backed by SQLite FTS5.
+
+Each source table gets an external-content FTS5 index (campaigns_fts,
+audit_logs_fts). The index stores only the inverted index; the text stays
+in the base table. Triggers on the base table keep it in sync on every
+insert, update and delete, so every write path is covered without
+changes: the ORM, the audit writer's executemany, and the archive job's
+deletes. An index that is missing at startup is created and rebuilt from
+the base table once.
+
+A search is one MATCH over the index, ranked by weighted bm25 and capped
+by LIMIT, then joined to the base rows by rowid:
+  - channel and icp_id are indexed FTS columns too, so those filters
+    intersect posting lists inside FTS5 rather than filtering afterwards;
+  - date bounds are turned into the MIN(id)/MAX(id) of the rows in that
+    range, read from the time index alone. FTS5 applies them while
+    scanning. The bounds are safe even when ids and timestamps disagree
+    (backfilled or re-timestamped rows), since every row in the range lies
+    between them, and an empty range returns without touching the index;
+  - the base-row join re-checks every filter exactly.
+
+Archived audit months (app.services.audit_archive) leave the index with
+their rows.
+
+    python -m app.services.search_service rebuild
+"""
+import argparse
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Float, Integer, String, bindparam, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER = "porter unicode61"
+FILTER_COLUMNS = ("channel", "icp_id")
+SNIPPET_TOKENS = 12
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    table: str
+    fts: str
+    time_column: str
+    title_column: str
+    text_columns: Tuple[str, ...]
+    weights: Tuple[float, ...]    # bm25 weight per text column; filter columns get 0
+
+
+SOURCES: Dict[str, SearchSource] = {
+    "campaigns": SearchSource(
+        table="campaigns", fts="campaigns_fts", time_column="created_at", title_column="headline",
+        text_columns=("intent", "headline", "body", "cta"), weights=(2.0, 3.0, 1.0, 0.5),
+    ),
+    "audit": SearchSource(
+        table="audit_logs", fts="audit_logs_fts", time_column="timestamp", title_column="action",
+        text_columns=("input_text", "output_text"), weights=(1.0, 1.0),
+    ),
+}
+
+
+class SearchUnavailable(RuntimeError):
+    pass
+
+
+# ── Index maintenance ─────────────────────────────────────────────────────────
+
+def _index_columns(source: SearchSource) -> Tuple[str, ...]:
+    return source.text_columns + FILTER_COLUMNS
+
+
+def _ddl(source: SearchSource) -> List[str]:
+    cols = ", ".join(_index_columns(source))
+    new = ", ".join(f"new.{c}" for c in _index_columns(source))
+    old = ", ".join(f"old.{c}" for c in _index_columns(source))
+    insert_new = f"INSERT INTO {source.fts}(rowid, {cols}) VALUES (new.id, {new});"
+    delete_old = f"INSERT INTO {source.fts}({source.fts}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {source.fts} USING fts5("
+        f"{cols}, content='{source.table}', content_rowid='id', tokenize='{TOKENIZER}')",
+        f"CREATE TRIGGER IF NOT EXISTS {source.fts}_ai AFTER INSERT ON {source.table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {source.fts}_ad AFTER DELETE ON {source.table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {source.fts}_au AFTER UPDATE OF {cols} ON {source.table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def search_available(engine: Engine) -> bool:
+    return engine.dialect.name == "sqlite"
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Creates missing FTS tables and triggers; a newly created index is rebuilt from its table."""
+    if not search_available(engine):
+        logger.info("Full-text search disabled: FTS5 needs SQLite, DATABASE_URL is %s", engine.dialect.name)
+        return
+    with engine.begin() as conn:
+        for source in SOURCES.values():
+            existed = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (source.fts,)
+            ).first()
+            for statement in _ddl(source):
+                conn.exec_driver_sql(statement)
+            if not existed:
+                _rebuild(conn, source)
+
+
+def _rebuild(conn: Connection, source: SearchSource) -> None:
+    conn.exec_driver_sql(f"INSERT INTO {source.fts}({source.fts}) VALUES ('rebuild')")
+    logger.info("Built full-text index %s", source.fts)
+
+
+def rebuild_search_index(engine: Engine) -> None:
+    if not search_available(engine):
+        raise SearchUnavailable("Full-text search needs SQLite (FTS5)")
+    ensure_search_index(engine)
+    with engine.begin() as conn:
+        for source in SOURCES.values():
+            _rebuild(conn, source)
+            conn.exec_driver_sql(f"INSERT INTO {source.fts}({source.fts}) VALUES ('optimize')")
+
+
+# ── Query building ────────────────────────────────────────────────────────────
+
+def _phrase(value: str) -> str:
+    return '"' + value.replace('"', " ") + '"'
+
+
+def to_fts_query(query: str) -> str:
+    """
+    Free text → FTS5 expression: every word must match (AND), "quoted
+    phrases" stay phrases and a trailing * makes a prefix search. FTS5
+    operators typed by the user are treated as plain words.
+    """
+    terms = []
+    for part in re.findall(r'"[^"]*"|\S+', query):
+        if part.startswith('"'):
+            words = re.findall(r"\w+", part)
+            if words:
+                terms.append(_phrase(" ".join(words)))
+            continue
+        words = re.findall(r"\w+", part)
+        terms.extend(_phrase(w) for w in words)
+        if words and part.endswith("*"):
+            terms[-1] += "*"
+    if not terms:
+        raise ValueError("Search query has no searchable words")
+    return " ".join(terms)
+
+
+def _row_bounds(
+    conn: Connection, source: SearchSource, start: Optional[datetime], end: Optional[datetime],
+) -> Tuple[Optional[int], Optional[int]]:
+    """(MIN(id), MAX(id)) of the rows in [start, end); (None, None) when there are none."""
+    where, params = [], {}
+    if start is not None:
+        where.append(f"{source.time_column} >= :start")
+        params["start"] = start
+    if end is not None:
+        where.append(f"{source.time_column} < :end")
+        params["end"] = end
+    stmt = text(f"SELECT MIN(id), MAX(id) FROM {source.table} WHERE {' AND '.join(where)}")
+    stmt = stmt.bindparams(*(bindparam(name, type_=DateTime) for name in params))
+    return tuple(conn.execute(stmt, params).one())
+
+
+# ── Search ────────────────────────────────────────────────────────────────────
+
+def search(
+    engine: Engine,
+    query: str,
+    scope: str = "campaigns",
+    channel: Optional[str] = None,
+    icp_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """Best matches first (bm25); each hit has a highlighted snippet from its best-matching column."""
+    if not search_available(engine):
+        raise SearchUnavailable("Full-text search needs SQLite (FTS5)")
+    source = SOURCES.get(scope)
+    if source is None:
+        raise ValueError(f"Unknown search scope '{scope}'; expected one of {sorted(SOURCES)}")
+
+    text_cols = " ".join(source.text_columns)
+    match = f"{{{text_cols}}} : ({to_fts_query(query)})"
+    where = [f"{source.fts} MATCH :match"]
+    params: Dict[str, Any] = {"limit": limit}
+    for column, value in (("channel", channel), ("icp_id", icp_id)):
+        if value:
+            if re.search(r"\w", value):
+                match += f" AND {column} : {_phrase(value)}"
+            where.append(f"lower(t.{column}) = lower(:{column})")
+            params[column] = value
+    params["match"] = match
+
+    weights = ", ".join(str(w) for w in source.weights + (0.0,) * len(FILTER_COLUMNS))
+    snippets = ", ".join(
+        f"snippet({source.fts}, {i}, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) AS snippet_{i}"
+        for i in range(len(source.text_columns))
+    )
+
+    with engine.connect() as conn:
+        if start is not None or end is not None:
+            low, high = _row_bounds(conn, source, start, end)
+            if low is None:
+                return []
+            where += [f"{source.fts}.rowid >= :low", f"{source.fts}.rowid <= :high"]
+            params.update(low=low, high=high)
+        if start is not None:
+            where.append(f"t.{source.time_column} >= :start")
+            params["start"] = start
+        if end is not None:
+            where.append(f"t.{source.time_column} < :end")
+            params["end"] = end
+
+        stmt = text(
+            f"SELECT t.id AS id, t.{source.time_column} AS timestamp, t.channel AS channel, "
+            f"t.icp_id AS icp_id, t.{source.title_column} AS title, "
+            f"bm25({source.fts}, {weights}) AS score, {snippets} "
+            f"FROM {source.fts} JOIN {source.table} AS t ON t.id = {source.fts}.rowid "
+            f"WHERE {' AND '.join(where)} ORDER BY score LIMIT :limit"
+        )
+        stmt = stmt.bindparams(*(bindparam(name, type_=DateTime) for name in ("start", "end") if name in params))
+        stmt = stmt.columns(id=Integer, timestamp=DateTime, channel=String, icp_id=String, title=String, score=Float)
+        rows = conn.execute(stmt, params).mappings().all()
+
+    hits = []
+    for row in rows:
+        candidates = [row[f"snippet_{i}"] for i in range(len(source.text_columns))]
+        snippet = next((s for s in candidates if s and "<mark>" in s), candidates[0] or "")
+        hits.append({
+            "id": row["id"],
+            "source": scope,
+            "timestamp": row["timestamp"],
+            "channel": row["channel"] or "",
+            "icp_id": row["icp_id"] or "",
+            "title": row["title"] or "",
+            "snippet": snippet,
+            "score": round(-row["score"], 4),  # bm25() is lower-is-better; flip so higher = more relevant
+        })
+    return hits
+
+
+if __name__ == "__main__":
+    import app.database.models.base  # noqa: F401 — tables referenced by foreign keys
+    import app.database.models.campaigns  # noqa: F401
+    from app.database.session import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Full-text search index maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="Rebuild and optimize the FTS5 indexes from campaigns/audit_logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    rebuild_search_index(engine)
@@ -0,0 +1,104 @@
+"""
+semantic_cache.py
+Near-duplicate cache for A1 classification.
+
+Past contexts are kept as L2-normalised MiniLM vectors in a fixed-size
+float32 matrix (oldest entries are overwritten once full). A lookup is one
+matrix-vector product; if the best cosine similarity clears
+settings.SEMANTIC_CACHE_THRESHOLD the stored ClassificationOutput is reused.
+The threshold is read on every lookup so it can be tuned at runtime via
+PATCH /api/v1/settings.
+"""
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas.agent_schemas import ClassificationOutput
+
+# Misses whose best score lands within this margin under the threshold are
+# counted separately: they are the ones a lower threshold would convert.
+NEAR_MISS_MARGIN = 0.05
+
+
+class SemanticClassificationCache:
+    def __init__(self, max_entries: int = 5000, dimension: int = 384):
+        self.max_entries = max_entries
+        self.dimension = dimension
+        self._vectors = np.zeros((max_entries, dimension), dtype=np.float32)
+        self._outputs: List[Optional[ClassificationOutput]] = [None] * max_entries
+        self._count = 0
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Any] = {
+            "hits": 0,
+            "misses": 0,
+            "near_misses": 0,
+            "stores": 0,
+        }
+        self._hit_similarity_total = 0.0
+
+    @property
+    def threshold(self) -> float:
+        return settings.SEMANTIC_CACHE_THRESHOLD
+
+    @staticmethod
+    def _normalise(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def lookup(self, vector: List[float]) -> Optional[ClassificationOutput]:
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+        query = self._normalise(vector)
+        threshold = self.threshold
+        with self._lock:
+            if self._count == 0:
+                self.counters["misses"] += 1
+                return None
+            sims = self._vectors[: self._count] @ query
+            best = int(np.argmax(sims))
+            score = float(sims[best])
+            if score >= threshold:
+                self.counters["hits"] += 1
+                self._hit_similarity_total += score
+                return self._outputs[best]
+            self.counters["misses"] += 1
+            if score >= threshold - NEAR_MISS_MARGIN:
+                self.counters["near_misses"] += 1
+            return None
+
+    def store(self, vector: List[float], output: ClassificationOutput) -> None:
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return
+        with self._lock:
+            slot = self._cursor
+            self._vectors[slot] = self._normalise(vector)
+            self._outputs[slot] = output
+            self._cursor = (slot + 1) % self.max_entries
+            self._count = min(self._count + 1, self.max_entries)
+            self.counters["stores"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._count = 0
+            self._cursor = 0
+            self._outputs = [None] * self.max_entries
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.counters["hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            "enabled": settings.SEMANTIC_CACHE_ENABLED,
+            "threshold": self.threshold,
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "avg_hit_similarity": round(self._hit_similarity_total / hits, 4) if hits else 0.0,
+            "entries": self._count,
+            "capacity": self.max_entries,
+        }
+
+
+semantic_cache = SemanticClassificationCache(max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES)
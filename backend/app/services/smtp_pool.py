@@ -0,0 +1,233 @@
+"""
+smtp_pool.py
+Reusable, authenticated SMTP connections for email exports.
+
+Connections are opened on demand (EHLO, STARTTLS on 587, login) up to
+`size` at a time and handed back to a LIFO idle stack after each send, so
+the handshake is paid once per connection rather than once per message.
+Before reuse, a connection that has been idle longer than
+`idle_check_seconds` is checked with NOOP. Connections are recycled after
+`max_messages` sends (providers cap messages per session). A send that hits
+SMTPServerDisconnected before the DATA command is retried once on a fresh
+connection. After DATA, the server may already have accepted the message,
+so the error is raised and the retry is left to the export outbox, which
+holds the idempotency key.
+
+Everything here is blocking smtplib; async callers go through
+asyncio.to_thread. AsyncRateLimiter spaces sends per provider on the event
+loop side.
+"""
+import asyncio
+import logging
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _TrackedSMTP(smtplib.SMTP):
+    """Notes whether the current transaction got as far as DATA."""
+
+    data_sent = False
+
+    def mail(self, *args, **kwargs):
+        self.data_sent = False
+        return super().mail(*args, **kwargs)
+
+    def data(self, msg):
+        self.data_sent = True
+        return super().data(msg)
+
+
+@dataclass
+class _PooledConnection:
+    smtp: _TrackedSMTP
+    last_used: float = field(default_factory=time.monotonic)
+    sent: int = 0
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 4,
+        timeout: float = 10.0,
+        idle_check_seconds: float = 30.0,
+        max_messages: int = 100,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.timeout = timeout
+        self.idle_check_seconds = idle_check_seconds
+        self.max_messages = max_messages
+
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.counters: Dict[str, int] = {"connects": 0, "reuses": 0, "sent": 0, "reconnects": 0, "discarded": 0}
+
+    @property
+    def config(self) -> tuple:
+        return (self.host, self.port, self.username, self.password)
+
+    # ── Connections ────────────────────────────────────────────────────────────
+
+    def _connect(self) -> _PooledConnection:
+        smtp = _TrackedSMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.port == 587:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        self.counters["connects"] += 1
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _healthy(self, conn: _PooledConnection) -> bool:
+        if time.monotonic() - conn.last_used < self.idle_check_seconds:
+            return True
+        try:
+            return conn.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._healthy(conn):
+                self.counters["reuses"] += 1
+                return conn
+            self._discard(conn)
+
+    def _discard(self, conn: _PooledConnection) -> None:
+        self.counters["discarded"] += 1
+        self._close(conn.smtp)
+
+    @contextmanager
+    def connection(self) -> Iterator[_PooledConnection]:
+        """Borrows a live connection; it is returned on success and dropped on error."""
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn
+            except BaseException:
+                self._discard(conn)
+                raise
+            conn.last_used = time.monotonic()
+            if conn.sent >= self.max_messages:
+                self._discard(conn)
+            else:
+                self._idle.put(conn)
+
+    # ── Sending ────────────────────────────────────────────────────────────────
+
+    def send(self, from_addr: str, to_addrs: List[str], message: str) -> None:
+        for attempt in (1, 2):
+            conn = None
+            try:
+                with self.connection() as conn:
+                    conn.smtp.sendmail(from_addr, to_addrs, message)
+                    conn.sent += 1
+                self.counters["sent"] += 1
+                return
+            except smtplib.SMTPServerDisconnected:
+                # A pooled connection dropped between sends is retried once on a fresh one. Once
+                # DATA went out the message may have been accepted, and resending could duplicate it
+                if attempt == 2 or (conn is not None and conn.smtp.data_sent):
+                    raise
+                self.counters["reconnects"] += 1
+                logger.info("SMTP connection to %s dropped; reconnecting", self.host)
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn.smtp)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "idle": self._idle.qsize(), "size": self.size}
+
+
+class AsyncRateLimiter:
+    """Spaces acquisitions at least 1/rate seconds apart (rate <= 0 disables it)."""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next = 0.0
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        # Single event loop thread: reserving the slot needs no lock
+        now = time.monotonic()
+        slot = max(self._next, now)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+_rate_limiters: Dict[str, AsyncRateLimiter] = {}
+
+
+def provider_rate_limiter(host: str) -> AsyncRateLimiter:
+    """One limiter per SMTP provider host, shared by every batch in this process."""
+    limiter = _rate_limiters.get(host)
+    if limiter is None:
+        limiter = _rate_limiters[host] = AsyncRateLimiter(settings.SMTP_RATE_LIMIT_PER_SECOND)
+    return limiter
+
+
+_pool: Optional[SMTPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Pool for the current SMTP settings; rebuilt when they change via PATCH /settings."""
+    global _pool
+    config = (settings.SMTP_HOST, int(settings.SMTP_PORT), settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+    with _pool_lock:
+        if _pool is None or _pool.config != config:
+            if _pool is not None:
+                _pool.close()
+            _pool = SMTPConnectionPool(
+                *config,
+                size=settings.SMTP_POOL_SIZE,
+                timeout=settings.SMTP_TIMEOUT,
+                idle_check_seconds=settings.SMTP_POOL_IDLE_CHECK_SECONDS,
+                max_messages=settings.SMTP_POOL_MAX_MESSAGES,
+            )
+        return _pool
+
+
+def close_smtp_pool() -> None:
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
@@ -0,0 +1,269 @@
+"""
+webhook_client.py
+Batched, pooled delivery of LinkedIn exports to LINKEDIN_WEBHOOK_URL.
+
+Callers await `submit(url, item)`. Items for the same URL collect until
+`max_batch_size` are waiting or `max_wait_ms` has passed since the first,
+then go out as one POST with a JSON-array body over a shared keep-alive
+httpx connection pool. At most `max_concurrency` POSTs are in flight.
+
+429 and 5xx responses (and transport errors) are retried up to
+`max_retries` times. The delay is the server's Retry-After when given
+(seconds or HTTP-date, capped at `max_retry_after`); otherwise it is
+exponential backoff. All attempts of one batch, waits included, share a
+`retry_budget` of seconds: a retry that would not fit is not made, and
+the last attempt's timeout is cut to what is left. The budget is kept
+below the export lease, so a batch gives up before its exports could be
+reclaimed and posted a second time. Other 4xx fail the batch straight
+away. A failed batch raises WebhookDeliveryError in every caller, and the
+export outbox then schedules its own retry.
+
+Local stand-in receiver for manual testing:
+    python -m app.services.webhook_client --port 9009 --fail-rate 0.2
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class WebhookDeliveryError(Exception):
+    pass
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class WebhookBatchClient:
+    def __init__(
+        self,
+        max_batch_size: int = 50,
+        max_wait_ms: float = 50.0,
+        max_concurrency: int = 4,
+        max_retries: int = 4,
+        timeout: float = 10.0,
+        max_connections: int = 10,
+        backoff_base: float = 0.5,
+        max_retry_after: float = 60.0,
+        retry_budget: float = 60.0,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.backoff_base = backoff_base
+        self.max_retry_after = max_retry_after
+        self.retry_budget = retry_budget
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[str, List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._inflight: set = set()  # strong refs so running batches aren't GC'd
+        self.stats: Dict[str, int] = {"batches": 0, "items": 0, "retries": 0, "failed_batches": 0}
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        # httpx/asyncio objects belong to one loop; rebind if the app runs a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = {}
+            self._timers = {}
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return loop
+
+    async def submit(self, url: str, item: Dict[str, Any]) -> None:
+        loop = self._bind_loop()
+        future: asyncio.Future = loop.create_future()
+        pending = self._pending.setdefault(url, [])
+        pending.append((item, future))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(url)
+        elif url not in self._timers:
+            self._timers[url] = loop.call_later(self.max_wait, self._flush, url)
+        await future
+
+    def _flush(self, url: str) -> None:
+        timer = self._timers.pop(url, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(url, [])
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(url, batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, url: str, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        keys = "|".join(str(item.get("idempotency_key", "")) for item in items)
+        headers = {"Idempotency-Key": hashlib.sha256(keys.encode("utf-8")).hexdigest()}
+        try:
+            async with self._semaphore:
+                await self._post(url, items, headers)
+        except Exception as exc:
+            self.stats["failed_batches"] += 1
+            logger.warning("Webhook batch of %d to %s failed: %s", len(items), url, exc)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc if isinstance(exc, WebhookDeliveryError) else WebhookDeliveryError(str(exc)))
+            return
+
+        self.stats["batches"] += 1
+        self.stats["items"] += len(items)
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+
+    async def _post(self, url: str, items: List[Dict[str, Any]], headers: Dict[str, str]) -> None:
+        deadline = time.monotonic() + self.retry_budget
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff_base * 2 ** attempt * random.uniform(0.5, 1.0)
+            timeout = min(self.timeout, max(deadline - time.monotonic(), 0.001))
+            try:
+                response = await self._client.post(url, json=items, headers=headers, timeout=timeout)
+            except httpx.TransportError as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            else:
+                if response.status_code < 400:
+                    return
+                error = f"HTTP {response.status_code}"
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise WebhookDeliveryError(error)
+                retry_after = _retry_after_seconds(response)
+                if retry_after is not None:
+                    delay = min(retry_after, self.max_retry_after)
+
+            if attempt == self.max_retries:
+                raise WebhookDeliveryError(f"{error} after {attempt + 1} attempts")
+            if time.monotonic() + delay >= deadline:
+                raise WebhookDeliveryError(f"{error} after {attempt + 1} attempts; retry budget of {self.retry_budget:g}s spent")
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        for url in list(self._pending):
+            self._flush(url)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+        self._loop = self._client = None
+
+
+webhook_client = WebhookBatchClient(
+    max_batch_size=settings.LINKEDIN_WEBHOOK_BATCH_SIZE,
+    max_wait_ms=settings.LINKEDIN_WEBHOOK_BATCH_WAIT_MS,
+    max_concurrency=settings.LINKEDIN_WEBHOOK_CONCURRENCY,
+    max_retries=settings.LINKEDIN_WEBHOOK_MAX_RETRIES,
+    timeout=settings.LINKEDIN_WEBHOOK_TIMEOUT,
+    max_connections=settings.LINKEDIN_WEBHOOK_MAX_CONNECTIONS,
+    # Never outlive the outbox lease, however the two settings are tuned
+    retry_budget=min(settings.LINKEDIN_WEBHOOK_RETRY_BUDGET_SECONDS, settings.EXPORT_LEASE_SECONDS / 2),
+)
+
+
+def build_standin_app(
+    fail_rate: float = 0.0,
+    retry_after: Optional[float] = 1.0,
+    fail_first: int = 0,
+    fail_status: Optional[int] = None,
+    delay: float = 0.0,
+):
+    """
+    Minimal webhook receiver: records batches, optionally answers 429/503 at
+    random (`fail_rate`) or to the first `fail_first` requests. Failures
+    carry Retry-After unless it is None. `delay` holds each request open
+    so the peak number in flight (state.max_in_flight) shows concurrency.
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    standin = FastAPI(title="Webhook stand-in")
+    standin.state.batches = []
+    standin.state.seen_keys = set()
+    standin.state.requests = []  # monotonic arrival time of every POST, failed ones included
+    standin.state.in_flight = 0
+    standin.state.max_in_flight = 0
+
+    @standin.post("/{path:path}")
+    async def receive(request: Request):
+        state = standin.state
+        state.requests.append(time.monotonic())
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            if len(state.requests) <= fail_first or random.random() < fail_rate:
+                status = fail_status or random.choice((429, 503))
+                headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+                return JSONResponse({"error": "try later"}, status_code=status, headers=headers)
+        finally:
+            state.in_flight -= 1
+        items = await request.json()
+        standin.state.batches.append(items)
+        duplicates = sum(1 for item in items if item.get("idempotency_key") in standin.state.seen_keys)
+        standin.state.seen_keys.update(item.get("idempotency_key") for item in items)
+        logger.info("Received batch of %d (%d duplicate keys)", len(items), duplicates)
+        return {"received": len(items), "duplicates": duplicates}
+
+    @standin.get("/_stats")
+    async def stats():
+        return {
+            "batches": len(standin.state.batches),
+            "items": sum(len(b) for b in standin.state.batches),
+            "unique_keys": len(standin.state.seen_keys),
+        }
+
+    return standin
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stand-in for LINKEDIN_WEBHOOK_URL")
+    parser.add_argument("--port", type=int, default=9009)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 429/503")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to hold each request open")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run(
+        build_standin_app(args.fail_rate, args.retry_after, delay=args.delay),
+        host="127.0.0.1", port=args.port,
+    )
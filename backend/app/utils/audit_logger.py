@@ -1,6 +1,7 @@
 from datetime import datetime
 from sqlmodel import Session
 from app.database.models.base import AuditLog
+from app.services.audit_writer import audit_writer
 
 class AuditLogger:
     @staticmethod
@@ -14,7 +15,9 @@ class AuditLogger:
         icp_id: str,
         priority_score: float,
         action: str = "generate",
+        commit: bool = True,
     ):
+        """Pass commit=False to leave the row in the caller's unit of work."""
         log = AuditLog(
             timestamp=datetime.utcnow(),
             user_id=user_id,
@@ -26,5 +29,8 @@ class AuditLogger:
             icp_id=icp_id,
             priority_score=priority_score,
         )
+        if audit_writer.submit(log):
+            return
         db.add(log)
-        db.commit()
+        if commit:
+            db.commit()
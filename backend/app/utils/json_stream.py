@@ -0,0 +1,152 @@
+"""
+json_stream.py
+Incremental parser for a streamed top-level JSON object.
+
+LLM output arrives as arbitrary text chunks. `feed()` consumes each chunk
+and returns the top-level (key, value) pairs that became complete, so a
+field like "headline" can be pushed to the client before "body" has
+finished generating. Nested objects/arrays are captured whole.
+"""
+import json
+from typing import Any, List, Tuple
+
+
+class IncrementalJSONObjectParser:
+    # Scanner states
+    _BEFORE_OBJECT = "before_object"
+    _BEFORE_KEY = "before_key"
+    _IN_KEY = "in_key"
+    _BEFORE_COLON = "before_colon"
+    _BEFORE_VALUE = "before_value"
+    _IN_STRING = "in_string"
+    _IN_SCALAR = "in_scalar"
+    _IN_NESTED = "in_nested"
+    _AFTER_VALUE = "after_value"
+    _DONE = "done"
+
+    def __init__(self):
+        self.state = self._BEFORE_OBJECT
+        self.fields: dict = {}
+        self._key_buf: List[str] = []
+        self._val_buf: List[str] = []
+        self._escape = False
+        self._nested_depth = 0
+        self._nested_in_string = False
+
+    @property
+    def done(self) -> bool:
+        return self.state == self._DONE
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        completed: List[Tuple[str, Any]] = []
+        for ch in chunk:
+            pair = self._step(ch)
+            if pair is not None:
+                completed.append(pair)
+        return completed
+
+    def _step(self, ch: str):
+        state = self.state
+
+        if state == self._BEFORE_OBJECT:
+            if ch == "{":
+                self.state = self._BEFORE_KEY
+            return None
+
+        if state == self._BEFORE_KEY:
+            if ch == '"':
+                self._key_buf = ['"']
+                self.state = self._IN_KEY
+            elif ch == "}":
+                self.state = self._DONE
+            return None
+
+        if state == self._IN_KEY:
+            self._key_buf.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self.state = self._BEFORE_COLON
+            return None
+
+        if state == self._BEFORE_COLON:
+            if ch == ":":
+                self.state = self._BEFORE_VALUE
+            return None
+
+        if state == self._BEFORE_VALUE:
+            if ch.isspace():
+                return None
+            self._val_buf = [ch]
+            if ch == '"':
+                self.state = self._IN_STRING
+            elif ch in "{[":
+                self._nested_depth = 1
+                self._nested_in_string = False
+                self.state = self._IN_NESTED
+            else:
+                self.state = self._IN_SCALAR
+            return None
+
+        if state == self._IN_STRING:
+            self._val_buf.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                return self._complete(self._AFTER_VALUE)
+            return None
+
+        if state == self._IN_SCALAR:
+            if ch in ",}" or ch.isspace():
+                pair = self._complete(self._AFTER_VALUE)
+                if not ch.isspace():
+                    self._after_value(ch)
+                return pair
+            self._val_buf.append(ch)
+            return None
+
+        if state == self._IN_NESTED:
+            self._val_buf.append(ch)
+            if self._nested_in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._nested_in_string = False
+            elif ch == '"':
+                self._nested_in_string = True
+            elif ch in "{[":
+                self._nested_depth += 1
+            elif ch in "}]":
+                self._nested_depth -= 1
+                if self._nested_depth == 0:
+                    return self._complete(self._AFTER_VALUE)
+            return None
+
+        if state == self._AFTER_VALUE:
+            self._after_value(ch)
+            return None
+
+        return None
+
+    def _after_value(self, ch: str) -> None:
+        if ch == ",":
+            self.state = self._BEFORE_KEY
+        elif ch == "}":
+            self.state = self._DONE
+
+    def _complete(self, next_state: str):
+        self.state = next_state
+        key = json.loads("".join(self._key_buf))
+        raw = "".join(self._val_buf)
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        self.fields[key] = value
+        return key, value
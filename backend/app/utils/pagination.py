@@ -0,0 +1,43 @@
+"""
+pagination.py
+Opaque keyset cursors over (created_at, id), newest first.
+
+A page is `WHERE (created_at, id) < (cursor) ORDER BY created_at DESC, id
+DESC LIMIT n` on an index that starts with (created_at, id) (or
+(channel, created_at, id) when filtered). Every page is one index range
+scan, so page 1,000 costs the same as page 1, unlike OFFSET.
+"""
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for anything that did not come from encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+
+
+def keyset_page(query, created_col, id_col, cursor: Optional[str], limit: int):
+    """Applies the cursor predicate, newest-first ordering and limit+1 (to detect a next page)."""
+    if cursor:
+        query = query.where(tuple_(created_col, id_col) < decode_cursor(cursor))
+    return query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+
+
+def split_page(rows: Sequence[Any], limit: int, key=lambda row: (row.created_at, row.id)) -> Tuple[List[Any], Optional[str]]:
+    """Drops the look-ahead row and returns (page, next_cursor)."""
+    page = list(rows[:limit])
+    next_cursor = encode_cursor(*key(page[-1])) if len(rows) > limit and page else None
+    return page, next_cursor
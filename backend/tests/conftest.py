@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# Point every on-disk store at a scratch directory before app.core.config is imported
+_scratch = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch}/test.db")
+os.environ.setdefault("LLM_CACHE_PATH", f"{_scratch}/llm_cache.db")
+os.environ.setdefault("EMBEDDING_CACHE_DIR", f"{_scratch}/embedding_cache")
+os.environ.setdefault("ICP_INDEX_DIR", f"{_scratch}/vector_db")
+os.environ.setdefault("AUDIT_ARCHIVE_DIR", f"{_scratch}/audit_archive")
+os.environ.setdefault("OPENROUTER_API_KEY", "test-key")  # clients are built at import; tests never call the LLM
@@ -0,0 +1,23 @@
+import threading
+import time
+
+from app.database.models.base import AuditLog
+from app.services.audit_writer import AuditWriter
+
+
+def test_submit_falls_back_instead_of_blocking_when_full():
+    writer = AuditWriter(max_buffer=1)
+    # Stands in for a writer thread stuck on a slow database: it never drains the buffer
+    stalled = threading.Event()
+    writer._thread = threading.Thread(target=stalled.wait, daemon=True)
+    writer._thread.start()
+    try:
+        log = AuditLog(user_id=1, action="test")
+        assert writer.submit(log)
+        started = time.monotonic()
+        assert not writer.submit(log)
+        assert time.monotonic() - started < 0.5
+        assert writer.counters["overflow"] == 1
+    finally:
+        stalled.set()
+        writer._thread.join()
@@ -0,0 +1,14 @@
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum")
+
+from app.services.embedding_service import backend_parity  # noqa: E402
+
+
+@pytest.mark.parametrize("backend, min_cosine", [("onnx", 0.999), ("onnx-int8", 0.98)])
+def test_onnx_backend_matches_torch_vectors(backend, min_cosine):
+    # backend_parity raises if the candidate silently fell back to torch
+    report = backend_parity(backend)
+    assert report["candidate"] == backend
+    assert report["min_cosine"] >= min_cosine
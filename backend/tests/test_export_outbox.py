@@ -0,0 +1,64 @@
+import asyncio
+
+from pydantic import BaseModel
+from sqlmodel import Session
+
+import app.database.models.base  # noqa: F401 — tables referenced by foreign keys
+from app.database.models.exports import Export
+from app.database.session import engine, init_db
+from app.services.export_outbox import ExportOutbox
+
+
+class Payload(BaseModel):
+    n: int
+
+
+def test_worker_survives_a_failed_finish(monkeypatch):
+    init_db()
+    outbox = ExportOutbox(workers=1, poll_seconds=0.05, claim_batch=1, lease_seconds=60)
+    delivered = []
+
+    async def handler(payload: dict, idempotency_key: str) -> str:
+        delivered.append(payload["n"])
+        return "standin"
+
+    outbox.register("outbox-test", handler)
+    with Session(engine) as db:
+        first, _ = outbox.enqueue(db, "outbox-test", Payload(n=1), user_id=1)
+        db.commit()
+        second, _ = outbox.enqueue(db, "outbox-test", Payload(n=2), user_id=1)
+        db.commit()
+        first_id, second_id = first.id, second.id
+
+    finish = outbox._finish
+    failures = []
+
+    def flaky_finish(export_id, *args):
+        if not failures:
+            failures.append(export_id)
+            raise RuntimeError("database is locked")
+        return finish(export_id, *args)
+
+    monkeypatch.setattr(outbox, "_finish", flaky_finish)
+
+    async def run():
+        await outbox.start()
+        try:
+            for _ in range(200):
+                await asyncio.sleep(0.02)
+                with Session(engine) as db:
+                    if db.get(Export, second_id).status == "success":
+                        break
+            return all(not task.done() for task in outbox._tasks)
+        finally:
+            await outbox.stop()
+
+    workers_alive = asyncio.run(run())
+
+    assert workers_alive
+    assert failures == [first_id]
+    assert delivered == [1, 2]
+    with Session(engine) as db:
+        # The failed bookkeeping leaves the row leased; it is reclaimed when the lease runs out
+        assert db.get(Export, first_id).status == "delivering"
+        assert db.get(Export, second_id).status == "success"
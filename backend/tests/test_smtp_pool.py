@@ -0,0 +1,160 @@
+import asyncio
+import smtplib
+import socket
+import time
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import AuthResult  # noqa: E402
+
+from app.services.smtp_pool import AsyncRateLimiter, SMTPConnectionPool, provider_rate_limiter  # noqa: E402
+
+
+class StandinSMTP:
+    """aiosmtpd handler that records delivered messages and logins (one per connection)."""
+
+    def __init__(self):
+        self.messages = []
+        self.logins = 0
+        self.drop_after_data = False  # store the message, then hang up before replying
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        if self.drop_after_data:
+            server.transport.close()
+        return "250 OK"
+
+    def authenticate(self, server, session, envelope, mechanism, auth_data):
+        self.logins += 1
+        return AuthResult(success=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = StandinSMTP()
+    controller = Controller(
+        handler, hostname="127.0.0.1", port=_free_port(),
+        authenticator=handler.authenticate, auth_require_tls=False,
+    )
+    controller.start()
+    try:
+        yield handler, controller.hostname, controller.port
+    finally:
+        controller.stop()
+
+
+def test_pool_reuses_one_connection_for_sequential_sends(smtp_server):
+    handler, host, port = smtp_server
+    pool = SMTPConnectionPool(host, port, "user", "secret", size=2)
+    try:
+        for i in range(20):
+            pool.send("noreply@example.com", [f"lead{i}@example.com"], f"Subject: {i}\n\nbody {i}")
+    finally:
+        pool.close()
+
+    assert len(handler.messages) == 20
+    assert handler.logins == 1
+    assert pool.counters["connects"] == 1
+    assert pool.counters["reuses"] == 19
+
+
+def test_pool_recycles_after_max_messages(smtp_server):
+    handler, host, port = smtp_server
+    pool = SMTPConnectionPool(host, port, "user", "secret", size=1, max_messages=5)
+    try:
+        for i in range(12):
+            pool.send("noreply@example.com", ["lead@example.com"], f"Subject: {i}\n\nbody")
+    finally:
+        pool.close()
+
+    assert len(handler.messages) == 12
+    assert pool.counters["connects"] == 3
+
+
+def test_dropped_idle_connection_is_retried_on_a_fresh_one(smtp_server):
+    handler, host, port = smtp_server
+    pool = SMTPConnectionPool(host, port, "user", "secret", size=1)
+    try:
+        pool.send("noreply@example.com", ["lead@example.com"], "Subject: 1\n\nbody")
+        # The pooled connection dies between sends, before the next MAIL FROM
+        pool._idle.queue[0].smtp.close()
+        pool.send("noreply@example.com", ["lead@example.com"], "Subject: 2\n\nbody")
+    finally:
+        pool.close()
+
+    assert len(handler.messages) == 2
+    assert pool.counters["reconnects"] == 1
+    assert pool.counters["connects"] == 2
+
+
+def test_disconnect_after_data_is_not_resent(smtp_server):
+    handler, host, port = smtp_server
+    handler.drop_after_data = True
+    pool = SMTPConnectionPool(host, port, "user", "secret", size=1)
+    try:
+        with pytest.raises(smtplib.SMTPServerDisconnected):
+            pool.send("noreply@example.com", ["lead@example.com"], "Subject: 1\n\nbody")
+    finally:
+        pool.close()
+
+    # The server may have accepted it; resending is left to the outbox
+    assert len(handler.messages) == 1
+    assert pool.counters["reconnects"] == 0
+
+
+def test_rate_limiter_spaces_sends_per_provider():
+    assert provider_rate_limiter("smtp.example.com") is provider_rate_limiter("smtp.example.com")
+    assert provider_rate_limiter("smtp.example.com") is not provider_rate_limiter("smtp.other.com")
+
+    limiter = AsyncRateLimiter(rate_per_second=50)
+
+    async def burst():
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(11)))
+        return time.monotonic() - start
+
+    # 11 acquisitions at 50/s: the last one waits 10 intervals
+    assert asyncio.run(burst()) >= 0.19
+
+
+def test_email_batch_endpoint_delivers_over_pooled_connections(smtp_server, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.main import app
+
+    handler, host, port = smtp_server
+    monkeypatch.setattr(settings, "SMTP_HOST", host)
+    monkeypatch.setattr(settings, "SMTP_PORT", port)
+    monkeypatch.setattr(settings, "SMTP_USERNAME", "user")
+    monkeypatch.setattr(settings, "SMTP_PASSWORD", "secret")
+
+    messages = [
+        {"subject": f"Hello {i}", "body": "Quick question", "recipient": f"lead{i}@example.com"}
+        for i in range(30)
+    ]
+    with TestClient(app) as client:
+        response = client.post("/api/v1/export/email/batch", json={"messages": messages})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["queued"] == 30 and body["failed"] == 0
+
+        deadline = time.monotonic() + 20
+        while len(handler.messages) < 30 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        statuses = {client.get(f"/api/v1/export/{r['export_id']}").json()["status"] for r in body["results"]}
+
+    assert len(handler.messages) == 30
+    assert statuses == {"success"}
+    # Concurrent sends share at most SMTP_POOL_SIZE connections instead of one handshake per message
+    assert handler.logins <= settings.SMTP_POOL_SIZE
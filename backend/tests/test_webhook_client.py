@@ -0,0 +1,103 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from app.services.webhook_client import WebhookBatchClient, WebhookDeliveryError, build_standin_app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def serve():
+    """Runs a stand-in app on a local port; yields a function (app) -> URL."""
+    servers = []
+
+    def start(standin):
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(standin, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.started and time.monotonic() < deadline:
+            time.sleep(0.01)
+        servers.append((server, thread))
+        return f"http://127.0.0.1:{port}/hook"
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def _deliver(client: WebhookBatchClient, url: str, count: int) -> list:
+    async def run():
+        try:
+            return await asyncio.gather(
+                *(client.submit(url, {"idempotency_key": f"k{i}", "n": i}) for i in range(count)),
+                return_exceptions=True,
+            )
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_429_retry_after_is_honoured(serve):
+    standin = build_standin_app(fail_first=2, fail_status=429, retry_after=0.3)
+    url = serve(standin)
+    client = WebhookBatchClient(max_batch_size=10, max_wait_ms=5, backoff_base=0.01)
+
+    results = _deliver(client, url, 10)
+
+    assert results == [None] * 10
+    arrivals = standin.state.requests
+    assert len(arrivals) == 3
+    # Each retry waited the server's Retry-After, not the 10 ms backoff
+    assert all(later - earlier >= 0.28 for earlier, later in zip(arrivals, arrivals[1:]))
+    assert client.stats["retries"] == 2
+    assert [item["n"] for item in standin.state.batches[0]] == list(range(10))
+
+
+def test_5xx_is_retried_then_fails_after_max_retries(serve):
+    flaky = build_standin_app(fail_first=1, fail_status=503, retry_after=None)
+    client = WebhookBatchClient(max_batch_size=5, max_wait_ms=5, backoff_base=0.01)
+    assert _deliver(client, serve(flaky), 5) == [None] * 5
+    assert len(flaky.state.requests) == 2
+
+    down = build_standin_app(fail_first=100, fail_status=503, retry_after=None)
+    client = WebhookBatchClient(max_batch_size=5, max_wait_ms=5, backoff_base=0.01, max_retries=2)
+    results = _deliver(client, serve(down), 5)
+    assert all(isinstance(r, WebhookDeliveryError) for r in results)
+    assert len(down.state.requests) == 3
+    assert client.stats["failed_batches"] == 1
+
+
+def test_retry_budget_stops_before_long_retry_after(serve):
+    standin = build_standin_app(fail_first=100, fail_status=429, retry_after=30)
+    client = WebhookBatchClient(max_batch_size=5, max_wait_ms=5, retry_budget=1.0)
+
+    start = time.monotonic()
+    results = _deliver(client, serve(standin), 5)
+
+    assert time.monotonic() - start < 5
+    assert all(isinstance(r, WebhookDeliveryError) and "retry budget" in str(r) for r in results)
+    assert len(standin.state.requests) == 1
+
+
+def test_posts_in_flight_never_exceed_max_concurrency(serve):
+    standin = build_standin_app(delay=0.2)
+    client = WebhookBatchClient(max_batch_size=5, max_wait_ms=5, max_concurrency=3)
+
+    results = _deliver(client, serve(standin), 60)
+
+    assert results == [None] * 60
+    assert len(standin.state.batches) == 12
+    assert standin.state.max_in_flight == 3